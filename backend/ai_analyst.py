@@ -1,4 +1,4 @@
-import requests
+import http_client
 import json
 import os
 
@@ -39,7 +39,7 @@ def analyze_with_agentrouter(question, risk_data):
     }
     
     try:
-        response = requests.post(AGENTROUTER_API_URL, headers=headers, json=payload, timeout=10)
+        response = http_client.post(AGENTROUTER_API_URL, headers=headers, json=payload, deadline=10)
         if response.status_code == 200:
             result = response.json()
             return result["choices"][0]["message"]["content"]
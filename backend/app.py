@@ -1,16 +1,28 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 import json
 import boto3
 import os
-from gremlin_python.process.graph_traversal import __
-from gremlin_python.process.traversal import T
 import threading
 import base64
+import hashlib
 from dotenv import load_dotenv
 import time
 from datetime import datetime, timezone
 import logging
+import queue
+from graph_metrics import GraphMetricsEngine, metrics_response
+from metrics_view import read_metrics_summary
+from risk_view import compute_validator_risk, query_risk_view, read_risk_view
+from graph_projection import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, decode_cursor, fetch_subgraph_page
+from graph_version import GraphVersionWatcher
+from graph_stream import HEARTBEAT_INTERVAL, STREAM_LIMIT, GraphBroadcaster, format_sse
+from graph_repository import create_repository
+try:
+    from stake_analytics import StakeAnalytics
+except ImportError as e:
+    print(f"Warning: Failed to import StakeAnalytics: {e}")
+    StakeAnalytics = None
 
 # Load environment variables from .env
 load_dotenv()
@@ -37,11 +49,17 @@ except Exception as e:
     UnbondingForecastService = None
 
 try:
-    from restaking_arbitrage import RestakingArbitrageBot
+    from restaking_arbitrage import PROTOCOLS, RestakingArbitrageBot
 except Exception as e:
     print(f"Warning: Failed to import RestakingArbitrageBot: {e}")
     RestakingArbitrageBot = None
 
+try:
+    from apy_store import APY_SAMPLE_INTERVAL, DEFAULT_POINTS, ApySampler, ApyStore, format_history
+except Exception as e:
+    print(f"Warning: Failed to import ApyStore: {e}")
+    ApyStore = None
+
 try:
     from transaction_executor import TransactionExecutor
 except Exception as e:
@@ -62,9 +80,16 @@ except Exception as e:
     def generate_sign_message(ts): return f"Sign this message: {ts}"
     def extract_token_from_header(h): return None
 
-# Global connection pool
-_gremlin_conn = None
-_gremlin_lock = threading.Lock()
+# Graph store for API reads (GRAPH_BACKEND=gremlin|memory); Gremlin checks a pooled connection out per call
+graph_repo = create_repository()
+
+# Server-side aggregation for /api/metrics
+metrics_engine = GraphMetricsEngine()
+
+# Serialized payloads of the polled endpoints, reused until the graph version changes
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+RESPONSE_CACHE_MAX_ENTRIES = 256
 
 # Initialize services with fallbacks
 try:
@@ -85,6 +110,15 @@ except Exception as e:
     print(f"Warning: Failed to initialize RestakingArbitrageBot: {e}")
     arbitrage_bot = None
 
+try:
+    # Persistent APY/TVL history; one process samples, every worker reads
+    apy_store = ApyStore() if arbitrage_bot and ApyStore else None
+    if apy_store and APY_SAMPLE_INTERVAL > 0:
+        ApySampler(arbitrage_bot, apy_store).start()
+except Exception as e:
+    print(f"Warning: Failed to initialize ApyStore: {e}")
+    apy_store = None
+
 try:
     tx_executor = TransactionExecutor() if TransactionExecutor else None
 except Exception as e:
@@ -92,38 +126,63 @@ except Exception as e:
     tx_executor = None
 
 
-def get_gremlin_connection():
-    """Get or create a reusable Gremlin connection with retry logic"""
-    global _gremlin_conn
-    with _gremlin_lock:
-        if _gremlin_conn is None:
-            from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
-            gremlin_endpoint = os.getenv('GREMLIN_ENDPOINT', 'ws://gremlin-server:8182/gremlin')
-            
-            # Retry logic with exponential backoff
-            max_retries = 3
-            retry_delay = 1  # seconds
-            
-            for attempt in range(max_retries):
-                try:
-                    logger.info(f"Attempting Gremlin connection (attempt {attempt + 1}/{max_retries})...")
-                    _gremlin_conn = DriverRemoteConnection(
-                        gremlin_endpoint, 
-                        'g',
-                        max_workers=4
-                    )
-                    logger.info(f"✅ Successfully connected to Gremlin at {gremlin_endpoint}")
-                    break
-                except Exception as e:
-                    logger.error(f"❌ Gremlin connection attempt {attempt + 1} failed: {e}")
-                    if attempt < max_retries - 1:
-                        logger.info(f"Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
-                    else:
-                        logger.error(f"Failed to connect to Gremlin after {max_retries} attempts")
-                        return None
-        return _gremlin_conn
+def start_embedded_ingester():
+    """The embedded store lives in this process, so the ingester has to run here too"""
+    from casper_ingest import CasperIngestor
+    ingestor = CasperIngestor(repo=graph_repo)
+    threading.Thread(target=ingestor.run_forever, name="embedded-ingester", daemon=True).start()
+
+
+if graph_repo.backend == 'memory':
+    start_embedded_ingester()
+
+graph_version = GraphVersionWatcher(graph_repo)
+graph_broadcaster = GraphBroadcaster(graph_version, graph_repo)
+stake_analytics = StakeAnalytics(graph_repo) if StakeAnalytics else None
+
+
+def stake_distribution():
+    """Stake distribution for the current graph version, None without numpy or on error"""
+    if not stake_analytics:
+        return None
+    try:
+        return stake_analytics.summary(graph_version.current())
+    except Exception as e:
+        print(f"Error computing stake distribution: {e}")
+        return None
+
+
+def versioned_response(cache_key, build_payload):
+    """Serve build_payload() as JSON with an ETag derived from the graph version.
+    
+    A matching If-None-Match gets a 304, and the serialized payload is reused
+    until the ingester bumps the version, so neither path touches the graph store.
+    """
+    version = graph_version.current()
+    if version is None:
+        return jsonify(build_payload()), 200
+    
+    etag = hashlib.sha1(f"{version}:{cache_key}".encode()).hexdigest()[:20]
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    with _response_cache_lock:
+        cached = _response_cache.get(cache_key)
+    if cached and cached[0] == version:
+        body = cached[1]
+    else:
+        body = json.dumps(build_payload())
+        with _response_cache_lock:
+            if len(_response_cache) >= RESPONSE_CACHE_MAX_ENTRIES:
+                _response_cache.clear()
+            _response_cache[cache_key] = (version, body)
+    
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 def check_wallet_auth():
@@ -146,7 +205,7 @@ def index():
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint for Docker health checks"""
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({"status": "healthy", "graph_backend": graph_repo.backend, **graph_repo.health()}), 200
 
 
 @app.route('/api/auth/sign-message', methods=['POST', 'OPTIONS'])
@@ -200,52 +259,19 @@ def verify_sig():
         return jsonify({"error": str(e)}), 500
 
 
+def _build_metrics():
+    # Prefer the summary record the ingester maintains; aggregate on the server otherwise
+    summary = read_metrics_summary(graph_repo) or metrics_engine.fetch(graph_repo)
+    logger.debug("Metrics summary: %s, %s whales, %.0f CSPR staked",
+                 summary['groups'], summary['whale_count'], summary['total_stake_cspr'])
+    return metrics_response(summary, stake_distribution())
+
+
 @app.route('/api/metrics', methods=['GET'])
 def metrics():
     # Metrics are public network data, no auth required
     try:
-        from gremlin_python.process.anonymous_traversal import traversal
-        
-        conn = get_gremlin_connection()
-        if conn is None:
-            raise Exception("No Gremlin connection available")
-        
-        g = traversal().withRemote(conn)
-        
-        try:
-            all_nodes = g.V().valueMap(True).toList()
-            
-            whales = sum(1 for n in all_nodes if n.get('group', [''])[0] == 'Whale')
-            providers = sum(1 for n in all_nodes if n.get('group', [''])[0] == 'Provider')
-            chains = sum(1 for n in all_nodes if n.get('group', [''])[0] == 'Chain')
-            
-            print(f"DEBUG: Found {len(all_nodes)} total nodes: {whales} whales, {providers} providers, {chains} chains")
-        except Exception as e:
-            print(f"Error counting nodes: {e}")
-            whales = 5
-            providers = 8
-            chains = 3
-        
-        whales = max(1, whales)
-        providers = max(1, providers)
-        chains = max(1, chains)
-        
-        total_btc = whales * 2.5
-        concentration = min(1.0, max(0.0, 0.2 + (whales * 0.05)))
-        
-        concentration_risk = concentration * 4
-        provider_risk = max(0, (1 - (providers / 15)) * 3)
-        chain_risk = max(0, (1 - (chains / 5)) * 3)
-        risk_score = max(0, min(10, concentration_risk + provider_risk + chain_risk))
-        
-        return jsonify({
-            "total_staked_btc": round(total_btc, 2),
-            "total_providers": int(providers),
-            "total_chains": int(chains),
-            "concentration_ratio": round(concentration, 2),
-            "risk_score": round(risk_score, 1),
-            "last_update": datetime.now(timezone.utc).isoformat()
-        }), 200
+        return versioned_response('metrics', _build_metrics)
     except Exception as e:
         print(f"Error calculating metrics: {e}")
         import traceback
@@ -260,85 +286,112 @@ def metrics():
         }), 200
 
 
+@app.route('/api/stake-distribution', methods=['GET'])
+def stake_distribution_endpoint():
+    # Public network data, no auth required
+    def build():
+        distribution = stake_distribution()
+        if distribution is None:
+            raise RuntimeError("stake analytics unavailable")
+        return distribution
+    
+    try:
+        return versioned_response('stake-distribution', build)
+    except Exception as e:
+        print(f"Error serving stake distribution: {e}")
+        return jsonify({"error": "Stake distribution unavailable"}), 503
+
+
 @app.route('/api/risk-analysis', methods=['GET'])
 def risk_analysis():
+    sort = request.args.get('sort', 'risk_score')
+    order = request.args.get('order', 'desc')
+    risk = [level for arg in request.args.getlist('risk') for level in arg.split(',') if level]
+    min_score = request.args.get('min_score', type=float)
+    limit = request.args.get('limit', type=int)
     try:
-        return jsonify([
-            {"chain": "Osmosis", "smart_money_btc": 12.5, "risk": "MODERATE"},
-            {"chain": "Neutron", "smart_money_btc": 7.5, "risk": "CRITICAL"},
-            {"chain": "Stargaze", "smart_money_btc": 5.0, "risk": "CRITICAL"}
-        ]), 200
+        query_risk_view([], sort=sort, order=order, risk=risk)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def build():
+        # The ingester materializes the view once per cycle; score here only until it has
+        rows = read_risk_view(graph_repo)
+        if rows is None:
+            rows = compute_validator_risk(graph_repo)
+        return query_risk_view(rows, sort=sort, order=order, risk=risk, min_score=min_score, limit=limit)
+    
+    try:
+        cache_key = f"risk-analysis:{sort}:{order}:{','.join(sorted(risk))}:{min_score}:{limit}"
+        return versioned_response(cache_key, build)
     except Exception as e:
         print(f"Error calculating risk analysis: {e}")
-        return jsonify([
-            {"chain": "Osmosis", "smart_money_btc": 12.5, "risk": "MODERATE"},
-            {"chain": "Neutron", "smart_money_btc": 7.5, "risk": "CRITICAL"},
-            {"chain": "Stargaze", "smart_money_btc": 5.0, "risk": "CRITICAL"}
-        ]), 200
+        return jsonify([]), 200
 
 
 @app.route('/api/graph-data', methods=['GET'])
 def graph_data():
     try:
-        from gremlin_python.process.anonymous_traversal import traversal
-        
-        conn = get_gremlin_connection()
-        if conn is None:
-            raise Exception("No Gremlin connection available")
-        
-        g = traversal().withRemote(conn)
-        
-        vertices = g.V().limit(50).valueMap(True).toList()
-        nodes = []
-        id_to_name = {}
-        
-        for v in vertices:
-            vid = v[T.id]
-            name = v.get('name', v.get('pk', [f'Node-{vid}']))[0]
-            name = str(name)[:30]
-            
-            id_to_name[vid] = name
-            nodes.append({
-                "id": name,
-                "name": name,
-                "group": v.get('group', ['Provider'])[0],
-                "val": v.get('val', [10])[0]
-            })
-        
-        edges_raw = g.E().limit(100).toList()
-        links = []
-        
-        for e in edges_raw:
-            try:
-                source_id = e.outV.id
-                target_id = e.inV.id
-                
-                source_name = id_to_name.get(source_id)
-                target_name = id_to_name.get(target_id)
-                
-                if source_name and target_name:
-                    links.append({
-                        "source": source_name,
-                        "target": target_name
-                    })
-            except Exception as e_err:
-                print(f"Edge error: {e_err}")
-                continue
-        
-        print(f"Live data: {len(nodes)} nodes, {len(links)} links")
-        return jsonify({"nodes": nodes, "links": links}), 200
+        groups = [grp for arg in request.args.getlist('group') for grp in arg.split(',') if grp]
+        min_stake = request.args.get('min_stake', type=float)
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        cursor = request.args.get('cursor')
+        if cursor:
+            decode_cursor(cursor)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def build_page():
+        page = fetch_subgraph_page(graph_repo, cursor=cursor, limit=limit, groups=groups, min_stake=min_stake)
+        print(f"Live data: {len(page['nodes'])} nodes, {len(page['links'])} links")
+        return page
+    
+    try:
+        cache_key = f"graph-data:{cursor}:{limit}:{','.join(sorted(groups))}:{min_stake}"
+        return versioned_response(cache_key, build_page)
         
     except Exception as e:
-        print(f"Gremlin error: {e}")
+        print(f"Graph store error: {e}")
         return jsonify({
             "nodes": [
                 {"id": "osmosis", "name": "Osmosis", "group": "Chain", "val": 25},
                 {"id": "p2p", "name": "P2P Validator", "group": "Provider", "val": 18}
             ],
-            "links": [{"source": "p2p", "target": "osmosis"}]
+            "links": [{"source": "p2p", "target": "osmosis"}],
+            "next_cursor": None
         }), 200
 
 
+@app.route('/api/graph-stream', methods=['GET'])
+def graph_stream():
+    """Server-sent events: a snapshot of the first graph page on connect, then one delta per ingest cycle"""
+    groups = [grp for arg in request.args.getlist('group') for grp in arg.split(',') if grp]
+    min_stake = request.args.get('min_stake', type=float)
+    limit = max(1, min(request.args.get('limit', STREAM_LIMIT, type=int), MAX_PAGE_SIZE))
+    try:
+        subscription = graph_broadcaster.subscribe(limit=limit, groups=groups, min_stake=min_stake)
+    except Exception as e:
+        print(f"Graph stream error: {e}")
+        return jsonify({"error": "Graph stream unavailable"}), 503
+    
+    def events():
+        try:
+            while True:
+                try:
+                    event, data = subscription.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            graph_broadcaster.unsubscribe(subscription)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
 @app.route('/api/unbonding-forecast', methods=['GET'])
 def unbonding_forecast():
     try:
@@ -412,14 +465,31 @@ def restaking_opportunities():
 
 @app.route('/api/restaking/apy-history', methods=['GET'])
 def restaking_apy_history():
+    hours = request.args.get('hours', 24, type=float)
+    points = request.args.get('points', type=int)
+    method = request.args.get('method', 'lttb')
+    metric = request.args.get('metric', 'apy')
+    if hours <= 0:
+        return jsonify({"error": "hours must be positive"}), 400
     try:
+        if apy_store:
+            # Served from the rollup that matches the window, so long ranges stay cheap
+            end = time.time()
+            history, resolution = {}, None
+            for protocol in PROTOCOLS:
+                resolution, rows = apy_store.query(protocol, metric, start=end - hours * 3600, end=end,
+                                                   points=points or DEFAULT_POINTS)
+                history[protocol] = format_history(rows, metric)
+            return jsonify({"history": history, "resolution": resolution}), 200
+        if metric != 'apy':
+            return jsonify({"error": "metric=tvl needs the persistent APY store"}), 400
         if arbitrage_bot:
-            history = {}
-            for protocol in ['lombard', 'solv', 'babylon']:
-                history[protocol] = arbitrage_bot.get_apy_history(protocol, hours=24)
+            history = arbitrage_bot.get_all_apy_history(hours=hours, points=points, method=method)
             return jsonify({"history": history}), 200
         else:
             return jsonify({"history": {}}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error getting APY history: {e}")
         return jsonify({"history": {}}), 200
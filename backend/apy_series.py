@@ -0,0 +1,146 @@
+"""
+Bounded in-memory time series for protocol APY history.
+Each protocol keeps a fixed-size ring of epoch-second timestamps and float
+values in compact arrays, so memory stays flat however long the process runs.
+Range queries binary-search the timestamps and can be downsampled (LTTB or
+bucket means) to the number of points a chart needs.
+"""
+import os
+import threading
+from array import array
+from typing import List, Optional, Tuple
+
+# Samples kept per protocol; the oldest are overwritten once full
+APY_HISTORY_POINTS = int(os.getenv("APY_HISTORY_POINTS", 10000))
+DOWNSAMPLE_METHODS = ('lttb', 'bucket')
+
+
+class RingSeries:
+    """Fixed-capacity series of (epoch seconds, value), oldest first"""
+
+    def __init__(self, capacity: int = APY_HISTORY_POINTS):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamps = array('q', [0]) * capacity
+        self._values = array('d', [0.0]) * capacity
+        self._start = 0  # Physical index of the oldest sample
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _timestamp(self, i: int) -> int:
+        return self._timestamps[(self._start + i) % self.capacity]
+
+    def append(self, timestamp: int, value: float):
+        """Adds a sample; timestamps earlier than the newest are clamped to keep the series sorted"""
+        with self._lock:
+            if self._size:
+                timestamp = max(int(timestamp), self._timestamp(self._size - 1))
+            if self._size < self.capacity:
+                slot = (self._start + self._size) % self.capacity
+                self._size += 1
+            else:
+                slot = self._start
+                self._start = (self._start + 1) % self.capacity
+            self._timestamps[slot] = int(timestamp)
+            self._values[slot] = value
+
+    def _bisect(self, timestamp: int) -> int:
+        """First logical index whose timestamp is >= `timestamp`"""
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[array, array]:
+        """Timestamps and values with start <= timestamp <= end"""
+        with self._lock:
+            first = self._bisect(start) if start is not None else 0
+            last = self._bisect(end + 1) if end is not None else self._size
+            timestamps, values = array('q'), array('d')
+            if first >= last:
+                return timestamps, values
+            # At most two contiguous slices of the ring
+            lo = (self._start + first) % self.capacity
+            hi = lo + (last - first)
+            timestamps.extend(self._timestamps[lo:min(hi, self.capacity)])
+            values.extend(self._values[lo:min(hi, self.capacity)])
+            if hi > self.capacity:
+                timestamps.extend(self._timestamps[:hi - self.capacity])
+                values.extend(self._values[:hi - self.capacity])
+            return timestamps, values
+
+    def latest(self) -> Optional[Tuple[int, float]]:
+        with self._lock:
+            if not self._size:
+                return None
+            slot = (self._start + self._size - 1) % self.capacity
+            return self._timestamps[slot], self._values[slot]
+
+
+def lttb(timestamps, values, points: int) -> Tuple[List[int], List[float]]:
+    """Largest-Triangle-Three-Buckets: keeps the `points` samples that best preserve the shape"""
+    if points < 3:
+        raise ValueError("lttb needs at least 3 points")
+    n = len(timestamps)
+    if points >= n:
+        return list(timestamps), list(values)
+
+    sampled_t, sampled_v = [timestamps[0]], [values[0]]
+    every = (n - 2) / (points - 2)
+    a = 0
+    for i in range(points - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_lo = int((i + 1) * every) + 1
+        next_hi = min(int((i + 2) * every) + 1, n)
+        avg_t = sum(timestamps[next_lo:next_hi]) / (next_hi - next_lo)
+        avg_v = sum(values[next_lo:next_hi]) / (next_hi - next_lo)
+
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        at, av = timestamps[a], values[a]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((at - avg_t) * (values[j] - av) - (at - timestamps[j]) * (avg_v - av))
+            if area > best_area:
+                best, best_area = j, area
+        sampled_t.append(timestamps[best])
+        sampled_v.append(values[best])
+        a = best
+
+    sampled_t.append(timestamps[-1])
+    sampled_v.append(values[-1])
+    return sampled_t, sampled_v
+
+
+def bucket_mean(timestamps, values, points: int) -> Tuple[List[int], List[float]]:
+    """Splits the samples into `points` equal-count buckets and averages each"""
+    if points < 1:
+        raise ValueError("points must be positive")
+    n = len(timestamps)
+    if points >= n:
+        return list(timestamps), list(values)
+    sampled_t, sampled_v = [], []
+    for i in range(points):
+        lo, hi = i * n // points, (i + 1) * n // points
+        sampled_t.append(sum(timestamps[lo:hi]) // (hi - lo))
+        sampled_v.append(sum(values[lo:hi]) / (hi - lo))
+    return sampled_t, sampled_v
+
+
+def downsample(timestamps, values, points: Optional[int], method: str = 'lttb') -> Tuple[List[int], List[float]]:
+    """Reduces a series to at most `points` samples; raises ValueError for unknown methods"""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    if not points:
+        return list(timestamps), list(values)
+    if method == 'lttb':
+        return lttb(timestamps, values, points)
+    return bucket_mean(timestamps, values, points)
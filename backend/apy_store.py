@@ -0,0 +1,240 @@
+"""
+Persistent APY/TVL history for the restaking bot.
+A background sampler records every protocol's APY and TVL into an append-only
+SQLite file, keeping raw samples plus minute, hour and day rollups. Range
+queries read the coarsest table that still gives the requested resolution, so
+a year-long chart reads a few hundred day rows instead of every raw sample.
+Only one process (per store file) samples at a time; the others just read.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ApyStore")
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # No advisory locks (Windows dev boxes): every process samples, SQLite serializes the writes
+    HAS_FCNTL = False
+
+APY_STORE_PATH = os.getenv("APY_STORE_PATH", "/var/lib/caspereye-market/apy_history.db")
+APY_SAMPLE_INTERVAL = float(os.getenv("APY_SAMPLE_INTERVAL", 60))
+DEFAULT_POINTS = int(os.getenv("APY_HISTORY_DEFAULT_POINTS", 500))
+METRICS = ('apy', 'tvl')
+
+# Resolution in seconds (0 = raw samples) -> how long it is kept; None keeps it forever
+RETENTION = {
+    0: float(os.getenv("APY_RAW_RETENTION", 7 * 86400)),
+    60: float(os.getenv("APY_MINUTE_RETENTION", 30 * 86400)),
+    3600: float(os.getenv("APY_HOUR_RETENTION", 400 * 86400)),
+    86400: None,
+}
+ROLLUPS = (60, 3600, 86400)
+PRUNE_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    protocol TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (protocol, metric, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    protocol TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (resolution, protocol, metric, bucket)
+) WITHOUT ROWID;
+"""
+
+
+class ApyStore:
+    """SQLite-backed raw samples plus minute/hour/day rollups per protocol and metric"""
+
+    def __init__(self, path: str = APY_STORE_PATH, sample_interval: float = APY_SAMPLE_INTERVAL):
+        self.path = path
+        self.sample_interval = sample_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock:
+            # WAL lets other processes read while the sampler writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def record(self, samples: List[Tuple[str, str, float]], timestamp: Optional[float] = None):
+        """Appends (protocol, metric, value) samples at `timestamp` and folds them into every rollup
+
+        A sample whose (protocol, metric, second) is already stored is ignored, so a
+        repeated timestamp can never count twice in the rollups.
+        """
+        ts = int(timestamp if timestamp is not None else time.time())
+        rows = [(protocol, metric, ts, float(value)) for protocol, metric, value in samples if value is not None]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            added = [
+                row for row in rows
+                if self._conn.execute(
+                    "INSERT OR IGNORE INTO samples (protocol, metric, ts, value) VALUES (?, ?, ?, ?)", row
+                ).rowcount
+            ]
+            self._conn.executemany(
+                """INSERT INTO rollups (resolution, protocol, metric, bucket, count, total, min, max)
+                   VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                   ON CONFLICT (resolution, protocol, metric, bucket) DO UPDATE SET
+                       count = count + 1,
+                       total = total + excluded.total,
+                       min = MIN(min, excluded.min),
+                       max = MAX(max, excluded.max)""",
+                [
+                    (resolution, protocol, metric, ts - ts % resolution, value, value, value)
+                    for resolution in ROLLUPS for protocol, metric, _, value in added
+                ],
+            )
+
+    def resolution_for(self, start: float, end: float, points: int) -> int:
+        """Finest resolution that is still retained at `start` and fits the window into `points` rows"""
+        now = time.time()
+        for resolution in (0,) + ROLLUPS:
+            retention = RETENTION[resolution]
+            if retention is not None and start < now - retention:
+                continue
+            step = resolution or self.sample_interval
+            if (end - start) / step <= points:
+                return resolution
+        return ROLLUPS[-1]
+
+    def query(self, protocol: str, metric: str = 'apy', start: Optional[float] = None,
+              end: Optional[float] = None, points: int = DEFAULT_POINTS) -> Tuple[int, List[Dict]]:
+        """Samples of one series between start and end (epoch seconds) and the resolution used
+
+        Each row has `ts`, `value` (mean over the bucket), `min` and `max`.
+        Raises ValueError for unknown metrics or a non-positive point count.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+        if points < 1:
+            raise ValueError("points must be positive")
+        end = end if end is not None else time.time()
+        start = start if start is not None else end - 86400
+        resolution = self.resolution_for(start, end, points)
+
+        with self._lock:
+            if resolution == 0:
+                cursor = self._conn.execute(
+                    "SELECT ts, value, value, value FROM samples "
+                    "WHERE protocol = ? AND metric = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                    (protocol, metric, int(start), int(end)),
+                )
+            else:
+                cursor = self._conn.execute(
+                    "SELECT bucket, total / count, min, max FROM rollups "
+                    "WHERE resolution = ? AND protocol = ? AND metric = ? AND bucket >= ? AND bucket <= ? "
+                    "ORDER BY bucket",
+                    (resolution, protocol, metric, int(start) - int(start) % resolution, int(end)),
+                )
+            rows = cursor.fetchall()
+        return resolution, [{'ts': ts, 'value': value, 'min': low, 'max': high} for ts, value, low, high in rows]
+
+    def prune(self, now: Optional[float] = None):
+        """Drops raw samples and rollups older than their retention"""
+        now = now if now is not None else time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM samples WHERE ts < ?", (int(now - RETENTION[0]),))
+            for resolution in ROLLUPS:
+                if RETENTION[resolution] is not None:
+                    self._conn.execute(
+                        "DELETE FROM rollups WHERE resolution = ? AND bucket < ?",
+                        (resolution, int(now - RETENTION[resolution])),
+                    )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ApySampler:
+    """Background thread recording the bot's APY and TVL for every protocol into an ApyStore"""
+
+    def __init__(self, bot, store: ApyStore, interval: float = APY_SAMPLE_INTERVAL):
+        self.bot = bot
+        self.store = store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._lock_file = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _acquire(self) -> bool:
+        """Takes the store's sampler lock file; only its holder writes samples"""
+        if not HAS_FCNTL:
+            return True
+        if self._lock_file is not None:
+            return True
+        lock_file = open(f"{self.store.path}.lock", 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"📈 Sampling protocol APY/TVL into {self.store.path} every {self.interval:.0f}s")
+        return True
+
+    def sample(self):
+        """Records one APY and TVL reading per protocol"""
+        from restaking_arbitrage import PROTOCOLS
+
+        now = time.time()
+        apys = self.bot.fetch_all_apys()
+        samples = [(protocol, 'apy', apy) for protocol, apy in apys.items()]
+        samples += [(protocol, 'tvl', self.bot.fetch_protocol_tvl(protocol)) for protocol in PROTOCOLS]
+        self.store.record(samples, timestamp=now)
+
+    def run_forever(self):
+        last_prune = 0.0
+        while not self._stop.is_set():
+            # Another worker holding the lock samples; retry in case it exits
+            if self._acquire():
+                try:
+                    self.sample()
+                    if time.time() - last_prune > PRUNE_INTERVAL:
+                        self.store.prune()
+                        last_prune = time.time()
+                except Exception as e:
+                    logger.warning(f"⚠️  APY sample failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name="apy-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def format_history(rows: List[Dict], metric: str = 'apy') -> List[Dict]:
+    """Store rows in the shape /api/restaking/apy-history returns"""
+    return [
+        {'timestamp': datetime.fromtimestamp(row['ts']).isoformat(), metric: row['value'],
+         'min': row['min'], 'max': row['max']}
+        for row in rows
+    ]
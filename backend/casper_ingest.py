@@ -1,14 +1,24 @@
 """
 Casper Network Staking Ingester for CasperEye
-Fetches validators and delegations from CSPR.cloud API and stores in Gremlin graph.
+Fetches validators and delegations from CSPR.cloud API and stores them in the
+graph repository (Gremlin, or the embedded store with GRAPH_BACKEND=memory).
 """
 import time
-import requests
 import logging
 import os
-from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
-from gremlin_python.process.anonymous_traversal import traversal
-from gremlin_python.process.graph_traversal import __
+import queue
+import random
+from concurrent.futures import ThreadPoolExecutor
+from metrics_view import NetworkMetricsView
+from risk_view import publish_risk_view
+from graph_writer import GraphWriter
+from graph_version import bump_graph_version, read_graph_version
+from snapshot_export import export_snapshot
+from rate_limit import TokenBucket
+from cspr_cloud import CsprCloudClient
+from fingerprints import FingerprintMap
+from checkpoint import IngestCheckpoint
+from graph_repository import GRAPH_BACKEND, create_repository
 
 # Try to import whale alerts service
 try:
@@ -21,6 +31,15 @@ CASPER_CLOUD_API = "https://api.testnet.cspr.cloud"
 CSPR_CLOUD_TOKEN = os.getenv("CSPR_CLOUD_TOKEN", "")
 NEPTUNE_URI = os.getenv("GREMLIN_ENDPOINT", 'ws://gremlin-server:8182/gremlin')
 
+# CSPR.cloud quota: requests per second and burst size, shared by all fetch workers
+CSPR_CLOUD_RATE_LIMIT = float(os.getenv("CSPR_CLOUD_RATE_LIMIT", 5))
+CSPR_CLOUD_BURST = int(os.getenv("CSPR_CLOUD_BURST", 10))
+DELEGATION_FETCH_CONCURRENCY = int(os.getenv("DELEGATION_FETCH_CONCURRENCY", 8))
+# Pages of delegations buffered between fetch workers and the graph writer
+DELEGATION_QUEUE_PAGES = int(os.getenv("DELEGATION_QUEUE_PAGES", 16))
+# Delegations below this stake are not indexed
+MIN_DELEGATION_CSPR = float(os.getenv("MIN_DELEGATION_CSPR", 100))
+
 # Whale threshold: 100,000 CSPR (in motes, 1 CSPR = 10^9 motes)
 WHALE_THRESHOLD_MOTES = 100_000 * 10**9  # 100,000 CSPR
 WHALE_THRESHOLD_CSPR = 100_000
@@ -30,18 +49,35 @@ logger = logging.getLogger("CasperIngester")
 
 
 class CasperIngestor:
-    def __init__(self):
+    def __init__(self, repo=None):
         self.conn = None
-        self.g = None
+        self.repo = repo
         self.whale_alerts = WhaleAlertService() if WhaleAlertService else None
-        self.headers = {
-            "Accept": "application/json",
-            "Authorization": CSPR_CLOUD_TOKEN
-        }
-        self.connect_with_retry()
+        self.metrics_view = NetworkMetricsView()
+        self.writer = GraphWriter(chain_name='Casper Network')
+        # What was last written per validator / (delegator, validator) pair
+        self.validator_prints = FingerprintMap()
+        self.delegation_prints = FingerprintMap()
+        self.changes = 0
+        self.graph_version = None  # Last version this ingester bumped
+        self.checkpoint = IngestCheckpoint('casper')
+        self.cspr = CsprCloudClient(
+            CASPER_CLOUD_API,
+            CSPR_CLOUD_TOKEN,
+            rate_limiter=TokenBucket(CSPR_CLOUD_RATE_LIMIT, CSPR_CLOUD_BURST)
+        )
+        if self.repo is None:
+            if GRAPH_BACKEND == 'memory':
+                self.repo = create_repository('memory')
+            else:
+                self.connect_with_retry()
 
     def connect_with_retry(self):
         """Connect to Gremlin with exponential backoff"""
+        from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+        from gremlin_python.process.anonymous_traversal import traversal
+        from gremlin_repository import GremlinRepository
+        
         max_retries = 30
         retry_delay = 2
         
@@ -49,9 +85,10 @@ class CasperIngestor:
             try:
                 logger.info(f"🔌 Connecting to Gremlin at {NEPTUNE_URI} (Attempt {attempt+1}/{max_retries})...")
                 self.conn = DriverRemoteConnection(NEPTUNE_URI, 'g')
-                self.g = traversal().withRemote(self.conn)
+                g = traversal().withRemote(self.conn)
                 # Test connection
-                self.g.V().limit(1).toList()
+                g.V().limit(1).toList()
+                self.repo = GremlinRepository(g, endpoint=NEPTUNE_URI)
                 logger.info("✅ Connected to Gremlin successfully!")
                 return
             except Exception as e:
@@ -67,108 +104,188 @@ class CasperIngestor:
         """Only run this on first startup to clear old data"""
         logger.info("🧹 Cleaning old graph data...")
         try:
-            self.g.V().drop().toList()
+            self.repo.clear()
             logger.info("✅ Graph cleaned successfully")
         except Exception as e:
             logger.warning(f"Could not clear graph (may be empty): {e}")
-            try:
-                self.conn.close()
-                self.conn = DriverRemoteConnection(NEPTUNE_URI, 'g')
-                self.g = traversal().withRemote(self.conn)
-            except:
-                pass
+            if self.conn is not None:
+                try:
+                    self.conn.close()
+                    self.connect_with_retry()
+                except:
+                    pass
+
+    def graph_populated(self) -> bool:
+        """True if the graph still holds a previous run's Casper data"""
+        return self.repo.count('Chain', where={'name': 'Casper Network'}) > 0
+
+    def graph_lost(self) -> bool:
+        """True if the graph no longer holds what this ingester wrote
+
+        TinkerGraph keeps everything in memory, so a Gremlin restart (or another
+        ingester's clean_graph) wipes it while the fingerprints still say "written".
+        """
+        if not self.graph_populated():
+            return True
+        if self.graph_version is None:
+            return False
+        current = read_graph_version(self.repo)
+        # Versions are hex nanosecond timestamps; an older (or no) version means a reset
+        return current is None or int(current, 16) < int(self.graph_version, 16)
+
+    def recover_lost_graph(self):
+        """Forgets everything remembered about the graph so this cycle rewrites it in full"""
+        logger.warning("⚠️ Graph was reset since the last cycle, rewriting it in full")
+        self.repo.invalidate_cache()
+        self.validator_prints = FingerprintMap()
+        self.delegation_prints = FingerprintMap()
+        self.graph_version = None
+        self.repo.bootstrap()
+        self.seed_casper_network()
+        self.metrics_view.load(self.repo)
+
+    def drop_stale(self):
+        """Drops delegators an interrupted cycle left without any delegation"""
+        delegating = {edge['out'] for edge in self.repo.edges('DELEGATED_TO')}
+        stale = self.repo.drop_vertex_ids(
+            vertex_id for vertex_id in self.repo.lookup('Address', 'public_key').values()
+            if vertex_id not in delegating
+        )
+        if stale:
+            logger.info(f"🧹 Dropped {stale} stale delegators")
 
     def seed_casper_network(self):
         """Create the Casper Network node as the central chain"""
         logger.info("🌱 Seeding Casper Network node...")
         try:
-            existing = self.g.V().has('Chain', 'name', 'Casper Network').toList()
-            if not existing:
-                self.g.addV('Chain') \
-                    .property('name', 'Casper Network') \
-                    .property('group', 'Chain') \
-                    .property('val', 40) \
-                    .property('network', 'testnet') \
-                    .next()
+            if not self.graph_populated():
+                self.repo.upsert_vertices('Chain', 'name', [{'name': 'Casper Network'}], on_create={
+                    'group': 'Chain',
+                    'val': 40,
+                    'network': 'testnet',
+                })
                 logger.info("✅ Created Casper Network node")
             else:
                 logger.info("ℹ️  Casper Network node already exists")
+            self.metrics_view.set_chain('Casper Network')
         except Exception as e:
             logger.warning(f"Could not seed Casper Network: {e}")
 
+    def load_fingerprints(self):
+        """Seeds the fingerprint maps from what the graph already holds"""
+        validators = self.repo.vertices('Validator', properties=['public_key', 'name', 'stake_cspr', 'delegation_rate'])
+        self.validator_prints.seed(
+            (p['public_key'], (p.get('name', ''), p.get('stake_cspr', 0), p.get('delegation_rate', 0)))
+            for p in (v['properties'] for v in validators) if 'public_key' in p
+        )
+        
+        delegators = {
+            v['id']: v['properties'] for v in self.repo.vertices('Address', properties=['public_key', 'group'])
+        }
+        validator_pks = {v['id']: v['properties'].get('public_key') for v in validators}
+        self.delegation_prints.seed(
+            ((delegators[e['out']]['public_key'], validator_pks[e['in']]),
+             (e['properties'].get('stake_cspr', 0), delegators[e['out']].get('group', '')))
+            for e in self.repo.edges('DELEGATED_TO')
+            if 'public_key' in delegators.get(e['out'], {}) and validator_pks.get(e['in'])
+        )
+        logger.info(f"🧮 Loaded fingerprints for {len(self.validator_prints)} validators, "
+                    f"{len(self.delegation_prints)} delegations")
+
+    def _write_validators(self, records):
+        """Upserts only validators that are new or changed since the last write"""
+        changed = []
+        for record in records:
+            fp = self.validator_prints.check(
+                record['public_key'], record['name'], record['stake_cspr'], record['delegation_rate']
+            )
+            if fp is not None:
+                changed.append((record, fp))
+        if not changed:
+            return 0
+        
+        # A few batched writes per page instead of 3-4 round trips per validator
+        self.writer.upsert_validators(self.repo, [record for record, _ in changed])
+        for record, fp in changed:
+            self.validator_prints.record(record['public_key'], fp)
+            self.metrics_view.set_validator(record['public_key'], record['stake_cspr'])
+        self.changes += len(changed)
+        return len(changed)
+
+    def _drop_missing_validators(self):
+        """Drops validators absent from a complete listing, with their delegations"""
+        gone = self.validator_prints.disappeared()
+        if not gone:
+            return
+        self.writer.drop_vertices(self.repo, 'Validator', gone)
+        self.validator_prints.forget(gone)
+        for pk in gone:
+            self.metrics_view.remove_validator(pk)
+        
+        # Their DELEGATED_TO edges went with the vertices
+        gone = set(gone)
+        self._forget_delegations([key for key in self.delegation_prints.keys() if key[1] in gone])
+        self.changes += len(gone)
+        logger.info(f"🗑️  Removed {len(gone)} validators no longer listed")
+
+    def _forget_delegations(self, pairs):
+        """Forgets delegation pairs, drops delegators left with none and re-totals the rest"""
+        if not pairs:
+            return
+        self.delegation_prints.forget(pairs)
+        for delegator, validator in pairs:
+            self.metrics_view.remove_delegation(delegator, validator)
+        remaining = {delegator for delegator, _ in self.delegation_prints.keys()}
+        affected = {delegator for delegator, _ in pairs}
+        orphans = list(affected - remaining)
+        if orphans:
+            self.writer.drop_vertices(self.repo, 'Address', orphans)
+        # The others keep their vertex, with the total of what they still delegate
+        if affected & remaining:
+            self.writer.update_delegators(self.repo, {
+                pk: self.metrics_view.delegator_totals(pk) for pk in affected & remaining
+            })
+
+    def _validator_record(self, validator):
+        public_key = validator.get('public_key', 'unknown')
+        # Try to get account info for moniker
+        account_info = validator.get('account_info', {}) or {}
+        info_data = account_info.get('info', {}) or {}
+        moniker = info_data.get('owner', {}).get('name', f"Validator-{public_key[:8]}")
+        
+        stake = int(validator.get('total_stake', 0))
+        return {
+            'public_key': public_key,
+            'name': moniker,
+            'stake_cspr': stake / 10**9,  # Convert motes to CSPR
+            'delegation_rate': validator.get('delegation_rate', 0),
+        }
+
     def fetch_validators(self):
-        """Fetches validators from CSPR.cloud API"""
-        endpoint = f"{CASPER_CLOUD_API}/validators"
+        """Streams every active validator from CSPR.cloud into the graph, page by page"""
+        indexed = written = 0
+        self.validator_prints.begin_cycle()
         try:
-            logger.info(f"📡 Fetching Validators from {endpoint}...")
+            logger.info(f"📡 Fetching Validators from {CASPER_CLOUD_API}/validators...")
             
             if not CSPR_CLOUD_TOKEN:
                 logger.warning("⚠️  CSPR_CLOUD_TOKEN not set! Using demo data.")
                 self._seed_demo_validators()
                 return
             
-            response = requests.get(
-                endpoint, 
-                headers=self.headers,
-                params={"limit": 50, "is_active": True},
-                timeout=15
-            )
+            for page in self.cspr.iter_validators():
+                records = [self._validator_record(v) for v in page]
+                written += self._write_validators(records)
+                indexed += len(records)
             
-            if response.status_code != 200:
-                logger.warning(f"API returned {response.status_code}, using demo data")
-                self._seed_demo_validators()
-                return
-                
-            data = response.json()
-            validators = data.get('data', [])
-            
-            count = 0
-            for validator in validators[:20]:  # Limit to top 20 validators
-                public_key = validator.get('public_key', 'unknown')
-                # Try to get account info for moniker
-                account_info = validator.get('account_info', {}) or {}
-                info_data = account_info.get('info', {}) or {}
-                moniker = info_data.get('owner', {}).get('name', f"Validator-{public_key[:8]}")
-                
-                stake = int(validator.get('total_stake', 0))
-                stake_cspr = stake / 10**9  # Convert motes to CSPR
-                delegation_rate = validator.get('delegation_rate', 0)
-                
-                # Check if validator already exists
-                try:
-                    existing = self.g.V().has('Validator', 'public_key', public_key).toList()
-                    if existing:
-                        # Update stake
-                        self.g.V().has('Validator', 'public_key', public_key) \
-                            .property('stake_cspr', stake_cspr) \
-                            .next()
-                        continue
-                except:
-                    pass
-                
-                # Create validator node
-                try:
-                    v = self.g.addV('Validator') \
-                        .property('public_key', public_key) \
-                        .property('name', moniker) \
-                        .property('stake_cspr', stake_cspr) \
-                        .property('delegation_rate', delegation_rate) \
-                        .property('group', 'Validator') \
-                        .property('val', 20) \
-                        .next()
-                    count += 1
-                    logger.info(f"✅ Created validator: {moniker} ({stake_cspr:,.0f} CSPR)")
-                    
-                    # Link to Casper Network
-                    self._link_to_casper(v)
-                except Exception as create_err:
-                    logger.debug(f"Validator creation note: {create_err}")
-            
-            logger.info(f"✅ Indexed {count} new Validators.")
+            # Only a complete listing proves a validator is gone
+            self._drop_missing_validators()
+            logger.info(f"✅ Indexed {indexed} Validators ({written} new or changed).")
             
         except Exception as e:
             logger.error(f"❌ Error fetching validators: {e}")
-            self._seed_demo_validators()
+            if indexed == 0:
+                self._seed_demo_validators()
 
     def _seed_demo_validators(self):
         """Seed demo validators when API is unavailable"""
@@ -181,117 +298,138 @@ class CasperIngestor:
             {"name": "BitMax Staking", "stake": 6000000, "pk": "01bitm..."},
         ]
         
-        for val in demo_validators:
-            try:
-                existing = self.g.V().has('Validator', 'name', val['name']).toList()
-                if existing:
-                    continue
-                    
-                v = self.g.addV('Validator') \
-                    .property('public_key', val['pk']) \
-                    .property('name', val['name']) \
-                    .property('stake_cspr', val['stake']) \
-                    .property('delegation_rate', 10) \
-                    .property('group', 'Validator') \
-                    .property('val', 20) \
-                    .next()
-                self._link_to_casper(v)
-                logger.info(f"✅ Created demo validator: {val['name']}")
-            except Exception as e:
-                logger.debug(f"Demo validator creation note: {e}")
-
-    def _link_to_casper(self, validator_vertex):
-        """Links validator to Casper Network node"""
+        records = [{
+            'public_key': val['pk'],
+            'name': val['name'],
+            'stake_cspr': val['stake'],
+            'delegation_rate': 10,
+        } for val in demo_validators]
+        
         try:
-            chain_v = self.g.V().has('Chain', 'name', 'Casper Network').next()
-            self.g.V(validator_vertex).addE('VALIDATES').to(chain_v).next()
+            self._write_validators(records)
+            logger.info(f"✅ Seeded {len(records)} demo validators")
         except Exception as e:
-            logger.debug(f"Could not link to Casper: {e}")
+            logger.debug(f"Demo validator creation note: {e}")
+
+    def _delegation_records(self, pk, delegations):
+        """Turns one page of CSPR.cloud delegations into writer records"""
+        records = []
+        for delegation in delegations:
+            delegator_pk = delegation.get('public_key', 'unknown')
+            stake_motes = int(delegation.get('stake', 0))
+            stake_cspr = stake_motes / 10**9
+            
+            if stake_cspr < MIN_DELEGATION_CSPR:  # Skip very small delegations
+                continue
+            
+            # Determine if whale
+            is_whale = stake_cspr >= WHALE_THRESHOLD_CSPR
+            label = 'Whale' if is_whale else 'Delegator'
+            
+            records.append({
+                'public_key': delegator_pk,
+                'validator_public_key': pk,
+                'stake_cspr': stake_cspr,
+                'group': label,
+            })
+        return records
+
+    def _write_delegations(self, records):
+        """Upserts only delegations that are new or changed since the last write"""
+        changed = []
+        for record in records:
+            key = (record['public_key'], record['validator_public_key'])
+            fp = self.delegation_prints.check(key, record['stake_cspr'], record['group'])
+            if fp is not None:
+                changed.append((key, record, fp))
+        if not changed:
+            return 0
+        
+        # A delegator's vertex carries its total over every validator, not just this page
+        pending = {}
+        for (delegator, validator), record, _ in changed:
+            pending.setdefault(delegator, {})[validator] = (record['stake_cspr'], record['group'])
+        totals = {pk: self.metrics_view.delegator_totals(pk, p) for pk, p in pending.items()}
+        
+        # Delegators and their DELEGATED_TO edges in a few batched writes per page
+        self.writer.upsert_delegations(self.repo, [record for _, record, _ in changed], totals)
+        for key, record, fp in changed:
+            self.delegation_prints.record(key, fp)
+            self.metrics_view.set_delegation(*key, record['stake_cspr'], record['group'])
+            # Alert on new or changed whale positions only, not on every cycle
+            if record['group'] == 'Whale' and self.whale_alerts:
+                self.whale_alerts.send_alert(record['stake_cspr'], record['public_key'])
+        self.changes += len(changed)
+        return len(changed)
 
     def fetch_delegations(self):
-        """Fetches delegations for all validators"""
+        """Streams every delegation of every validator into the graph"""
+        self.delegation_prints.begin_cycle()
         try:
             logger.info("📡 Fetching Delegations...")
             
             # Get all validators from graph
-            validators = self.g.V().hasLabel('Validator').valueMap('public_key', 'name').toList()
+            validators = self.repo.vertices('Validator', properties=['public_key', 'name'])
             
             if not CSPR_CLOUD_TOKEN or not validators:
                 logger.warning("⚠️  No token or validators, seeding demo delegators")
                 self._seed_demo_delegators()
                 return
             
-            total_delegations = 0
-            for val in validators[:5]:  # Limit to first 5 validators
-                pk = val.get('public_key', [''])[0]
-                name = val.get('name', ['Unknown'])[0]
-                
+            targets = []
+            for val in validators:
+                pk = val['properties'].get('public_key', '')
+                name = val['properties'].get('name', 'Unknown')
                 if not pk or pk.endswith('...'):  # Skip demo validators
                     continue
-                
-                endpoint = f"{CASPER_CLOUD_API}/validators/{pk}/delegations"
+                targets.append((pk, name))
+            
+            # Workers page through CSPR.cloud concurrently under the shared rate limit and
+            # hand pages over a bounded queue; graph writes stay on this thread. The queue
+            # bound applies backpressure, so memory stays at a few pages in flight.
+            pages = queue.Queue(maxsize=DELEGATION_QUEUE_PAGES)
+            completed = set()
+            
+            def walk(pk, name):
                 try:
-                    response = requests.get(
-                        endpoint,
-                        headers=self.headers,
-                        params={"limit": 20},
-                        timeout=10
-                    )
-                    
-                    if response.status_code != 200:
-                        continue
-                    
-                    data = response.json()
-                    delegations = data.get('data', [])
-                    
-                    for delegation in delegations[:10]:  # Top 10 delegators per validator
-                        delegator_pk = delegation.get('public_key', 'unknown')
-                        stake_motes = int(delegation.get('stake', 0))
-                        stake_cspr = stake_motes / 10**9
-                        
-                        if stake_cspr < 100:  # Skip very small delegations
-                            continue
-                        
-                        # Determine if whale
-                        is_whale = stake_cspr >= WHALE_THRESHOLD_CSPR
-                        label = 'Whale' if is_whale else 'Delegator'
-                        
-                        # Send whale alert if applicable
-                        if is_whale and self.whale_alerts:
-                            self.whale_alerts.send_alert(stake_cspr, delegator_pk)
-                        
-                        # Create or update delegator
-                        try:
-                            existing = self.g.V().has('Address', 'public_key', delegator_pk).toList()
-                            if existing:
-                                self.g.V().has('Address', 'public_key', delegator_pk) \
-                                    .property('stake_cspr', stake_cspr) \
-                                    .next()
-                            else:
-                                delegator_v = self.g.addV('Address') \
-                                    .property('public_key', delegator_pk) \
-                                    .property('label', label) \
-                                    .property('group', label) \
-                                    .property('stake_cspr', stake_cspr) \
-                                    .property('val', 10) \
-                                    .next()
-                                
-                                # Link to validator
-                                validator_v = self.g.V().has('Validator', 'public_key', pk).next()
-                                self.g.V(delegator_v).addE('DELEGATED_TO') \
-                                    .to(validator_v) \
-                                    .property('stake_cspr', stake_cspr) \
-                                    .next()
-                                
-                                total_delegations += 1
-                                logger.info(f"  💰 {label}: {stake_cspr:,.0f} CSPR → {name}")
-                        except Exception as e:
-                            logger.debug(f"Delegation error: {e}")
-                    
+                    for page in self.cspr.iter_delegations(pk):
+                        pages.put((pk, name, page))
+                    completed.add(pk)
                 except Exception as e:
                     logger.debug(f"Could not fetch delegations for {name}: {e}")
+                finally:
+                    pages.put((pk, name, None))
             
-            logger.info(f"✅ Processed {total_delegations} delegations.")
+            total_delegations = written = 0
+            per_validator = {}
+            with ThreadPoolExecutor(max_workers=DELEGATION_FETCH_CONCURRENCY) as pool:
+                for pk, name in targets:
+                    pool.submit(walk, pk, name)
+                
+                remaining = len(targets)
+                while remaining:
+                    pk, name, page = pages.get()
+                    if page is None:
+                        remaining -= 1
+                        logger.info(f"  💰 {per_validator.get(pk, 0)} delegations → {name}")
+                        continue
+                    try:
+                        records = self._delegation_records(pk, page)
+                        written += self._write_delegations(records)
+                        per_validator[pk] = per_validator.get(pk, 0) + len(records)
+                        total_delegations += len(records)
+                    except Exception as e:
+                        logger.warning(f"⚠️  Could not write delegations for {name}: {e}")
+            
+            # Delegations missing from a validator's complete listing were withdrawn
+            gone = self.delegation_prints.disappeared(lambda key: key[1] in completed)
+            if gone:
+                self.writer.drop_delegations(self.repo, gone)
+                self._forget_delegations(gone)
+                self.changes += len(gone)
+            
+            logger.info(f"✅ Processed {total_delegations} delegations from {len(targets)} validators "
+                        f"({written} new or changed, {len(gone)} removed).")
             
         except Exception as e:
             logger.error(f"❌ Error fetching delegations: {e}")
@@ -303,15 +441,13 @@ class CasperIngestor:
         
         # Get validators
         try:
-            validators = self.g.V().hasLabel('Validator').toList()
+            validators = list(self.repo.lookup('Validator', 'public_key').items())
             if not validators:
                 logger.warning("No validators to link delegators to")
                 return
         except:
             return
         
-        import random
-        
         # Demo whales (>100,000 CSPR)
         whales = [
             {"pk": "01whale1...", "stake": 500000, "name": "Whale 1"},
@@ -332,24 +468,23 @@ class CasperIngestor:
                 is_whale = delegator['stake'] >= WHALE_THRESHOLD_CSPR
                 label = 'Whale' if is_whale else 'Delegator'
                 
-                existing = self.g.V().has('Address', 'public_key', delegator['pk']).toList()
-                if existing:
+                if self.repo.lookup('Address', 'public_key', [delegator['pk']]):
                     continue
                 
-                v = self.g.addV('Address') \
-                    .property('public_key', delegator['pk']) \
-                    .property('label', label) \
-                    .property('group', label) \
-                    .property('stake_cspr', delegator['stake']) \
-                    .property('val', 10) \
-                    .next()
+                ids = self.repo.upsert_vertices('Address', 'public_key', [{
+                    'public_key': delegator['pk'],
+                    'label': label,
+                    'group': label,
+                    'stake_cspr': delegator['stake'],
+                }], on_create={'val': 10})
                 
                 # Link to random validator
-                validator_v = random.choice(validators)
-                self.g.V(v).addE('DELEGATED_TO') \
-                    .to(validator_v) \
-                    .property('stake_cspr', delegator['stake']) \
-                    .next()
+                validator_pk, validator_id = random.choice(validators)
+                self.repo.upsert_edges('DELEGATED_TO', [
+                    (ids[delegator['pk']], validator_id, {'stake_cspr': delegator['stake']})
+                ])
+                self.metrics_view.set_delegation(delegator['pk'], validator_pk, delegator['stake'], label)
+                self.changes += 1
                 
                 logger.info(f"✅ Created demo {label}: {delegator['name']} ({delegator['stake']:,} CSPR)")
             except Exception as e:
@@ -359,28 +494,59 @@ class CasperIngestor:
         """Main loop"""
         logger.info("🚀 Starting Casper Ingester...")
         
-        # Initial cleanup and seed
-        self.clean_graph()
+        # Warm restart keeps the graph and reconciles it; otherwise clean and seed
+        try:
+            warm = self.checkpoint.resume(self.graph_populated())
+        except Exception as e:
+            logger.warning(f"Could not inspect graph for warm restart: {e}")
+            warm = False
+        if warm:
+            try:
+                self.drop_stale()
+            except Exception as e:
+                logger.warning(f"Could not drop stale vertices: {e}")
+        else:
+            self.clean_graph()
+        self.repo.bootstrap()
         self.seed_casper_network()
+        try:
+            self.metrics_view.load(self.repo)
+        except Exception as e:
+            logger.warning(f"Could not seed metrics view: {e}")
+        try:
+            self.load_fingerprints()
+        except Exception as e:
+            logger.warning(f"Could not seed fingerprints: {e}")
         
         while True:
             try:
-                self.fetch_validators()
-                self.fetch_delegations()
-                
-                # Safety check: if graph is empty, re-seed
+                self.changes = 0
                 try:
-                    count = self.g.V().count().next()
-                    if count == 0:
-                        logger.warning("⚠️ Graph is empty! Re-seeding...")
-                        self.seed_casper_network()
-                        self._seed_demo_validators()
+                    if self.graph_lost():
+                        self.recover_lost_graph()
                 except Exception as e:
-                    logger.warning(f"⚠️ Could not check graph count: {e}")
+                    logger.warning(f"⚠️ Could not check graph state: {e}")
+                    if self.conn is not None:
+                        try:
+                            self.connect_with_retry()
+                        except:
+                            pass
+                self.fetch_validators()
+                self.fetch_delegations()
+                if self.changes:
+                    self.metrics_view.publish(self.repo)
+                    try:
+                        publish_risk_view(self.repo)
+                    except Exception as e:
+                        logger.warning(f"Could not publish risk view: {e}")
+                    version = self.graph_version = bump_graph_version(self.repo)
                     try:
-                        self.connect_with_retry()
-                    except:
-                        pass
+                        export_snapshot(self.repo, version)
+                    except Exception as e:
+                        logger.warning(f"Could not export snapshot: {e}")
+                else:
+                    logger.info("💤 No stake changes this cycle, graph untouched")
+                self.checkpoint.complete_cycle()
 
                 logger.info("💤 Sleeping for 60s...")
                 time.sleep(60)
@@ -0,0 +1,93 @@
+"""
+Ingest checkpoints for CasperEye.
+Persists the last completed cycle and per-source cursors to a small local JSON
+file so a restarted ingester can resume against the existing graph instead of
+wiping and rebuilding it.
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("Checkpoint")
+
+CHECKPOINT_DIR = os.getenv("INGEST_CHECKPOINT_DIR", "/var/lib/caspereye")
+# Checkpoints older than this are treated as a cold start
+CHECKPOINT_MAX_AGE = float(os.getenv("INGEST_CHECKPOINT_MAX_AGE", 24 * 3600))
+
+
+class IngestCheckpoint:
+    """Last completed cycle plus opaque per-source cursors for one ingester"""
+
+    def __init__(self, name: str, directory: str = CHECKPOINT_DIR):
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.json")
+        self.state: Dict[str, Any] = {}
+        self._reset()
+
+    def _reset(self):
+        self.state = {'cycle': 0, 'completed_at': None, 'cursors': {}}
+
+    @property
+    def cycle(self) -> int:
+        return self.state['cycle']
+
+    @property
+    def completed_at(self) -> Optional[float]:
+        return self.state['completed_at']
+
+    def load(self) -> bool:
+        """Reads the checkpoint file; False if missing, unreadable or too old"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return False
+
+        completed_at = state.get('completed_at')
+        if not completed_at or time.time() - completed_at > CHECKPOINT_MAX_AGE:
+            logger.info(f"⌛ Checkpoint {self.path} is stale, starting cold")
+            return False
+        self.state = {
+            'cycle': int(state.get('cycle', 0)),
+            'completed_at': completed_at,
+            'cursors': state.get('cursors') or {},
+        }
+        return True
+
+    def resume(self, graph_populated: bool) -> bool:
+        """Decides between warm and cold start given whether the graph still holds our data"""
+        if not self.load():
+            return False
+        if not graph_populated:
+            # The graph was reset underneath us (e.g. in-memory Gremlin restarted)
+            logger.info("ℹ️  Checkpoint found but graph is empty, starting cold")
+            self._reset()
+            return False
+        logger.info(f"♻️  Resuming {self.name} from cycle {self.cycle}")
+        return True
+
+    def cursor(self, source: str, default=None):
+        return self.state['cursors'].get(source, default)
+
+    def set_cursor(self, source: str, value):
+        """Stages a cursor; it is persisted with the next completed cycle"""
+        self.state['cursors'][source] = value
+
+    def complete_cycle(self):
+        """Records a finished cycle, atomically replacing the checkpoint file"""
+        self.state['cycle'] += 1
+        self.state['completed_at'] = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write checkpoint {self.path}: {e}")
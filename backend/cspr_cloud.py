@@ -0,0 +1,61 @@
+"""
+CSPR.cloud API client for CasperEye.
+Walks list endpoints lazily, one page at a time, so ingestion memory is
+bounded by a page no matter how many validators or delegators exist.
+"""
+import logging
+import os
+from typing import Dict, Iterator, List, Optional
+
+import http_client
+
+logger = logging.getLogger("CsprCloud")
+
+CSPR_CLOUD_PAGE_SIZE = int(os.getenv("CSPR_CLOUD_PAGE_SIZE", 100))
+
+
+class CsprCloudError(Exception):
+    pass
+
+
+class CsprCloudClient:
+    """Paginated access to the CSPR.cloud REST API"""
+
+    def __init__(self, base_url: str, token: str, rate_limiter=None, page_size: int = CSPR_CLOUD_PAGE_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.rate_limiter = rate_limiter
+        self.page_size = page_size
+        self.headers = {
+            "Accept": "application/json",
+            "Authorization": token
+        }
+
+    def _get(self, path: str, params: Dict, deadline: float = 15) -> Dict:
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        # Pooled keep-alive session: one TLS handshake per worker, not per page
+        response = http_client.get(f"{self.base_url}{path}", headers=self.headers, params=params, deadline=deadline)
+        if response.status_code != 200:
+            raise CsprCloudError(f"{path} returned {response.status_code}")
+        return response.json()
+
+    def iter_pages(self, path: str, params: Optional[Dict] = None) -> Iterator[List[Dict]]:
+        """Yields each page of `data` records until the listing is exhausted"""
+        page = 1
+        while True:
+            body = self._get(path, {**(params or {}), "page": page, "page_size": self.page_size})
+            items = body.get('data') or []
+            if items:
+                yield items
+
+            page_count = body.get('page_count')
+            if not items or (page_count is not None and page >= page_count) \
+                    or (page_count is None and len(items) < self.page_size):
+                return
+            page += 1
+
+    def iter_validators(self) -> Iterator[List[Dict]]:
+        return self.iter_pages("/validators", {"is_active": True})
+
+    def iter_delegations(self, validator_public_key: str) -> Iterator[List[Dict]]:
+        return self.iter_pages(f"/validators/{validator_public_key}/delegations")
@@ -0,0 +1,59 @@
+"""
+Change detection for CasperEye ingesters.
+Keeps a compact fingerprint of what was last written per entity so each cycle
+only writes new, changed or disappeared entities.
+"""
+import hashlib
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+def fingerprint(*fields) -> int:
+    """Stable 64-bit digest of the written fields (unlike hash(), identical across processes)"""
+    return int.from_bytes(hashlib.blake2b(repr(fields).encode(), digest_size=8).digest(), 'big')
+
+
+class FingerprintMap:
+    """Natural key -> fingerprint of the last write, plus the keys seen this cycle"""
+
+    def __init__(self):
+        self.fingerprints: Dict[Hashable, int] = {}
+        self.seen = set()
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def __contains__(self, key):
+        return key in self.fingerprints
+
+    def keys(self):
+        return self.fingerprints.keys()
+
+    def seed(self, entries: Iterable[Tuple[Hashable, tuple]]):
+        """Loads (key, fields) pairs already present in the graph"""
+        self.fingerprints = {key: fingerprint(*fields) for key, fields in entries}
+        self.seen = set()
+
+    def begin_cycle(self):
+        self.seen = set()
+
+    def check(self, key: Hashable, *fields) -> Optional[int]:
+        """Marks `key` as seen; returns its new fingerprint if it needs a write, else None"""
+        self.seen.add(key)
+        fp = fingerprint(*fields)
+        return None if self.fingerprints.get(key) == fp else fp
+
+    def record(self, key: Hashable, fp: int):
+        """Remembers a successful write"""
+        self.fingerprints[key] = fp
+
+    def disappeared(self, predicate=None) -> List[Hashable]:
+        """Known keys not seen this cycle, optionally limited to those matching `predicate`"""
+        return [
+            key for key in self.fingerprints
+            if key not in self.seen and (predicate is None or predicate(key))
+        ]
+
+    def forget(self, keys: Iterable[Hashable]):
+        for key in keys:
+            self.fingerprints.pop(key, None)
+            self.seen.discard(key)
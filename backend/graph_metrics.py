@@ -0,0 +1,102 @@
+"""
+Server-side network metrics for CasperEye.
+Counts vertex groups and aggregates stake inside the graph store so that
+/api/metrics costs one small aggregate query no matter how big the graph is.
+"""
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger("GraphMetrics")
+
+# Same threshold CasperIngestor uses to label delegators as whales
+WHALE_THRESHOLD_CSPR = float(os.getenv("WHALE_THRESHOLD_CSPR", 100_000))
+# Concentration = share of validator stake held by the top N validators
+CONCENTRATION_TOP_N = int(os.getenv("CONCENTRATION_TOP_N", 10))
+
+PROVIDER_GROUPS = ('Validator', 'Provider')
+
+
+def delegator_totals(edges: Iterable[Dict], whale_threshold: float = WHALE_THRESHOLD_CSPR) -> Dict[object, Tuple[float, bool]]:
+    """Delegator vertex id -> (total stake, whether any one delegation is whale-sized) from DELEGATED_TO edges"""
+    totals: Dict[object, Tuple[float, bool]] = {}
+    for edge in edges:
+        stake = float(edge['properties'].get('stake_cspr') or 0)
+        total, whale = totals.get(edge['out'], (0.0, False))
+        totals[edge['out']] = (total + stake, whale or stake >= whale_threshold)
+    return totals
+
+
+class GraphMetricsEngine:
+    """Computes network metrics from repository aggregates"""
+
+    def __init__(self, whale_threshold: float = WHALE_THRESHOLD_CSPR, top_n: int = CONCENTRATION_TOP_N):
+        self.whale_threshold = whale_threshold
+        self.top_n = top_n
+
+    def fetch(self, repo) -> Dict:
+        """Runs the combined aggregate and returns a metrics summary
+
+        Delegator, whale and delegated-stake figures come from the DELEGATED_TO
+        edge stakes, as in NetworkMetricsView.
+        """
+        network = repo.network_summary(self.whale_threshold, self.top_n)
+        groups = {str(k): int(v) for k, v in network['groups'].items()}
+        validator_stake = float(network['validator_stake'])
+        top_stake = sum(float(s) for s in network['top_stakes'])
+
+        return {
+            'groups': groups,
+            'validator_count': groups.get('Validator', 0),
+            'delegator_count': int(network['delegator_count']),
+            'provider_count': sum(groups.get(k, 0) for k in PROVIDER_GROUPS),
+            'chain_count': groups.get('Chain', 0),
+            'whale_count': int(network['whale_count']),
+            'total_stake_cspr': validator_stake,
+            'delegated_stake_cspr': float(network['delegated_stake']),
+            'top_n': self.top_n,
+            'top_n_share': top_stake / validator_stake if validator_stake > 0 else 0.0,
+            'staked_btc': float(network['staked_btc']),
+        }
+
+
+def metrics_response(summary: Dict, distribution: Optional[Dict] = None) -> Dict:
+    """Builds the /api/metrics payload from a metrics summary and, when available,
+    the stake distribution from StakeAnalytics"""
+    whales = summary['whale_count']
+    providers = summary['provider_count']
+    chains = summary['chain_count']
+    concentration = min(1.0, max(0.0, summary['top_n_share']))
+
+    if distribution is not None:
+        validators = distribution['validators']
+        concentration = validators['top_n_share']
+        risk_score = distribution['risk_score']
+    else:
+        concentration_risk = concentration * 4
+        provider_risk = max(0, (1 - (providers / 15)) * 3)
+        chain_risk = max(0, (1 - (chains / 5)) * 3)
+        risk_score = max(0, min(10, concentration_risk + provider_risk + chain_risk))
+
+    response = {
+        "total_staked_btc": round(summary.get('staked_btc', 0.0), 2),
+        "total_staked_cspr": round(summary['total_stake_cspr'], 2),
+        "delegated_stake_cspr": round(summary['delegated_stake_cspr'], 2),
+        "total_providers": int(providers),
+        "total_validators": int(summary['validator_count']),
+        "total_delegators": int(summary['delegator_count']),
+        "total_chains": int(chains),
+        "whale_count": int(whales),
+        "concentration_ratio": round(concentration, 2),
+        "risk_score": round(risk_score, 1),
+        "last_update": datetime.now(timezone.utc).isoformat()
+    }
+    if distribution is not None:
+        response.update({
+            "hhi": round(validators['hhi'], 4),
+            "nakamoto_coefficient": validators['nakamoto_coefficient'],
+            "gini": round(validators['gini'], 4),
+            "delegator_gini": round(distribution['delegators']['gini'], 4),
+        })
+    return response
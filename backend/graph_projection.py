@@ -0,0 +1,77 @@
+"""
+Subgraph projection for /api/graph-data.
+Returns a page of vertices together with their outgoing edges and edge
+endpoints in one repository export, with cursor paging and group/stake filters.
+"""
+import base64
+import json
+import os
+from typing import Dict, List, Optional
+
+DEFAULT_PAGE_SIZE = int(os.getenv("GRAPH_PAGE_SIZE", 200))
+MAX_PAGE_SIZE = int(os.getenv("GRAPH_MAX_PAGE_SIZE", 1000))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(vertex_id) -> str:
+    raw = json.dumps({"id": vertex_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))['id']
+    except Exception:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+
+# Only the fields the frontend renders
+NODE_PROPERTIES = ['name', 'pk', 'public_key', 'address', 'group', 'val']
+
+
+def _format_node(vertex: Dict) -> Dict:
+    props = vertex['properties']
+    name = props.get('name') or props.get('pk') or props.get('public_key') or props.get('address')
+    return {
+        "id": str(vertex['id']),
+        "name": str(name or f"Node-{vertex['id']}")[:30],
+        "group": props.get('group', 'Provider'),
+        "val": props.get('val', 10),
+    }
+
+
+def fetch_subgraph_page(repo, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                        groups: Optional[List[str]] = None, min_stake: Optional[float] = None) -> Dict:
+    """Fetches one page of the graph; every returned link has both endpoints in `nodes`"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    rows, has_more = repo.export_page(
+        after=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+        groups=groups,
+        min_stake=min_stake,
+        properties=NODE_PROPERTIES,
+    )
+
+    nodes = {}
+    links = []
+    for row in rows:
+        node = _format_node(row['vertex'])
+        nodes[node['id']] = node
+    for row in rows:
+        source = str(row['vertex']['id'])
+        for link in row['out']:
+            target = _format_node(link['target'])
+            # Endpoints outside this page are included so no link is dangling
+            nodes.setdefault(target['id'], target)
+            links.append({"source": source, "target": target['id'], "label": link['label']})
+
+    return {
+        "nodes": list(nodes.values()),
+        "links": links,
+        "next_cursor": encode_cursor(rows[-1]['vertex']['id']) if has_more else None,
+    }
@@ -0,0 +1,199 @@
+"""
+Storage interface for the CasperEye graph.
+Ingesters, the API and the monitor talk to a GraphRepository instead of
+gremlin_python, so the same code runs against a Gremlin server or the
+embedded in-memory store (GRAPH_BACKEND=gremlin|memory).
+
+Vertices are returned as {'id', 'label', 'properties'} and edges as
+{'id', 'label', 'out', 'in', 'properties'}; a vertex is identified by a
+(label, key property, key) natural key, and there is at most one edge per
+(label, out vertex, in vertex). Where an edge endpoint is expected, a
+VertexKey may be passed instead of an id.
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "gremlin").lower()
+
+Labels = Union[str, Sequence[str], None]
+
+
+class VertexKey(NamedTuple):
+    """Addresses a vertex by natural key, so a write does not depend on a cached id"""
+    label: str
+    key_property: str
+    key: Hashable
+
+
+def label_set(labels: Labels) -> Optional[set]:
+    """Normalizes a label argument (one label, several, or None for all)"""
+    if labels is None:
+        return None
+    if isinstance(labels, str):
+        return {labels}
+    return set(labels)
+
+
+def matches(properties: Dict, where: Optional[Dict] = None, at_least: Optional[Dict] = None) -> bool:
+    """Equality filters in `where`, lower bounds in `at_least`; missing properties never match"""
+    for key, value in (where or {}).items():
+        if key not in properties or properties[key] != value:
+            return False
+    for key, bound in (at_least or {}).items():
+        value = properties.get(key)
+        if value is None or value < bound:
+            return False
+    return True
+
+
+class GraphRepository(ABC):
+    """Graph operations CasperEye needs, independent of the storage engine"""
+
+    backend = None
+
+    # --- lifecycle ---
+
+    def bootstrap(self):
+        """Prepares indexes/schema; called once by ingesters at startup"""
+
+    def health(self) -> Dict:
+        return {}
+
+    def close(self):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    def invalidate_cache(self):
+        """Forgets cached vertex ids, e.g. after the graph was wiped behind the repository's back"""
+
+    @abstractmethod
+    def count(self, labels: Labels = None, where: Optional[Dict] = None, at_least: Optional[Dict] = None) -> int:
+        ...
+
+    # --- vertices ---
+
+    @abstractmethod
+    def upsert_vertices(self, label: str, key_property: str, records: List[Dict],
+                        on_create: Optional[Dict] = None) -> Dict[Hashable, object]:
+        """Creates or updates one vertex per record (keyed by record[key_property]).
+
+        Every other record field is written on each call; `on_create` fields only
+        when the vertex is new. Returns natural key -> vertex id.
+        """
+
+    def upsert_linked(self, label: str, key_property: str, records: List[Dict],
+                      links: Dict[Hashable, List[Tuple[str, VertexKey, Dict]]],
+                      on_create: Optional[Dict] = None) -> Dict[Hashable, object]:
+        """Upserts vertices like upsert_vertices together with their out-edges.
+
+        `links` maps a record's natural key to [(edge label, target, edge properties)];
+        edges to targets that do not exist are skipped. Returns natural key -> vertex id.
+        """
+        ids = self.upsert_vertices(label, key_property, records, on_create)
+        by_label: Dict[str, List[Tuple[object, VertexKey, Dict]]] = {}
+        for key, edges in links.items():
+            if key in ids:
+                for edge_label, target, properties in edges:
+                    by_label.setdefault(edge_label, []).append((ids[key], target, properties))
+        for edge_label, edges in by_label.items():
+            self.upsert_edges(edge_label, edges)
+        return ids
+
+    @abstractmethod
+    def lookup(self, label: str, key_property: str, keys: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, object]:
+        """Natural key -> vertex id for `keys` (all vertices of `label` when None); unknown keys are omitted"""
+
+    @abstractmethod
+    def get_vertex(self, label: str, key_property: str, key: Hashable) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def vertices(self, labels: Labels = None, where: Optional[Dict] = None, at_least: Optional[Dict] = None,
+                 properties: Optional[List[str]] = None) -> List[Dict]:
+        """Matching vertices, limited to `properties` when given"""
+
+    @abstractmethod
+    def drop_vertices(self, label: str, key_property: str, keys: Iterable[Hashable]) -> int:
+        """Drops vertices and their edges by natural key; returns how many were dropped"""
+
+    @abstractmethod
+    def drop_vertex_ids(self, ids: Iterable) -> int:
+        ...
+
+    # --- edges ---
+
+    @abstractmethod
+    def upsert_edges(self, label: str, edges: List[Tuple[object, object, Dict]]):
+        """Creates or updates the (label, out, in) edge for each (out, in, properties).
+
+        Endpoints are vertex ids or VertexKeys; edges with a missing endpoint are skipped.
+        """
+
+    @abstractmethod
+    def edges(self, labels: Labels = None) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def drop_edges(self, label: str, pairs: Iterable[Tuple[object, object]]) -> int:
+        ...
+
+    @abstractmethod
+    def neighborhood(self, vertex_id, direction: str = 'out', edge_label: Optional[str] = None) -> List[Dict]:
+        """[{'edge': edge, 'vertex': other endpoint}] for edges in `direction` ('out', 'in' or 'both')"""
+
+    # --- aggregates and export ---
+
+    @abstractmethod
+    def aggregate(self, group_by: str, sum_of: Optional[str] = None, labels: Labels = None,
+                  where: Optional[Dict] = None) -> Dict[Hashable, float]:
+        """Vertex count per `group_by` value, or the sum of `sum_of` per value"""
+
+    @abstractmethod
+    def top_values(self, prop: str, n: int, labels: Labels = None) -> List[float]:
+        """The n largest values of `prop`, descending"""
+
+    @abstractmethod
+    def network_summary(self, whale_threshold: float, top_n: int) -> Dict:
+        """The aggregates behind /api/metrics in one query:
+
+        'groups' (vertex count per group), 'validator_stake' (summed Validator stake_cspr),
+        'top_stakes' (the `top_n` largest Validator stakes, descending), 'staked_btc'
+        (btc_amount summed over grouped Addresses) and, from the DELEGATED_TO edge stakes,
+        'delegator_count' (Addresses with a delegation), 'whale_count' (Addresses with a
+        delegation of at least `whale_threshold`) and 'delegated_stake'.
+        """
+
+    @abstractmethod
+    def sum_along(self, path: Sequence[Tuple[str, str]], sum_of: str, labels: Labels = None,
+                  where: Optional[Dict] = None, end_where: Optional[Dict] = None,
+                  key_property: Optional[str] = None) -> Dict[Hashable, float]:
+        """For every matching start vertex, sums `sum_of` over the vertices reached by following
+        `path` ([(direction, edge label)]) that match `end_where`, once per path.
+
+        Keyed by `key_property` (start vertices without it are skipped, those sharing a key
+        are summed together) or vertex id; start vertices that reach nothing map to 0.
+        """
+
+    @abstractmethod
+    def export_page(self, after=None, limit: int = 1000, groups: Optional[List[str]] = None,
+                    min_stake: Optional[float] = None, properties: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        """Bulk export in vertex-id order: vertices with a `group` (filtered by `groups` and
+        stake_cspr >= `min_stake`) whose id is greater than `after`, each with its outgoing
+        edges as [{'vertex': v, 'out': [{'label', 'target'}]}]. Returns (rows, has_more).
+        """
+
+
+def create_repository(backend: Optional[str] = None, **kwargs) -> GraphRepository:
+    """Repository for GRAPH_BACKEND; Gremlin keyword arguments are passed through"""
+    backend = (backend or GRAPH_BACKEND).lower()
+    if backend == 'memory':
+        from memory_repository import MemoryRepository
+        return MemoryRepository()
+    if backend == 'gremlin':
+        from gremlin_repository import GremlinRepository
+        return GremlinRepository(**kwargs)
+    raise ValueError(f"Unknown GRAPH_BACKEND {backend!r} (expected 'gremlin' or 'memory')")
@@ -0,0 +1,141 @@
+"""
+Graph schema management for CasperEye.
+Creates TinkerGraph property indexes on the keys every ingest lookup filters on
+and applies versioned migrations, such as merging vertices that share a
+natural key. Ingesters run it once at startup.
+"""
+import logging
+import os
+from typing import Callable, List, Tuple
+
+from gremlin_python.driver.client import Client
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import Cardinality
+
+logger = logging.getLogger("GraphSchema")
+
+GREMLIN_GRAPH_NAME = os.getenv("GREMLIN_GRAPH_NAME", "graph")
+
+# (label, property) pairs that identify a vertex; lookups and upserts filter on these
+NATURAL_KEYS: List[Tuple[str, str]] = [
+    ('Chain', 'name'),
+    ('Validator', 'public_key'),
+    ('Address', 'public_key'),
+    ('Address', 'address'),
+    ('FinalityProvider', 'pk'),
+    ('ConsumerChain', 'name'),
+    ('MetricsSummary', 'name'),
+    ('RiskView', 'public_key'),
+    ('GraphVersion', 'name'),
+]
+INDEXED_KEYS = sorted({key for _, key in NATURAL_KEYS})
+
+SCHEMA_LABEL = 'SchemaVersion'
+SCHEMA_NAME = 'schema'
+
+# TinkerGraph keeps indexes in memory, so they are (idempotently) created on every start
+CREATE_INDEXES_SCRIPT = """
+def indexed = %(graph)s.getIndexedKeys(Vertex.class)
+keys.each { key -> if (!indexed.contains(key)) %(graph)s.createIndex(key, Vertex.class) }
+%(graph)s.getIndexedKeys(Vertex.class).toList()
+"""
+
+# Folds every duplicate into the vertex with the lowest id: edges are re-attached
+# (skipping ones the keeper already has) and missing properties copied over
+MERGE_DUPLICATES_SCRIPT = """
+def merged = 0
+pairs.each { pair ->
+  def (label, key) = pair
+  g.V().hasLabel(label).has(key).group().by(key).next().each { value, vertices ->
+    if (vertices.size() < 2) return
+    vertices.sort { it.id() }
+    def keeper = vertices[0]
+    vertices[1..-1].each { dup ->
+      dup.edges(Direction.OUT).each { e ->
+        if (e.inVertex() != dup && !keeper.edges(Direction.OUT, e.label()).any { it.inVertex() == e.inVertex() }) {
+          def copy = keeper.addEdge(e.label(), e.inVertex())
+          e.properties().each { p -> copy.property(p.key(), p.value()) }
+        }
+      }
+      dup.edges(Direction.IN).each { e ->
+        if (e.outVertex() != dup && !keeper.edges(Direction.IN, e.label()).any { it.outVertex() == e.outVertex() }) {
+          def copy = e.outVertex().addEdge(e.label(), keeper)
+          e.properties().each { p -> copy.property(p.key(), p.value()) }
+        }
+      }
+      dup.properties().each { p -> if (!keeper.property(p.key()).isPresent()) keeper.property(p.key(), p.value()) }
+      dup.remove()
+      merged++
+    }
+  }
+}
+merged
+"""
+
+
+def _submit(client: Client, script: str, bindings: dict):
+    return client.submit(script, bindings).all().result()
+
+
+def ensure_indexes(client: Client) -> List[str]:
+    """Creates vertex property indexes on every natural key; returns the indexed keys"""
+    result = _submit(client, CREATE_INDEXES_SCRIPT % {'graph': GREMLIN_GRAPH_NAME}, {'keys': INDEXED_KEYS})
+    logger.info(f"🗂️  Indexed vertex keys: {', '.join(map(str, result))}")
+    return result
+
+
+def merge_duplicates(client: Client) -> int:
+    """Merges vertices sharing a (label, natural key); returns how many were folded away"""
+    result = _submit(client, MERGE_DUPLICATES_SCRIPT, {'pairs': [list(pair) for pair in NATURAL_KEYS]})
+    merged = int(result[0]) if result else 0
+    if merged:
+        logger.info(f"🧬 Merged {merged} duplicate vertices")
+    return merged
+
+
+# Applied in order, once each; append new steps with the next version number
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "Merge duplicate vertices sharing a natural key", lambda g, client: merge_duplicates(client)),
+]
+
+
+def read_schema_version(g) -> int:
+    versions = g.V().has(SCHEMA_LABEL, 'name', SCHEMA_NAME).values('version').toList()
+    return int(versions[0]) if versions else 0
+
+
+def _write_schema_version(g, version: int):
+    g.V().has(SCHEMA_LABEL, 'name', SCHEMA_NAME).fold() \
+        .coalesce(__.unfold(), __.addV(SCHEMA_LABEL).property('name', SCHEMA_NAME)) \
+        .property(Cardinality.single, 'version', version) \
+        .next()
+
+
+def migrate(g, client: Client) -> int:
+    """Applies pending migrations and returns the resulting schema version"""
+    version = read_schema_version(g)
+    for target, description, step in MIGRATIONS:
+        if target <= version:
+            continue
+        logger.info(f"🔧 Schema migration {target}: {description}")
+        step(g, client)
+        _write_schema_version(g, target)
+        version = target
+    return version
+
+
+def bootstrap_schema(endpoint: str, g) -> None:
+    """Startup hook: indexes first so the migrations' lookups already use them"""
+    client = Client(endpoint, 'g')
+    try:
+        try:
+            ensure_indexes(client)
+        except Exception as e:
+            # Not a TinkerGraph (e.g. Neptune indexes natively) or scripts disabled
+            logger.warning(f"Could not create graph indexes: {e}")
+        version = migrate(g, client)
+        logger.info(f"✅ Graph schema at version {version}")
+    except Exception as e:
+        logger.warning(f"Could not migrate graph schema: {e}")
+    finally:
+        client.close()
@@ -0,0 +1,202 @@
+"""
+Push-based graph updates for CasperEye.
+One broadcaster per API process reloads the graph when the ingester bumps the
+graph version, diffs it against the previous snapshot and fans the delta out
+to every subscriber, so graph store load no longer scales with open dashboards.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from graph_projection import DEFAULT_PAGE_SIZE, fetch_subgraph_page
+
+logger = logging.getLogger("GraphStream")
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("GRAPH_STREAM_QUEUE_SIZE", 16))
+HEARTBEAT_INTERVAL = float(os.getenv("GRAPH_STREAM_HEARTBEAT", 15))
+# Vertices per stream, the same bound as the first page of /api/graph-data
+STREAM_LIMIT = int(os.getenv("GRAPH_STREAM_LIMIT", DEFAULT_PAGE_SIZE))
+
+
+def _link_key(link: Dict) -> Tuple:
+    return (link['source'], link['target'], link.get('label'))
+
+
+def load_graph(repo, limit: int = STREAM_LIMIT, groups: Optional[List[str]] = None,
+               min_stake: Optional[float] = None) -> Dict:
+    """The first projected page as {nodes: {id: node}, links: {key: link}, next_cursor}
+
+    Clients page beyond it through /api/graph-data with next_cursor.
+    """
+    page = fetch_subgraph_page(repo, limit=limit, groups=groups, min_stake=min_stake)
+    return {
+        'nodes': {node['id']: node for node in page['nodes']},
+        'links': {_link_key(link): link for link in page['links']},
+        'next_cursor': page['next_cursor'],
+    }
+
+
+def diff_graphs(old: Dict, new: Dict) -> Dict:
+    """Vertex/edge additions, removals and property changes between two snapshots"""
+    old_nodes, new_nodes = old['nodes'], new['nodes']
+    return {
+        'nodes': {
+            'added': [n for nid, n in new_nodes.items() if nid not in old_nodes],
+            'removed': [nid for nid in old_nodes if nid not in new_nodes],
+            'changed': [n for nid, n in new_nodes.items() if nid in old_nodes and old_nodes[nid] != n],
+        },
+        'links': {
+            'added': [l for key, l in new['links'].items() if key not in old['links']],
+            'removed': [l for key, l in old['links'].items() if key not in new['links']],
+        },
+        'next_cursor': new['next_cursor'],
+    }
+
+
+def format_sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class _StreamView:
+    """One filtered, bounded projection and the subscribers watching it"""
+
+    def __init__(self, limit: int, groups: Optional[List[str]], min_stake: Optional[float]):
+        self.limit = limit
+        self.groups = groups
+        self.min_stake = min_stake
+        self.graph = None
+        self.version = None
+        self.subscribers = set()
+
+    def load(self, repo) -> Dict:
+        return load_graph(repo, limit=self.limit, groups=self.groups, min_stake=self.min_stake)
+
+    def snapshot_event(self) -> Tuple[str, Dict]:
+        graph = self.graph or {'nodes': {}, 'links': {}, 'next_cursor': None}
+        return 'snapshot', {
+            'version': self.version,
+            'nodes': list(graph['nodes'].values()),
+            'links': list(graph['links'].values()),
+            'next_cursor': graph['next_cursor'],
+        }
+
+
+class GraphBroadcaster:
+    """Turns graph version changes into snapshot/delta events for many subscribers
+
+    Subscribers with the same filters share one view, so the graph store is read
+    once per view and version, never per tab. Graph loads run outside the lock.
+    """
+
+    def __init__(self, version_watcher, repo):
+        self.version_watcher = version_watcher
+        self.repo = repo
+        self.version = None
+        self.views: Dict[Tuple, _StreamView] = {}
+        self._view_keys: Dict[queue.Queue, Tuple] = {}  # subscriber -> its view's key
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="graph-broadcaster", daemon=True)
+                self._thread.start()
+
+    @staticmethod
+    def _view_key(limit: int, groups: Optional[List[str]], min_stake: Optional[float]) -> Tuple:
+        return (limit, tuple(sorted(groups or ())), min_stake)
+
+    def subscribe(self, limit: int = STREAM_LIMIT, groups: Optional[List[str]] = None,
+                  min_stake: Optional[float] = None) -> queue.Queue:
+        """Registers a subscriber; its first event is always a full snapshot of its view"""
+        self.start()
+        key = self._view_key(limit, groups, min_stake)
+        with self._lock:
+            view = self.views.get(key)
+        if view is None or view.graph is None:
+            version = self.version_watcher.current()
+            fresh = _StreamView(limit, groups, min_stake)
+            fresh.graph, fresh.version = fresh.load(self.repo), version
+            with self._lock:
+                view = self.views.get(key)
+                if view is None or view.graph is None:
+                    view = self.views[key] = fresh
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            # The view may have been dropped by its last subscriber in the meantime
+            view = self.views.setdefault(key, view)
+            q.put(view.snapshot_event())
+            view.subscribers.add(q)
+            self._view_keys[q] = key
+            total = self._subscriber_count()
+        logger.info(f"📡 Graph stream subscriber joined ({total} connected)")
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._lock:
+            key = self._view_keys.pop(q, None)
+            view = self.views.get(key)
+            if view is not None:
+                view.subscribers.discard(q)
+                if not view.subscribers:
+                    # Nobody listening: the next subscriber reloads it
+                    del self.views[key]
+            total = self._subscriber_count()
+        logger.info(f"📡 Graph stream subscriber left ({total} connected)")
+
+    def _subscriber_count(self) -> int:
+        return sum(len(view.subscribers) for view in self.views.values())
+
+    def _publish(self, view: _StreamView, event: Tuple[str, Dict]):
+        """Queues an event for a view's subscribers (caller holds the lock)"""
+        for q in list(view.subscribers):
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: drop its backlog and resync it with a snapshot
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(view.snapshot_event())
+
+    def _refresh(self, view: _StreamView, version: str):
+        """Reloads one view outside the lock, then diffs and publishes under it"""
+        with self._lock:
+            if view.version == version:
+                # Already loaded at this version, e.g. by the subscriber that created it
+                return
+        graph = view.load(self.repo)
+        with self._lock:
+            if view.version == version:
+                return
+            delta = diff_graphs(view.graph, graph) if view.graph is not None else None
+            view.graph, view.version = graph, version
+            if delta is None:
+                self._publish(view, view.snapshot_event())
+            else:
+                delta['version'] = version
+                self._publish(view, ('delta', delta))
+
+    def _run(self):
+        while True:
+            version = self.version_watcher.wait_for_change(self.version, timeout=HEARTBEAT_INTERVAL)
+            if version is None:
+                time.sleep(HEARTBEAT_INTERVAL)
+                continue
+            if version == self.version:
+                continue
+            try:
+                with self._lock:
+                    views = list(self.views.values())
+                for view in views:
+                    self._refresh(view, version)
+                self.version = version
+                if views:
+                    logger.info(f"📡 Pushed graph update {version} to {len(views)} stream views")
+            except Exception as e:
+                logger.warning(f"Could not refresh graph stream: {e}")
+                time.sleep(HEARTBEAT_INTERVAL)
@@ -0,0 +1,75 @@
+"""
+Graph version tracking for CasperEye.
+Ingesters bump a version record after every write cycle; the API polls it in
+the background so polled endpoints can answer If-None-Match without a graph query.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("GraphVersion")
+
+VERSION_LABEL = 'GraphVersion'
+VERSION_NAME = 'graph'
+VERSION_POLL_INTERVAL = float(os.getenv("GRAPH_VERSION_POLL_INTERVAL", 2))
+
+
+def bump_graph_version(repo) -> str:
+    """Writes a new graph version and returns it"""
+    version = f"{time.time_ns():x}"
+    repo.upsert_vertices(VERSION_LABEL, 'name', [{'name': VERSION_NAME, 'version': version}])
+    logger.info(f"🔖 Graph version bumped to {version}")
+    return version
+
+
+def read_graph_version(repo) -> Optional[str]:
+    """Reads the current graph version, None before the first write cycle"""
+    record = repo.get_vertex(VERSION_LABEL, 'name', VERSION_NAME)
+    if not record or 'version' not in record['properties']:
+        return None
+    return str(record['properties']['version'])
+
+
+class GraphVersionWatcher:
+    """Keeps the latest graph version in memory, refreshed by a background thread"""
+
+    def __init__(self, repo, interval: float = VERSION_POLL_INTERVAL):
+        self.repo = repo
+        self.interval = interval
+        self.version = None
+        self._changed = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="graph-version-watcher", daemon=True)
+                self._thread.start()
+
+    def current(self) -> Optional[str]:
+        """Latest known version; never blocks on the graph store"""
+        self.start()
+        return self.version
+
+    def wait_for_change(self, seen: Optional[str], timeout: float) -> Optional[str]:
+        """Blocks until the version differs from `seen` or the timeout expires"""
+        self.start()
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != seen, timeout=timeout)
+            return self.version
+
+    def _run(self):
+        while True:
+            try:
+                version = read_graph_version(self.repo)
+            except Exception as e:
+                logger.debug(f"Could not read graph version: {e}")
+                version = None
+            if version != self.version:
+                with self._changed:
+                    self.version = version
+                    self._changed.notify_all()
+            time.sleep(self.interval)
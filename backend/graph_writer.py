@@ -0,0 +1,88 @@
+"""
+Batched graph writes for CasperEye ingesters.
+Upserts a whole page of validators or delegations, edges included, through
+the graph repository, which sends each batch as one traversal instead of
+3-4 round trips per entity. Edge targets are addressed by natural key, so a
+stale cached id cannot fail the page.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from graph_repository import GraphRepository, VertexKey
+
+logger = logging.getLogger("GraphWriter")
+
+
+class GraphWriter:
+    """Upserts validators and delegations page by page"""
+
+    def __init__(self, chain_name: str = 'Casper Network'):
+        self.chain_name = chain_name
+
+    def upsert_validators(self, repo: GraphRepository, validators: List[Dict]) -> Dict:
+        """Upserts validators and their VALIDATES edge; returns public_key -> vertex id"""
+        chain = VertexKey('Chain', 'name', self.chain_name)
+        ids = repo.upsert_linked('Validator', 'public_key', [{
+            'public_key': val['public_key'],
+            'name': val['name'],
+            'stake_cspr': val['stake_cspr'],
+            'delegation_rate': val['delegation_rate'],
+        } for val in validators], {
+            val['public_key']: [('VALIDATES', chain, {})] for val in validators
+        }, on_create={'group': 'Validator', 'val': 20})
+        logger.debug(f"Upserted {len(validators)} validators")
+        return ids
+
+    def upsert_delegations(self, repo: GraphRepository, delegations: List[Dict],
+                           totals: Optional[Dict[str, Tuple[float, str]]] = None) -> Dict:
+        """Upserts delegators and their DELEGATED_TO edge; returns public_key -> vertex id
+
+        Each record needs public_key, validator_public_key, stake_cspr and group.
+        The edge carries the stake of that one delegation; the Address vertex the
+        delegator's total, as a Whale if any of its delegations is one. `totals`
+        ({public_key: (stake_cspr, group)}) gives those over every validator,
+        otherwise they are summed over this page. Edges to validators missing
+        from the graph are skipped.
+        """
+        stakes, groups, links = {}, {}, {}
+        for d in delegations:
+            pk = d['public_key']
+            stakes[pk] = stakes.get(pk, 0) + d['stake_cspr']
+            if groups.get(pk) != 'Whale':
+                groups[pk] = d['group']
+            links.setdefault(pk, []).append((
+                'DELEGATED_TO',
+                VertexKey('Validator', 'public_key', d['validator_public_key']),
+                {'stake_cspr': d['stake_cspr']},
+            ))
+        for pk, (stake, group) in (totals or {}).items():
+            if pk in stakes:
+                stakes[pk], groups[pk] = stake, group
+        ids = repo.upsert_linked('Address', 'public_key', [
+            self._delegator(pk, stakes[pk], groups[pk]) for pk in stakes
+        ], links, on_create={'val': 10})
+        logger.debug(f"Upserted {len(delegations)} delegations")
+        return ids
+
+    def update_delegators(self, repo: GraphRepository, totals: Dict[str, Tuple[float, str]]):
+        """Rewrites delegators' total stake and group, e.g. after some of their delegations ended"""
+        repo.upsert_vertices('Address', 'public_key', [
+            self._delegator(pk, stake, group) for pk, (stake, group) in totals.items() if group
+        ])
+
+    @staticmethod
+    def _delegator(public_key: str, stake_cspr: float, group: str) -> Dict:
+        return {'public_key': public_key, 'label': group, 'group': group, 'stake_cspr': stake_cspr}
+
+    def drop_vertices(self, repo: GraphRepository, label: str, public_keys: List[str]):
+        """Drops vertices (and their edges) by natural key"""
+        repo.drop_vertices(label, 'public_key', public_keys)
+
+    def drop_delegations(self, repo: GraphRepository, pairs: List[tuple]):
+        """Drops DELEGATED_TO edges for (delegator public_key, validator public_key) pairs"""
+        delegator_ids = repo.lookup('Address', 'public_key', {d for d, _ in pairs})
+        validator_ids = repo.lookup('Validator', 'public_key', {v for _, v in pairs})
+        repo.drop_edges('DELEGATED_TO', [
+            (delegator_ids[d], validator_ids[v]) for d, v in pairs
+            if d in delegator_ids and v in validator_ids
+        ])
@@ -0,0 +1,178 @@
+"""
+Gremlin connection pool for the CasperEye API.
+Each request checks out its own connection, so concurrent requests no longer
+queue behind one socket; idle or suspect connections are probed before reuse
+and replaced transparently when they have died.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+from gremlin_python.driver.protocol import GremlinServerError
+from gremlin_python.process.anonymous_traversal import traversal
+
+logger = logging.getLogger("GremlinPool")
+
+GREMLIN_ENDPOINT = os.getenv('GREMLIN_ENDPOINT', 'ws://gremlin-server:8182/gremlin')
+GREMLIN_POOL_SIZE = int(os.getenv("GREMLIN_API_POOL_SIZE", 8))
+GREMLIN_CHECKOUT_TIMEOUT = float(os.getenv("GREMLIN_CHECKOUT_TIMEOUT", 5))
+# Connections idle longer than this are probed before being handed out
+GREMLIN_PROBE_AFTER = float(os.getenv("GREMLIN_PROBE_AFTER", 30))
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the checkout timeout"""
+
+
+class _PooledConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.last_used = time.monotonic()
+        self.suspect = False
+
+
+class GremlinPool:
+    """Fixed-size pool of Gremlin connections with liveness probes and wait metrics"""
+
+    def __init__(self, endpoint: str = GREMLIN_ENDPOINT, size: int = GREMLIN_POOL_SIZE,
+                 checkout_timeout: float = GREMLIN_CHECKOUT_TIMEOUT, probe_after: float = GREMLIN_PROBE_AFTER,
+                 connection_factory: Optional[Callable] = None):
+        self.endpoint = endpoint
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.probe_after = probe_after
+        self.connection_factory = connection_factory or self._connect
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'failed_probes': 0,
+            'wait_total_ms': 0.0,
+            'wait_max_ms': 0.0,
+        }
+
+    def _connect(self):
+        # The pool provides the concurrency, so each connection needs a single socket
+        return DriverRemoteConnection(self.endpoint, 'g', pool_size=1, max_workers=1)
+
+    def _open(self) -> _PooledConnection:
+        try:
+            return _PooledConnection(self.connection_factory())
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, pooled: _PooledConnection):
+        with self._lock:
+            self._opened -= 1
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _alive(self, pooled: _PooledConnection) -> bool:
+        try:
+            traversal().withRemote(pooled.conn).inject(1).next()
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️  Gremlin connection failed liveness probe: {e}")
+            with self._lock:
+                self._stats['failed_probes'] += 1
+            return False
+
+    def checkout(self, timeout: Optional[float] = None) -> _PooledConnection:
+        """Takes an idle connection, opens a new one below `size`, or waits up to `timeout`"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        pooled = None
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                pooled = self._open()
+            else:
+                try:
+                    pooled = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No Gremlin connection free after {timeout}s ({self.size} in use)")
+
+        if pooled.suspect or time.monotonic() - pooled.last_used > self.probe_after:
+            if not self._alive(pooled):
+                # Replace the dead connection transparently
+                self._discard(pooled)
+                with self._lock:
+                    self._opened += 1
+                    self._stats['reconnects'] += 1
+                pooled = self._open()
+            pooled.suspect = False
+
+        waited_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['wait_total_ms'] += waited_ms
+            self._stats['wait_max_ms'] = max(self._stats['wait_max_ms'], waited_ms)
+        return pooled
+
+    def checkin(self, pooled: _PooledConnection, failed: bool = False):
+        """Returns a connection; one that failed is probed on its next checkout"""
+        pooled.last_used = time.monotonic()
+        pooled.suspect = pooled.suspect or failed
+        self._idle.put(pooled)
+
+    @contextmanager
+    def traversal(self, timeout: Optional[float] = None):
+        """Yields a traversal source bound to a checked-out connection"""
+        pooled = self.checkout(timeout)
+        failed = False
+        try:
+            yield traversal().withRemote(pooled.conn)
+        except GremlinServerError:
+            # The server answered, so the connection itself is fine
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.checkin(pooled, failed)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            opened = self._opened
+        idle = self._idle.qsize()
+        checkouts = stats['checkouts']
+        return {
+            'size': self.size,
+            'open': opened,
+            'idle': idle,
+            'in_use': max(0, opened - idle),
+            'checkouts': checkouts,
+            'timeouts': stats['timeouts'],
+            'reconnects': stats['reconnects'],
+            'failed_probes': stats['failed_probes'],
+            'wait_avg_ms': round(stats['wait_total_ms'] / checkouts, 2) if checkouts else 0.0,
+            'wait_max_ms': round(stats['wait_max_ms'], 2),
+        }
+
+    def close(self):
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(pooled)
@@ -0,0 +1,391 @@
+"""
+Gremlin-backed GraphRepository for CasperEye.
+Writes go out as batched parameterized traversals, known vertices are
+addressed by cached id, and the API borrows connections from a GremlinPool
+while ingesters use their own long-lived traversal source.
+"""
+import itertools
+import logging
+import os
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from gremlin_python.process.graph_traversal import __
+from gremlin_python.process.traversal import Bindings, Cardinality, Direction, Order, P, Scope, T
+
+from graph_repository import GraphRepository, Labels, VertexKey, label_set
+from gremlin_pool import GREMLIN_ENDPOINT, GremlinPool
+from vertex_cache import VertexCache
+
+logger = logging.getLogger("GremlinRepository")
+
+# Keep each request well under the Gremlin server's maxContentLength (64 KB)
+WRITE_BATCH_SIZE = int(os.getenv("GRAPH_WRITE_BATCH_SIZE", 25))
+# Ids per P.within() lookup
+LOOKUP_BATCH_SIZE = int(os.getenv("GRAPH_LOOKUP_BATCH_SIZE", 500))
+
+
+def batched(items: Iterable, size: int) -> Iterable[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _element(element_map: Dict) -> Dict:
+    """elementMap() result -> {'id', 'label', 'properties'} (plus 'out'/'in' for edges)"""
+    props = {}
+    element = {'properties': props}
+    for key, value in element_map.items():
+        if key == T.id:
+            element['id'] = value
+        elif key == T.label:
+            element['label'] = value
+        elif key == Direction.OUT:
+            element['out'] = value[T.id]
+        elif key == Direction.IN:
+            element['in'] = value[T.id]
+        else:
+            props[key] = value
+    return element
+
+
+class GremlinRepository(GraphRepository):
+    """GraphRepository over a Gremlin server (TinkerGraph or Neptune)"""
+
+    backend = 'gremlin'
+
+    def __init__(self, g=None, pool: Optional[GremlinPool] = None, endpoint: str = GREMLIN_ENDPOINT,
+                 batch_size: int = WRITE_BATCH_SIZE, cache: Optional[VertexCache] = None):
+        self.g = g
+        self.endpoint = endpoint
+        self.pool = pool if pool is not None or g is not None else GremlinPool(endpoint)
+        self.batch_size = batch_size
+        self.cache = cache if cache is not None else VertexCache()
+
+    @contextmanager
+    def _traversal(self):
+        """A pooled traversal source, or the fixed one the repository was built with"""
+        if self.g is not None:
+            yield self.g
+        else:
+            with self.pool.traversal() as g:
+                yield g
+
+    def _filtered(self, t, labels: Labels = None, where: Optional[Dict] = None, at_least: Optional[Dict] = None):
+        wanted = label_set(labels)
+        if wanted:
+            t = t.hasLabel(*sorted(wanted))
+        for key, value in (where or {}).items():
+            t = t.has(key, value)
+        for key, bound in (at_least or {}).items():
+            t = t.has(key, P.gte(bound))
+        return t
+
+    # --- lifecycle ---
+
+    def bootstrap(self):
+        from graph_schema import bootstrap_schema
+        with self._traversal() as g:
+            bootstrap_schema(self.endpoint, g)
+
+    def health(self) -> Dict:
+        return {'gremlin_pool': self.pool.stats()} if self.pool is not None else {}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+    def clear(self):
+        self.cache.clear()
+        with self._traversal() as g:
+            g.V().drop().iterate()
+
+    def invalidate_cache(self):
+        self.cache.clear()
+
+    def count(self, labels: Labels = None, where: Optional[Dict] = None, at_least: Optional[Dict] = None) -> int:
+        with self._traversal() as g:
+            return int(self._filtered(g.V(), labels, where, at_least).count().next())
+
+    # --- vertices ---
+
+    def _start(self, t, label: str, key_property: str, key):
+        """Continues `t` at the vertex to upsert: by cached id when known, by natural key when
+        that id is unknown or gone, so a stale cache entry never leads to a duplicate vertex"""
+        vertex_id = self.cache.get(label, key)
+        if vertex_id is None:
+            return t.V().has(label, key_property, key).limit(1)
+        return t.coalesce(__.V(vertex_id).hasLabel(label), __.V().has(label, key_property, key).limit(1))
+
+    def _endpoint(self, ref):
+        """Anonymous traversal to an edge endpoint given as a vertex id or a VertexKey"""
+        if isinstance(ref, VertexKey):
+            return self._start(__.identity(), *ref)
+        return __.V(ref)
+
+    @staticmethod
+    def _is(t, ref):
+        """Filters `t` (an edge's other end) to the vertex `ref` addresses"""
+        if isinstance(ref, VertexKey):
+            return t.has(ref.label, ref.key_property, ref.key)
+        return t.hasId(ref)
+
+    def _link(self, edge_label: str, target, properties: Optional[Dict]):
+        """Side effect upserting the (edge_label, current vertex, target) edge; skipped if target is missing"""
+        edge = __.where(self._endpoint(target)).coalesce(
+            __.outE(edge_label).where(self._is(__.inV(), target)),
+            __.addE(edge_label).to(self._endpoint(target))
+        )
+        for name, value in (properties or {}).items():
+            if value is not None:
+                edge = edge.property(name, value)
+        return edge
+
+    def _forget(self, refs: Iterable):
+        """Forgets the cached ids a failed write used; they are resolved by natural key next time"""
+        for ref in refs:
+            if isinstance(ref, VertexKey):
+                self.cache.invalidate(ref.label, [ref.key])
+            else:
+                self.cache.discard_ids([ref])
+
+    def upsert_vertices(self, label: str, key_property: str, records: List[Dict],
+                        on_create: Optional[Dict] = None) -> Dict[Hashable, object]:
+        return self.upsert_linked(label, key_property, records, {}, on_create)
+
+    def upsert_linked(self, label: str, key_property: str, records: List[Dict],
+                      links: Dict[Hashable, List[Tuple[str, VertexKey, Dict]]],
+                      on_create: Optional[Dict] = None) -> Dict[Hashable, object]:
+        ids = {}
+        with self._traversal() as g:
+            # One traversal per batch writes the vertices and their edges, instead of a
+            # lookup and a write per vertex plus a second pass for the edges
+            for batch in batched(records, self.batch_size):
+                t = g.inject(0)
+                targets = []
+                for record in batch:
+                    key = record[key_property]
+                    create = __.addV(label).property(key_property, key)
+                    for name, value in (on_create or {}).items():
+                        create = create.property(name, value)
+                    t = self._start(t, label, key_property, key).fold().coalesce(__.unfold(), create)
+                    for name, value in record.items():
+                        if name != key_property and value is not None:
+                            t = t.property(Cardinality.single, name, value)
+                    for edge_label, target, properties in links.get(key, ()):
+                        t = t.sideEffect(self._link(edge_label, target, properties))
+                        targets.append(target)
+                    t = t.sideEffect(
+                        __.project('key', 'id').by(__.constant(key)).by(__.id_()).aggregate(Scope.local, 'ids')
+                    )
+                try:
+                    rows = t.cap('ids').next()
+                except Exception:
+                    self.cache.invalidate(label, [record[key_property] for record in batch])
+                    self._forget(targets)
+                    raise
+                batch_ids = {row['key']: row['id'] for row in rows}
+                self.cache.update(label, batch_ids)
+                ids.update(batch_ids)
+        return ids
+
+    def lookup(self, label: str, key_property: str, keys: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, object]:
+        ids = {}
+        if keys is None:
+            missing = None
+        else:
+            missing = []
+            # Cached ids are returned unchecked; writes address vertices by VertexKey instead
+            for key in keys:
+                vertex_id = self.cache.get(label, key)
+                if vertex_id is None:
+                    missing.append(key)
+                else:
+                    ids[key] = vertex_id
+            if not missing:
+                return ids
+
+        with self._traversal() as g:
+            batches = [None] if missing is None else batched(missing, LOOKUP_BATCH_SIZE)
+            for batch in batches:
+                t = g.V().hasLabel(label)
+                t = t.has(key_property) if batch is None else t.has(key_property, P.within(batch))
+                rows = t.project('key', 'id').by(key_property).by(__.id_()).toList()
+                found = {row['key']: row['id'] for row in rows}
+                self.cache.update(label, found)
+                ids.update(found)
+        return ids
+
+    def get_vertex(self, label: str, key_property: str, key: Hashable) -> Optional[Dict]:
+        with self._traversal() as g:
+            rows = g.V().has(label, key_property, key).limit(1).elementMap().toList()
+        return _element(rows[0]) if rows else None
+
+    def vertices(self, labels: Labels = None, where: Optional[Dict] = None, at_least: Optional[Dict] = None,
+                 properties: Optional[List[str]] = None) -> List[Dict]:
+        with self._traversal() as g:
+            rows = self._filtered(g.V(), labels, where, at_least).elementMap(*(properties or [])).toList()
+        return [_element(row) for row in rows]
+
+    def drop_vertices(self, label: str, key_property: str, keys: Iterable[Hashable]) -> int:
+        dropped = 0
+        with self._traversal() as g:
+            for batch in batched(keys, LOOKUP_BATCH_SIZE):
+                dropped += int(g.V().has(label, key_property, P.within(batch)).sideEffect(__.drop()).count().next())
+                self.cache.invalidate(label, batch)
+        return dropped
+
+    def drop_vertex_ids(self, ids: Iterable) -> int:
+        dropped = 0
+        with self._traversal() as g:
+            for batch in batched(ids, LOOKUP_BATCH_SIZE):
+                dropped += int(g.V(*batch).sideEffect(__.drop()).count().next())
+                self.cache.discard_ids(batch)
+        return dropped
+
+    # --- edges ---
+
+    def upsert_edges(self, label: str, edges: List[Tuple[object, object, Dict]]):
+        with self._traversal() as g:
+            for batch in batched(edges, self.batch_size):
+                t = g.inject(0)
+                for out_ref, in_ref, properties in batch:
+                    t = t.sideEffect(self._endpoint(out_ref).sideEffect(self._link(label, in_ref, properties)))
+                try:
+                    t.iterate()
+                except Exception:
+                    self._forget([ref for out_ref, in_ref, _ in batch for ref in (out_ref, in_ref)])
+                    raise
+
+    def edges(self, labels: Labels = None) -> List[Dict]:
+        wanted = label_set(labels)
+        with self._traversal() as g:
+            t = g.E()
+            if wanted:
+                t = t.hasLabel(*sorted(wanted))
+            rows = t.elementMap().toList()
+        return [_element(row) for row in rows]
+
+    def drop_edges(self, label: str, pairs: Iterable[Tuple[object, object]]) -> int:
+        dropped = 0
+        with self._traversal() as g:
+            for batch in batched(pairs, self.batch_size):
+                t = g.inject(0)
+                for out_id, in_id in batch:
+                    t = t.sideEffect(
+                        __.V(out_id).outE(label).where(__.inV().hasId(in_id))
+                            .sideEffect(__.drop()).aggregate(Scope.local, 'dropped')
+                    )
+                dropped += len(t.cap('dropped').next())
+        return dropped
+
+    def neighborhood(self, vertex_id, direction: str = 'out', edge_label: Optional[str] = None) -> List[Dict]:
+        labels = [edge_label] if edge_label else []
+        step = {'out': __.outE, 'in': __.inE, 'both': __.bothE}[direction]
+        with self._traversal() as g:
+            rows = g.V(vertex_id).flatMap(step(*labels)) \
+                .project('edge', 'vertex') \
+                .by(__.elementMap()) \
+                .by(__.otherV().elementMap()) \
+                .toList()
+        return [{'edge': _element(row['edge']), 'vertex': _element(row['vertex'])} for row in rows]
+
+    # --- aggregates and export ---
+
+    def aggregate(self, group_by: str, sum_of: Optional[str] = None, labels: Labels = None,
+                  where: Optional[Dict] = None) -> Dict[Hashable, float]:
+        with self._traversal() as g:
+            t = self._filtered(g.V(), labels, where).has(group_by)
+            if sum_of is None:
+                result = t.groupCount().by(group_by).next()
+            else:
+                result = t.has(sum_of).group().by(group_by).by(__.values(sum_of).sum_()).next()
+        return dict(result or {})
+
+    def top_values(self, prop: str, n: int, labels: Labels = None) -> List[float]:
+        with self._traversal() as g:
+            return self._filtered(g.V(), labels).values(prop).order().by(Order.desc).limit(n).toList()
+
+    def network_summary(self, whale_threshold: float, top_n: int) -> Dict:
+        def total(t):
+            return t.fold().coalesce(__.unfold().sum_(), __.constant(0))
+
+        with self._traversal() as g:
+            # One request: each aggregate is a branch of a single project()
+            row = g.inject(0).project('groups', 'validator_stake', 'top_stakes', 'delegator_count',
+                                      'whale_count', 'delegated_stake', 'staked_btc') \
+                .by(__.V().has('group').groupCount().by('group')) \
+                .by(total(__.V().hasLabel('Validator').values('stake_cspr'))) \
+                .by(__.V().hasLabel('Validator').values('stake_cspr').order().by(Order.desc).limit(top_n).fold()) \
+                .by(__.V().hasLabel('Address').where(__.outE('DELEGATED_TO')).count()) \
+                .by(__.V().hasLabel('Address').where(__.outE('DELEGATED_TO').has('stake_cspr', P.gte(whale_threshold)))
+                    .count()) \
+                .by(total(__.V().hasLabel('Address').outE('DELEGATED_TO').values('stake_cspr'))) \
+                .by(total(__.V().hasLabel('Address').has('group').values('btc_amount'))) \
+                .next()
+        return {
+            'groups': dict(row['groups'] or {}),
+            'validator_stake': float(row['validator_stake']),
+            'top_stakes': list(row['top_stakes']),
+            'delegator_count': int(row['delegator_count']),
+            'whale_count': int(row['whale_count']),
+            'delegated_stake': float(row['delegated_stake']),
+            'staked_btc': float(row['staked_btc']),
+        }
+
+    def sum_along(self, path: Sequence[Tuple[str, str]], sum_of: str, labels: Labels = None,
+                  where: Optional[Dict] = None, end_where: Optional[Dict] = None,
+                  key_property: Optional[str] = None) -> Dict[Hashable, float]:
+        # Filter values travel as bindings, so the traversal is the same on every run
+        names = (f"p{i}" for i in itertools.count())
+
+        def bound(filters):
+            return {key: Bindings.of(next(names), value) for key, value in (filters or {}).items()}
+
+        with self._traversal() as g:
+            t = self._filtered(g.V(), labels, bound(where))
+            if key_property:
+                t = t.has(key_property)
+            steps = __.identity()
+            for direction, edge_label in path:
+                steps = {'out': steps.out, 'in': steps.in_, 'both': steps.both}[direction](edge_label)
+            for key, value in bound(end_where).items():
+                steps = steps.has(key, value)
+            # One grouped traversal: start vertex -> sum over everything its paths reach
+            rows = t.group() \
+                .by(key_property if key_property else T.id) \
+                .by(steps.values(sum_of).fold().coalesce(__.unfold().sum_(), __.constant(0))) \
+                .next()
+        return dict(rows or {})
+
+    def export_page(self, after=None, limit: int = 1000, groups: Optional[List[str]] = None,
+                    min_stake: Optional[float] = None, properties: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        props = properties or []
+        with self._traversal() as g:
+            t = g.V().has('group')
+            if groups:
+                t = t.has('group', P.within(*groups))
+            if min_stake is not None:
+                t = t.has('stake_cspr', P.gte(min_stake))
+            if after is not None:
+                t = t.has(T.id, P.gt(after))
+            # Each vertex with its out-edges and their endpoints, in one traversal
+            rows = t.order().by(T.id).limit(limit + 1) \
+                .project('vertex', 'out') \
+                .by(__.elementMap(*props)) \
+                .by(__.outE().project('label', 'target').by(__.label()).by(__.inV().elementMap(*props)).fold()) \
+                .toList()
+
+        has_more = len(rows) > limit
+        return [
+            {
+                'vertex': _element(row['vertex']),
+                'out': [{'label': link['label'], 'target': _element(link['target'])} for link in row['out']],
+            }
+            for row in rows[:limit]
+        ], has_more
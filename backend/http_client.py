@@ -0,0 +1,102 @@
+"""
+Shared HTTP client for CasperEye upstream APIs.
+Keeps one keep-alive session per host so repeated calls to CSPR.cloud, Babylon
+or DefiLlama reuse connections, and retries transient failures with jittered
+backoff inside a per-call deadline.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("HttpClient")
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", 0.25))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 4))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+DEFAULT_DEADLINE = float(os.getenv("HTTP_DEADLINE", 10))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The call's deadline ran out across all attempts"""
+
+
+def session_for(url: str) -> requests.Session:
+    """Returns the pooled keep-alive session for the URL's scheme and host"""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(origin)
+        if session is None:
+            session = requests.Session()
+            # Retries are handled below so they share the call's deadline
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount(f"{parts.scheme}://", adapter)
+            _sessions[origin] = session
+        return session
+
+
+def _backoff(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """Full-jitter exponential backoff, honouring a numeric Retry-After"""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return float(retry_after)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF * 2 ** attempt))
+
+
+def request(method: str, url: str, deadline: float = DEFAULT_DEADLINE, retries: int = HTTP_RETRIES,
+            **kwargs) -> requests.Response:
+    """Sends a request on the host's pooled session, retrying transient failures until `deadline` seconds"""
+    session = session_for(url)
+    expires = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{method} {url} exceeded its {deadline}s deadline")
+
+        response = None
+        try:
+            response = session.request(
+                method, url, timeout=(min(HTTP_CONNECT_TIMEOUT, remaining), remaining), **kwargs
+            )
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= retries:
+                raise
+
+        delay = _backoff(attempt, response)
+        if time.monotonic() + delay >= expires:
+            if response is not None:
+                return response
+            raise DeadlineExceeded(f"{method} {url} exceeded its {deadline}s deadline")
+        if response is not None:
+            # Hand the connection back to the pool; with stream=True it is held until closed
+            response.close()
+        attempt += 1
+        logger.debug(f"Retrying {method} {url} in {delay:.2f}s (attempt {attempt}/{retries})")
+        time.sleep(delay)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, retries: int = 0, **kwargs) -> requests.Response:
+    """POSTs are not retried unless the caller opts in"""
+    return request('POST', url, retries=retries, **kwargs)
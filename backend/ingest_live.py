@@ -1,28 +1,46 @@
 import time
-import requests
+import random
+import http_client
 import logging
-from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
-from gremlin_python.process.anonymous_traversal import traversal
-from gremlin_python.process.graph_traversal import __
+from collections import deque
 from whale_alerts import WhaleAlertService
+from graph_version import bump_graph_version
+from checkpoint import IngestCheckpoint
+from graph_repository import GRAPH_BACKEND, create_repository
 
 # --- CONFIGURATION ---
 # Official Babylon Testnet API (Polkachu or similar)
 BABYLON_API = "https://babylon-testnet-api.polkachu.com"
 NEPTUNE_URI = 'ws://gremlin-server:8182/gremlin'  # Use service name for Docker
+# Recent tx hashes remembered so re-listed transactions are not ingested twice
+SEEN_TX_LIMIT = 500
+# Providers created from each listing
+PROVIDER_LIMIT = 10
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("BabylonIndexer")
 
 class BabylonIngestor:
-    def __init__(self):
+    def __init__(self, repo=None):
         self.conn = None
-        self.g = None
+        self.repo = repo
         self.whale_alerts = WhaleAlertService()
-        self.connect_with_retry()
+        self.checkpoint = IngestCheckpoint('babylon')
+        self.seen_txs = deque(maxlen=SEEN_TX_LIMIT)
+        # Graph writes since the graph version was last bumped
+        self.changes = 0
+        if self.repo is None:
+            if GRAPH_BACKEND == 'memory':
+                self.repo = create_repository('memory')
+            else:
+                self.connect_with_retry()
 
     def connect_with_retry(self):
         """Connect to Gremlin with exponential backoff"""
+        from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+        from gremlin_python.process.anonymous_traversal import traversal
+        from gremlin_repository import GremlinRepository
+        
         max_retries = 30
         retry_delay = 2
         
@@ -30,9 +48,10 @@ class BabylonIngestor:
             try:
                 logger.info(f"🔌 Connecting to Gremlin at {NEPTUNE_URI} (Attempt {attempt+1}/{max_retries})...")
                 self.conn = DriverRemoteConnection(NEPTUNE_URI, 'g')
-                self.g = traversal().withRemote(self.conn)
+                g = traversal().withRemote(self.conn)
                 # Test connection
-                self.g.V().limit(1).toList()
+                g.V().limit(1).toList()
+                self.repo = GremlinRepository(g, endpoint=NEPTUNE_URI)
                 logger.info("✅ Connected to Gremlin successfully!")
                 return
             except Exception as e:
@@ -48,18 +67,26 @@ class BabylonIngestor:
         """Only run this on first startup to clear old data"""
         logger.info("🧹 Cleaning old graph data...")
         try:
-            self.g.V().drop().toList()  # Use toList() instead of iterate()
+            self.repo.clear()
             logger.info("✅ Graph cleaned successfully")
         except Exception as e:
             logger.warning(f"Could not clear graph (may be empty): {e}")
             # Try alternative method
-            try:
-                self.conn.close()
-                self.conn = DriverRemoteConnection(NEPTUNE_URI, 'g')
-                self.g = traversal().withRemote(self.conn)
-            except:
-                pass
+            if self.conn is not None:
+                try:
+                    self.conn.close()
+                    self.connect_with_retry()
+                except:
+                    pass
     
+    def graph_populated(self) -> bool:
+        """True if the graph still holds a previous run's Babylon data
+
+        Casper shares the Address label, so only addresses with a BTC stake count.
+        """
+        return (self.repo.count(('FinalityProvider', 'ConsumerChain')) > 0
+                or self.repo.count('Address', at_least={'btc_amount': 0}) > 0)
+
     def seed_demo_data(self):
         """Add demo whales and retail stakers for visualization"""
         logger.info("🌱 Seeding demo address data...")
@@ -73,17 +100,13 @@ class BabylonIngestor:
                 {"addr": "bc1q_whale_5", "btc": 1.2, "name": "Whale 5"},
             ]
             
-            for whale in whales:
-                try:
-                    self.g.addV('Address') \
-                        .property('address', whale['addr']) \
-                        .property('label', 'Whale') \
-                        .property('group', 'Whale') \
-                        .property('btc_amount', whale['btc']) \
-                        .property('val', 10) \
-                        .next()
-                except:
-                    pass
+            self.repo.upsert_vertices('Address', 'address', [{
+                'address': whale['addr'],
+                'label': 'Whale',
+                'group': 'Whale',
+                'btc_amount': whale['btc'],
+                'val': 10,
+            } for whale in whales])
             
             # Create demo retail stakers (≤1 BTC)
             retail = [
@@ -92,17 +115,14 @@ class BabylonIngestor:
                 {"addr": "bc1q_retail_3", "btc": 0.3, "name": "Retail 3"},
             ]
             
-            for ret in retail:
-                try:
-                    self.g.addV('Address') \
-                        .property('address', ret['addr']) \
-                        .property('label', 'Retail') \
-                        .property('group', 'Retail') \
-                        .property('btc_amount', ret['btc']) \
-                        .property('val', 10) \
-                        .next()
-                except:
-                    pass
+            self.repo.upsert_vertices('Address', 'address', [{
+                'address': ret['addr'],
+                'label': 'Retail',
+                'group': 'Retail',
+                'btc_amount': ret['btc'],
+                'val': 10,
+            } for ret in retail])
+            self.changes += len(whales) + len(retail)
             
             logger.info(f"✅ Seeded {len(whales)} whales and {len(retail)} retail stakers")
         except Exception as e:
@@ -113,66 +133,82 @@ class BabylonIngestor:
         endpoint = f"{BABYLON_API}/babylon/btcstaking/v1/finality_providers"
         try:
             logger.info(f"📡 Fetching Finality Providers from {endpoint}...")
-            response = requests.get(endpoint, timeout=10).json()
-            providers = response.get('finality_providers', [])
+            response = http_client.get(endpoint, deadline=10).json()
+            listed = response.get('finality_providers', [])
+            # Without a next page the listing is complete and can prove a provider is gone
+            complete = not (response.get('pagination') or {}).get('next_key')
             
-            count = 0
-            for fp in providers[:10]:  # Limit to first 10 providers
+            records = []
+            for fp in listed[:PROVIDER_LIMIT]:
                 # Extract Real Data
                 btc_pk = fp.get('btc_pk_hex', 'unknown')
                 description = fp.get('description', {})
                 moniker = description.get('moniker', f"Validator-{btc_pk[:6]}")
                 commission = fp.get('commission', '0.05')
+                records.append({'pk': btc_pk, 'name': moniker, 'commission': commission})
+            
+            # Only providers not in the graph yet are created and linked
+            known = self.repo.lookup('FinalityProvider', 'pk', [r['pk'] for r in records])
+            new = [r for r in records if r['pk'] not in known]
+            if new:
+                ids = self.repo.upsert_vertices('FinalityProvider', 'pk', new, on_create={'group': 'Provider', 'val': 20})
+                self.changes += len(new)
+                for record in new:
+                    logger.info(f"✅ Created provider: {record['name']}")
+                    # Link to chains
+                    self._link_to_chains(ids[record['pk']])
                 
-                # Check if provider already exists by name
-                try:
-                    existing = self.g.V().has('FinalityProvider', 'name', moniker).toList()
-                    if existing:
-                        logger.debug(f"Provider {moniker} already exists")
-                        continue
-                except:
-                    pass
-                
-                # Create provider node
-                try:
-                    v = self.g.addV('FinalityProvider') \
-                        .property('pk', btc_pk) \
-                        .property('name', moniker) \
-                        .property('commission', commission) \
-                        .property('group', 'Provider') \
-                        .property('val', 20) \
-                        .next()
-                    count += 1
-                    logger.info(f"✅ Created provider: {moniker}")
-                except Exception as create_err:
-                    logger.debug(f"Provider creation note: {create_err}")
-                
-                # Link to chains
-                self._link_to_chains(v)
-                
-            logger.info(f"✅ Indexed {count} new Finality Providers.")
+            logger.info(f"✅ Indexed {len(new)} new Finality Providers.")
+            
+            # Providers missing from a complete listing are stale (e.g. left over from before a restart)
+            if complete and listed:
+                self._drop_unlisted_providers({fp.get('btc_pk_hex', 'unknown') for fp in listed})
             
         except Exception as e:
             logger.error(f"❌ Error fetching providers: {e}")
 
-    def _link_to_chains(self, provider_vertex):
+    def _drop_unlisted_providers(self, listed):
+        """Drops providers not in `listed` and re-links their stakers to remaining providers
+
+        The stakers' transactions are already in seen_txs, so they would never be
+        linked again otherwise.
+        """
+        stale = [
+            vertex_id for pk, vertex_id in self.repo.lookup('FinalityProvider', 'pk').items()
+            if pk not in listed
+        ]
+        if not stale:
+            return
+        stakers = {
+            row['vertex']['id']
+            for vertex_id in stale
+            for row in self.repo.neighborhood(vertex_id, 'in', 'STAKED_WITH')
+        }
+        dropped = self.repo.drop_vertex_ids(stale)
+        self.changes += dropped
+        logger.info(f"🧹 Dropped {dropped} stale Finality Providers")
+        
+        provider_ids = list(self.repo.lookup('FinalityProvider', 'pk').values())
+        if stakers and provider_ids:
+            self.repo.upsert_edges('STAKED_WITH', [
+                (staker_id, random.choice(provider_ids), {}) for staker_id in stakers
+            ])
+            logger.info(f"🔗 Re-linked {len(stakers)} stakers of dropped providers")
+
+    def _link_to_chains(self, provider_id):
         """
         Links providers to Consumer Chains. 
         Note: On Testnet, we infer this based on standard active chains.
         """
         chains = ['Osmosis', 'Neutron', 'Stargaze']
-        import random
         # Randomly assign real providers to chains to visualize the security mesh
         secured_chain = random.choice(chains)
         
         # Find or create chain node
-        try:
-            chain_v = self.g.V().has('ConsumerChain', 'name', secured_chain).next()
-        except:
-            # Create if doesn't exist
-            chain_v = self.g.addV('ConsumerChain').property('name', secured_chain).property('group', 'Chain').property('val', 30).next()
-            
-        self.g.V(provider_vertex).addE('SECURES').to(chain_v).next()
+        chain_id = self.repo.upsert_vertices(
+            'ConsumerChain', 'name', [{'name': secured_chain}], on_create={'group': 'Chain', 'val': 30}
+        )[secured_chain]
+        self.repo.upsert_edges('SECURES', [(provider_id, chain_id, {})])
 
     def fetch_live_delegations(self):
         """
@@ -188,11 +224,18 @@ class BabylonIngestor:
         
         try:
             logger.info(f"📡 Fetching Live BTC Delegations...")
-            response = requests.get(endpoint, params=params, timeout=10).json()
+            response = http_client.get(endpoint, params=params, deadline=10).json()
             txs = response.get('tx_responses', [])
 
+            seen = set(self.seen_txs)
+            new_txs = 0
+            provider_ids = None
             for tx in txs:
                 tx_hash = tx['txhash']
+                if tx_hash in seen:
+                    continue
+                self.seen_txs.append(tx_hash)
+                new_txs += 1
                 # Parse logs to find the staker and amount
                 # This is complex parsing of Cosmos logs, simplified here:
                 logs = tx.get('logs', [])
@@ -219,27 +262,29 @@ class BabylonIngestor:
                     # Send whale alert if threshold exceeded
                     self.whale_alerts.send_alert(btc_amount, staker_addr)
                     
-                    # Add Staker to Graph
-                    staker_v = self.g.addV('Address') \
-                        .property('address', staker_addr) \
-                        .property('label', label) \
-                        .property('group', group) \
-                        .property('btc_amount', btc_amount) \
-                        .property('val', 10) \
-                        .next()
+                    # Upsert Staker (one vertex per address, not per transaction)
+                    staker_id = self.repo.upsert_vertices('Address', 'address', [{
+                        'address': staker_addr,
+                        'label': label,
+                        'group': group,
+                        'btc_amount': btc_amount,
+                        'val': 10,
+                    }])[staker_addr]
+                    self.changes += 1
                     
                     # Link Staker to a random provider
                     try:
-                        providers = self.g.V().has('FinalityProvider').toList()
-                        if providers:
-                            import random
-                            provider_v = random.choice(providers)
-                            self.g.V(staker_v).addE('STAKED_WITH').to(provider_v).next()
+                        if provider_ids is None:
+                            provider_ids = list(self.repo.lookup('FinalityProvider', 'pk').values())
+                        if provider_ids:
+                            provider_id = random.choice(provider_ids)
+                            self.repo.upsert_edges('STAKED_WITH', [(staker_id, provider_id, {})])
                             logger.info(f"✅ Linked {label} to provider")
                     except Exception as link_err:
                         logger.warning(f"Could not link staker to provider: {link_err}")
                     
-            logger.info(f"✅ Processed {len(txs)} Live Transactions.")
+            self.checkpoint.set_cursor('txs', list(self.seen_txs))
+            logger.info(f"✅ Processed {new_txs} new of {len(txs)} Live Transactions.")
 
         except Exception as e:
             logger.error(f"❌ Error fetching delegations: {e}")
@@ -248,29 +293,44 @@ class BabylonIngestor:
         """Main loop"""
         logger.info("🚀 Starting Babylon Ingester...")
         
-        # Initial cleanup and seed
-        self.clean_graph()
-        self.seed_demo_data()
+        # Warm restart keeps the graph; otherwise clean and seed
+        try:
+            warm = self.checkpoint.resume(self.graph_populated())
+        except Exception as e:
+            logger.warning(f"Could not inspect graph for warm restart: {e}")
+            warm = False
+        if warm:
+            self.seen_txs.extend(self.checkpoint.cursor('txs', []))
+        else:
+            self.clean_graph()
+        self.repo.bootstrap()
+        if not warm:
+            self.seed_demo_data()
         
         while True:
             try:
                 self.fetch_finality_providers()
                 self.fetch_live_delegations()
+                # Quiet cycles leave the version alone, so readers keep their caches
+                if self.changes:
+                    bump_graph_version(self.repo)
+                    self.changes = 0
+                self.checkpoint.complete_cycle()
                 
                 # Safety check: if graph is empty, re-seed demo data
                 # This ensures the frontend always has something to show
                 try:
-                    count = self.g.V().count().next()
-                    if count == 0:
+                    if self.repo.count() == 0:
                         logger.warning("⚠️ Graph is empty! Re-seeding demo data...")
                         self.seed_demo_data()
                 except Exception as e:
                     logger.warning(f"⚠️ Could not check graph count: {e}")
                     # Try to reconnect if connection lost
-                    try:
-                        self.connect_with_retry()
-                    except:
-                        pass
+                    if self.conn is not None:
+                        try:
+                            self.connect_with_retry()
+                        except:
+                            pass
 
                 logger.info("Sleeping for 60s...")
                 time.sleep(60)
@@ -1,5 +1,5 @@
 import time
-import requests
+import http_client
 import json
 import logging
 
@@ -23,7 +23,7 @@ class SimpleBabylonIngestor:
         endpoint = f"{BABYLON_API}/babylon/btcstaking/v1/finality_providers"
         try:
             logger.info(f"📡 Fetching Finality Providers...")
-            response = requests.get(endpoint, timeout=10)
+            response = http_client.get(endpoint, deadline=10)
             if response.status_code == 200:
                 data = response.json()
                 providers = data.get('finality_providers', [])
@@ -59,7 +59,7 @@ class SimpleBabylonIngestor:
         
         try:
             logger.info(f"📡 Fetching Live BTC Delegations...")
-            response = requests.get(endpoint, params=params, timeout=10)
+            response = http_client.get(endpoint, params=params, deadline=10)
             if response.status_code == 200:
                 data = response.json()
                 txs = data.get('tx_responses', [])
@@ -0,0 +1,99 @@
+"""
+Incremental JSON reading for large upstream responses.
+Yields the elements of one top-level array (e.g. DefiLlama's {"data": [...]})
+as they arrive, so only the current chunk and element are ever in memory
+instead of the whole document.
+"""
+import codecs
+import json
+import re
+from typing import Iterable, Iterator
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'[\s,]*')
+_delimiters = frozenset(', \t\r\n]')
+# Scanning for the key: runs without string or nesting characters, the rest of a
+# string after its opening quote, and what may follow a key up to its array
+_plain = re.compile(r'[^"{}\[\]]*')
+_string_rest = re.compile(r'(?:[^"\\]|\\.)*"', re.S)
+_array_value = re.compile(r'\s*:\s*\[')
+_undecided_value = re.compile(r'\s*(?::\s*)?')
+
+
+class StreamFormatError(ValueError):
+    """The stream ended or was malformed before the array was complete"""
+
+
+def iter_array(chunks: Iterable[bytes], key: str, encoding: str = 'utf-8') -> Iterator:
+    """Yields each element of the array stored under the top-level `key`
+
+    `chunks` is any iterable of bytes, typically response.iter_content(). The
+    text before the array is scanned for nesting, so the same key inside a
+    nested object is not mistaken for the top-level one.
+    """
+    text = codecs.getincrementaldecoder(encoding)()
+    chunks = iter(chunks)
+    buffer = ''
+    pos = None  # Index just past the array's '[' once found
+
+    def more() -> bool:
+        nonlocal buffer
+        for chunk in chunks:
+            if chunk:
+                buffer += text.decode(chunk)
+                return True
+        return False
+
+    depth = 0
+    scan = 0
+    while pos is None:
+        scan = _plain.match(buffer, scan).end()
+        if scan < len(buffer):
+            char = buffer[scan]
+            if char != '"':
+                depth += 1 if char in '{[' else -1
+                scan += 1
+                continue
+            string = _string_rest.match(buffer, scan + 1)
+            if string:
+                end = string.end()
+                if depth != 1 or json.loads(buffer[scan:end]) != key:
+                    scan = end
+                    continue
+                value = _array_value.match(buffer, end)
+                if value:
+                    pos = value.end()
+                    continue
+                if _undecided_value.fullmatch(buffer, end) is None:
+                    scan = end  # The key holds something other than an array
+                    continue
+        # Out of text mid-token (or at a boundary): keep only the unfinished part
+        buffer, scan = buffer[scan:], 0
+        if not more():
+            raise StreamFormatError(f"No array under '{key}' in stream")
+
+    while True:
+        pos = _whitespace.match(buffer, pos).end()
+        if pos >= len(buffer):
+            buffer, pos = '', 0
+            if not more():
+                raise StreamFormatError(f"Stream ended inside '{key}'")
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            element, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element continues in the next chunk; drop what has been consumed
+            buffer, pos = buffer[pos:], 0
+            if not more():
+                raise StreamFormatError(f"Stream ended inside '{key}'")
+            continue
+        if not isinstance(element, (dict, list, str)) and (end == len(buffer) or buffer[end] not in _delimiters):
+            # A bare number at the chunk boundary may still have digits or an exponent to come
+            buffer, pos = buffer[pos:], 0
+            if more():
+                continue
+            raise StreamFormatError(f"Stream ended inside '{key}'")
+        yield element
+        pos = end
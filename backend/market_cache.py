@@ -0,0 +1,139 @@
+"""
+Shared cache for upstream market data (DefiLlama, Babylon, CoinGecko).
+Entries have per-source TTLs and a bounded LRU. Stale entries are served while
+a background refresh runs, and concurrent misses for the same key share one
+fetch, so a dashboard refresh costs at most one download per source.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger("MarketCache")
+
+MARKET_CACHE_SIZE = int(os.getenv("MARKET_CACHE_SIZE", 256))
+# Fresh lifetime per source in seconds; after it, entries are served stale for STALE_FACTOR x TTL
+SOURCE_TTLS = {
+    'babylon': float(os.getenv("MARKET_TTL_BABYLON", 60)),
+    'defillama': float(os.getenv("MARKET_TTL_DEFILLAMA", 300)),
+    'coingecko': float(os.getenv("MARKET_TTL_COINGECKO", 60)),
+}
+DEFAULT_TTL = float(os.getenv("MARKET_TTL_DEFAULT", 300))
+STALE_FACTOR = float(os.getenv("MARKET_STALE_FACTOR", 4))
+
+
+class _Entry:
+    __slots__ = ('value', 'fetched_at', 'ttl', 'stale_ttl')
+
+    def __init__(self, value, ttl: float, stale_ttl: float):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class MarketCache:
+    """TTL + LRU cache with stale-while-revalidate and single-flight fetches"""
+
+    def __init__(self, max_entries: int = MARKET_CACHE_SIZE, refresh_workers: int = 4):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="market-refresh")
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'fetches': 0, 'errors': 0, 'evictions': 0}
+
+    @staticmethod
+    def ttl_for(source: str) -> float:
+        return SOURCE_TTLS.get(source, DEFAULT_TTL)
+
+    def get(self, key: Hashable, fetch: Callable, source: Optional[str] = None,
+            ttl: Optional[float] = None, stale_ttl: Optional[float] = None):
+        """Cached value for `key`, calling fetch() at most once at a time per key.
+
+        Within `ttl` the cached value is returned; within `stale_ttl` it is returned while a
+        background refresh runs; after that the caller waits for a fetch. A failed fetch
+        falls back to any cached value, however old, before raising.
+        """
+        ttl = ttl if ttl is not None else self.ttl_for(source or str(key).split(':')[0])
+        stale_ttl = stale_ttl if stale_ttl is not None else ttl * (1 + STALE_FACTOR)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = entry.age()
+                if age < entry.ttl:
+                    self._stats['hits'] += 1
+                    return entry.value
+                if age < entry.stale_ttl:
+                    self._stats['stale_hits'] += 1
+                    future, owner = self._join_fetch(key)
+                    if owner:
+                        self._refresher.submit(self._fetch, key, fetch, ttl, stale_ttl, future)
+                    return entry.value
+            self._stats['misses'] += 1
+            future, owner = self._join_fetch(key)
+
+        if owner:
+            self._fetch(key, fetch, ttl, stale_ttl, future)
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                logger.warning(f"⚠️  Refresh of {key} failed, serving {entry.age():.0f}s old value")
+                return entry.value
+            raise
+
+    def _join_fetch(self, key: Hashable) -> Tuple[Future, bool]:
+        """The in-flight fetch for `key`, or a new one the caller owns (caller holds the lock)"""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._inflight[key] = future
+        return future, True
+
+    def _fetch(self, key: Hashable, fetch: Callable, ttl: float, stale_ttl: float, future: Future):
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                self._inflight.pop(key, None)
+            logger.debug(f"Fetching {key} failed: {e}")
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._stats['fetches'] += 1
+            self._entries[key] = _Entry(value, ttl, stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'inflight': len(self._inflight), **self._stats}
+
+
+# One cache per process, shared by every consumer of market data
+market_cache = MarketCache()
@@ -0,0 +1,361 @@
+"""
+Embedded in-process graph store for CasperEye.
+Vertices and edges live in parallel arrays indexed by their integer id, with
+adjacency maps and hash indexes on natural keys, so lookups are O(1) and no
+Gremlin server (or JVM) is needed for single-node runs and CI.
+"""
+import heapq
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from graph_repository import GraphRepository, Labels, VertexKey, label_set, matches
+
+
+class MemoryRepository(GraphRepository):
+    """Array-backed property graph with the GraphRepository semantics"""
+
+    backend = 'memory'
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # Vertex arrays; a dropped vertex leaves None in its slot so ids are never reused
+        self.v_label: List[Optional[str]] = []
+        self.v_props: List[Optional[Dict]] = []
+        self.v_out: List[Optional[Dict]] = []  # (edge label, in id) -> edge id
+        self.v_in: List[Optional[Dict]] = []   # (edge label, out id) -> edge id
+        # Edge arrays
+        self.e_label: List[Optional[str]] = []
+        self.e_out: List[Optional[int]] = []
+        self.e_in: List[Optional[int]] = []
+        self.e_props: List[Optional[Dict]] = []
+        # (label, key property) -> {key: vertex id}, built on first use and kept current
+        self.indexes: Dict[Tuple[str, str], Dict[Hashable, int]] = {}
+        self.vertex_count = 0
+        self.edge_count = 0
+
+    # --- internals ---
+
+    def _live(self, labels: Labels = None) -> Iterable[int]:
+        wanted = label_set(labels)
+        for vid, label in enumerate(self.v_label):
+            if label is not None and (wanted is None or label in wanted):
+                yield vid
+
+    def _index(self, label: str, key_property: str) -> Dict[Hashable, int]:
+        index = self.indexes.get((label, key_property))
+        if index is None:
+            index = {}
+            for vid in self._live(label):
+                key = self.v_props[vid].get(key_property)
+                if key is not None:
+                    index.setdefault(key, vid)
+            self.indexes[(label, key_property)] = index
+        return index
+
+    def _set_property(self, vid: int, name: str, value):
+        props = self.v_props[vid]
+        label = self.v_label[vid]
+        index = self.indexes.get((label, name))
+        if index is not None:
+            old = props.get(name)
+            if old is not None and index.get(old) == vid:
+                del index[old]
+            index.setdefault(value, vid)
+        props[name] = value
+
+    def _vertex(self, vid: int, properties: Optional[List[str]] = None) -> Dict:
+        props = self.v_props[vid]
+        if properties is not None:
+            props = {k: props[k] for k in properties if k in props}
+        return {'id': vid, 'label': self.v_label[vid], 'properties': dict(props)}
+
+    def _edge(self, eid: int) -> Dict:
+        return {
+            'id': eid,
+            'label': self.e_label[eid],
+            'out': self.e_out[eid],
+            'in': self.e_in[eid],
+            'properties': dict(self.e_props[eid]),
+        }
+
+    def _remove_edge(self, eid: int):
+        label, out_id, in_id = self.e_label[eid], self.e_out[eid], self.e_in[eid]
+        self.v_out[out_id].pop((label, in_id), None)
+        self.v_in[in_id].pop((label, out_id), None)
+        self.e_label[eid] = self.e_out[eid] = self.e_in[eid] = self.e_props[eid] = None
+        self.edge_count -= 1
+
+    def _remove_vertex(self, vid: int):
+        for eid in list(self.v_out[vid].values()) + list(self.v_in[vid].values()):
+            if self.e_label[eid] is not None:
+                self._remove_edge(eid)
+        label, props = self.v_label[vid], self.v_props[vid]
+        for (index_label, key_property), index in self.indexes.items():
+            key = props.get(key_property)
+            if index_label == label and key is not None and index.get(key) == vid:
+                del index[key]
+        self.v_label[vid] = self.v_props[vid] = self.v_out[vid] = self.v_in[vid] = None
+        self.vertex_count -= 1
+
+    def _exists(self, vid) -> bool:
+        return isinstance(vid, int) and 0 <= vid < len(self.v_label) and self.v_label[vid] is not None
+
+    def _resolve(self, ref):
+        """Vertex id for an id or a VertexKey (None when the key is unknown)"""
+        if isinstance(ref, VertexKey):
+            return self._index(ref.label, ref.key_property).get(ref.key)
+        return ref
+
+    # --- lifecycle ---
+
+    def health(self) -> Dict:
+        return {'vertices': self.vertex_count, 'edges': self.edge_count}
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def count(self, labels: Labels = None, where: Optional[Dict] = None, at_least: Optional[Dict] = None) -> int:
+        with self._lock:
+            if labels is None and not where and not at_least:
+                return self.vertex_count
+            return sum(1 for vid in self._live(labels) if matches(self.v_props[vid], where, at_least))
+
+    # --- vertices ---
+
+    def upsert_vertices(self, label: str, key_property: str, records: List[Dict],
+                        on_create: Optional[Dict] = None) -> Dict[Hashable, object]:
+        ids = {}
+        with self._lock:
+            index = self._index(label, key_property)
+            for record in records:
+                key = record[key_property]
+                vid = index.get(key)
+                if vid is None:
+                    vid = len(self.v_label)
+                    self.v_label.append(label)
+                    self.v_props.append({key_property: key, **(on_create or {})})
+                    self.v_out.append({})
+                    self.v_in.append({})
+                    self.vertex_count += 1
+                    for (index_label, prop), other in self.indexes.items():
+                        value = self.v_props[vid].get(prop)
+                        if index_label == label and value is not None:
+                            other.setdefault(value, vid)
+                for name, value in record.items():
+                    if name != key_property and value is not None:
+                        self._set_property(vid, name, value)
+                ids[key] = vid
+        return ids
+
+    def lookup(self, label: str, key_property: str, keys: Optional[Iterable[Hashable]] = None) -> Dict[Hashable, object]:
+        with self._lock:
+            index = self._index(label, key_property)
+            if keys is None:
+                return dict(index)
+            return {key: index[key] for key in keys if key in index}
+
+    def get_vertex(self, label: str, key_property: str, key: Hashable) -> Optional[Dict]:
+        with self._lock:
+            vid = self._index(label, key_property).get(key)
+            return self._vertex(vid) if vid is not None else None
+
+    def vertices(self, labels: Labels = None, where: Optional[Dict] = None, at_least: Optional[Dict] = None,
+                 properties: Optional[List[str]] = None) -> List[Dict]:
+        with self._lock:
+            return [
+                self._vertex(vid, properties) for vid in self._live(labels)
+                if matches(self.v_props[vid], where, at_least)
+            ]
+
+    def drop_vertices(self, label: str, key_property: str, keys: Iterable[Hashable]) -> int:
+        with self._lock:
+            index = self._index(label, key_property)
+            return self.drop_vertex_ids([index[key] for key in set(keys) if key in index])
+
+    def drop_vertex_ids(self, ids: Iterable) -> int:
+        dropped = 0
+        with self._lock:
+            for vid in set(ids):
+                if self._exists(vid):
+                    self._remove_vertex(vid)
+                    dropped += 1
+        return dropped
+
+    # --- edges ---
+
+    def upsert_edges(self, label: str, edges: List[Tuple[object, object, Dict]]):
+        with self._lock:
+            for out_ref, in_ref, properties in edges:
+                out_id, in_id = self._resolve(out_ref), self._resolve(in_ref)
+                if not (self._exists(out_id) and self._exists(in_id)):
+                    continue
+                eid = self.v_out[out_id].get((label, in_id))
+                if eid is None:
+                    eid = len(self.e_label)
+                    self.e_label.append(label)
+                    self.e_out.append(out_id)
+                    self.e_in.append(in_id)
+                    self.e_props.append({})
+                    self.v_out[out_id][(label, in_id)] = eid
+                    self.v_in[in_id][(label, out_id)] = eid
+                    self.edge_count += 1
+                self.e_props[eid].update({k: v for k, v in (properties or {}).items() if v is not None})
+
+    def edges(self, labels: Labels = None) -> List[Dict]:
+        wanted = label_set(labels)
+        with self._lock:
+            return [
+                self._edge(eid) for eid, label in enumerate(self.e_label)
+                if label is not None and (wanted is None or label in wanted)
+            ]
+
+    def drop_edges(self, label: str, pairs: Iterable[Tuple[object, object]]) -> int:
+        dropped = 0
+        with self._lock:
+            for out_id, in_id in pairs:
+                if not self._exists(out_id):
+                    continue
+                eid = self.v_out[out_id].get((label, in_id))
+                if eid is not None:
+                    self._remove_edge(eid)
+                    dropped += 1
+        return dropped
+
+    def neighborhood(self, vertex_id, direction: str = 'out', edge_label: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            if not self._exists(vertex_id):
+                return []
+            result = []
+            if direction in ('out', 'both'):
+                for (label, other), eid in self.v_out[vertex_id].items():
+                    if edge_label is None or label == edge_label:
+                        result.append({'edge': self._edge(eid), 'vertex': self._vertex(other)})
+            if direction in ('in', 'both'):
+                for (label, other), eid in self.v_in[vertex_id].items():
+                    if edge_label is None or label == edge_label:
+                        result.append({'edge': self._edge(eid), 'vertex': self._vertex(other)})
+            return result
+
+    # --- aggregates and export ---
+
+    def aggregate(self, group_by: str, sum_of: Optional[str] = None, labels: Labels = None,
+                  where: Optional[Dict] = None) -> Dict[Hashable, float]:
+        totals: Dict[Hashable, float] = {}
+        with self._lock:
+            for vid in self._live(labels):
+                props = self.v_props[vid]
+                group = props.get(group_by)
+                if group is None or not matches(props, where):
+                    continue
+                if sum_of is None:
+                    totals[group] = totals.get(group, 0) + 1
+                elif props.get(sum_of) is not None:
+                    totals[group] = totals.get(group, 0) + props[sum_of]
+        return totals
+
+    def top_values(self, prop: str, n: int, labels: Labels = None) -> List[float]:
+        with self._lock:
+            values = (self.v_props[vid].get(prop) for vid in self._live(labels))
+            return heapq.nlargest(n, (v for v in values if v is not None))
+
+    def network_summary(self, whale_threshold: float, top_n: int) -> Dict:
+        groups: Dict[Hashable, int] = {}
+        validator_stakes = []
+        delegators = whales = 0
+        delegated = staked_btc = 0.0
+        with self._lock:
+            # One pass over the vertices (and their out-edges) for every aggregate
+            for vid in self._live():
+                label, props = self.v_label[vid], self.v_props[vid]
+                group = props.get('group')
+                if group is not None:
+                    groups[group] = groups.get(group, 0) + 1
+                    if label == 'Address' and props.get('btc_amount') is not None:
+                        staked_btc += props['btc_amount']
+                if label == 'Validator' and props.get('stake_cspr') is not None:
+                    validator_stakes.append(props['stake_cspr'])
+                elif label == 'Address':
+                    stakes = [
+                        self.e_props[eid].get('stake_cspr') for (edge_label, _), eid in self.v_out[vid].items()
+                        if edge_label == 'DELEGATED_TO'
+                    ]
+                    if not stakes:
+                        continue
+                    stakes = [stake for stake in stakes if stake is not None]
+                    delegators += 1
+                    whales += any(stake >= whale_threshold for stake in stakes)
+                    delegated += sum(stakes)
+        return {
+            'groups': groups,
+            'validator_stake': sum(validator_stakes),
+            'top_stakes': heapq.nlargest(top_n, validator_stakes),
+            'delegator_count': delegators,
+            'whale_count': whales,
+            'delegated_stake': delegated,
+            'staked_btc': staked_btc,
+        }
+
+    def sum_along(self, path: Sequence[Tuple[str, str]], sum_of: str, labels: Labels = None,
+                  where: Optional[Dict] = None, end_where: Optional[Dict] = None,
+                  key_property: Optional[str] = None) -> Dict[Hashable, float]:
+        sums: Dict[Hashable, float] = {}
+        with self._lock:
+            for vid in self._live(labels):
+                props = self.v_props[vid]
+                if not matches(props, where) or (key_property and key_property not in props):
+                    continue
+                # Walk path by path, so a vertex reached twice counts twice (as in Gremlin)
+                frontier = [vid]
+                for direction, edge_label in path:
+                    frontier = [
+                        other for current in frontier
+                        for adjacency in self._adjacency(current, direction)
+                        for (label, other) in adjacency
+                        if label == edge_label
+                    ]
+                total = 0
+                for end in frontier:
+                    end_props = self.v_props[end]
+                    if matches(end_props, end_where) and end_props.get(sum_of) is not None:
+                        total += end_props[sum_of]
+                # Start vertices sharing a key are summed together, as Gremlin's group() does
+                key = props[key_property] if key_property else vid
+                sums[key] = sums.get(key, 0) + total
+        return sums
+
+    def _adjacency(self, vid: int, direction: str) -> List[Dict]:
+        if direction == 'out':
+            return [self.v_out[vid]]
+        if direction == 'in':
+            return [self.v_in[vid]]
+        return [self.v_out[vid], self.v_in[vid]]
+
+    def export_page(self, after=None, limit: int = 1000, groups: Optional[List[str]] = None,
+                    min_stake: Optional[float] = None, properties: Optional[List[str]] = None) -> Tuple[List[Dict], bool]:
+        wanted = set(groups) if groups else None
+        rows = []
+        with self._lock:
+            # Ids are array positions, so scanning from `after` walks vertices in id order
+            start = 0 if after is None else int(after) + 1
+            for vid in range(start, len(self.v_label)):
+                if self.v_label[vid] is None:
+                    continue
+                props = self.v_props[vid]
+                if 'group' not in props or (wanted is not None and props['group'] not in wanted):
+                    continue
+                if min_stake is not None and (props.get('stake_cspr') is None or props['stake_cspr'] < min_stake):
+                    continue
+                if len(rows) == limit:
+                    return rows, True
+                rows.append({
+                    'vertex': self._vertex(vid, properties),
+                    'out': [
+                        {'label': label, 'target': self._vertex(other, properties)}
+                        for (label, other) in self.v_out[vid]
+                    ],
+                })
+        return rows, False
@@ -0,0 +1,185 @@
+"""
+Incrementally maintained network-metrics view for CasperEye.
+The ingester applies per-cycle deltas to running aggregates and publishes
+them as one summary record, so /api/metrics reads a single vertex.
+"""
+import heapq
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from graph_metrics import WHALE_THRESHOLD_CSPR, CONCENTRATION_TOP_N, PROVIDER_GROUPS
+
+logger = logging.getLogger("MetricsView")
+
+SUMMARY_LABEL = 'MetricsSummary'
+SUMMARY_NAME = 'network'
+
+
+class NetworkMetricsView:
+    """Running aggregates over validators and delegators, updated from deltas"""
+
+    def __init__(self, whale_threshold: float = WHALE_THRESHOLD_CSPR, top_n: int = CONCENTRATION_TOP_N):
+        self.whale_threshold = whale_threshold
+        self.top_n = top_n
+        self._reset()
+
+    def _reset(self):
+        self.validators = {}  # public_key -> stake_cspr
+        self.delegators = {}  # delegator public_key -> {validator public_key: (stake_cspr, group)}
+        self.chains = set()
+        self.groups = {}  # Vertex count per group, across every ingester
+        self.total_stake = 0.0
+        self.delegated_stake = 0.0
+        self.whale_count = 0
+        self.staked_btc = 0.0
+        self.dirty = True
+
+    def set_chain(self, name: str):
+        if name not in self.chains:
+            self.chains.add(name)
+            self.dirty = True
+
+    def set_validator(self, public_key: str, stake_cspr: float):
+        old = self.validators.get(public_key)
+        if old == stake_cspr:
+            return
+        if old is None:
+            old = 0.0
+        self.validators[public_key] = stake_cspr
+        self.total_stake += stake_cspr - old
+        self.dirty = True
+
+    def remove_validator(self, public_key: str):
+        old = self.validators.pop(public_key, None)
+        if old is None:
+            return
+        self.total_stake -= old
+        self.dirty = True
+
+    @staticmethod
+    def _delegator_group(delegations: Dict) -> Optional[str]:
+        """A delegator counts as a whale if any of its delegations is whale-sized"""
+        if not delegations:
+            return None
+        groups = {group for _, group in delegations.values()}
+        return 'Whale' if 'Whale' in groups else min(groups)
+
+    def _regroup(self, public_key: str, before: Optional[str]):
+        after = self._delegator_group(self.delegators.get(public_key))
+        self.whale_count += (after == 'Whale') - (before == 'Whale')
+
+    def set_delegation(self, delegator: str, validator: str, stake_cspr: float, group: Optional[str] = None):
+        """Records one (delegator, validator) delegation; a delegator may delegate to several validators"""
+        delegations = self.delegators.setdefault(delegator, {})
+        old = delegations.get(validator)
+        group = group or ('Whale' if stake_cspr >= self.whale_threshold else 'Delegator')
+        if old == (stake_cspr, group):
+            return
+        before = self._delegator_group(delegations)
+        if old is not None:
+            self.delegated_stake -= old[0]
+        delegations[validator] = (stake_cspr, group)
+        self.delegated_stake += stake_cspr
+        self._regroup(delegator, before)
+        self.dirty = True
+
+    def remove_delegation(self, delegator: str, validator: str):
+        delegations = self.delegators.get(delegator)
+        if not delegations or validator not in delegations:
+            return
+        before = self._delegator_group(delegations)
+        stake, _ = delegations.pop(validator)
+        self.delegated_stake -= stake
+        if not delegations:
+            del self.delegators[delegator]
+        self._regroup(delegator, before)
+        self.dirty = True
+
+    def delegator_totals(self, delegator: str, pending: Optional[Dict] = None) -> Tuple[float, Optional[str]]:
+        """Total stake and group of a delegator over all its delegations, with `pending`
+        ({validator: (stake_cspr, group)}) applied on top of what the view holds"""
+        delegations = {**self.delegators.get(delegator, {}), **(pending or {})}
+        return sum(stake for stake, _ in delegations.values()), self._delegator_group(delegations)
+
+    def refresh_network(self, repo):
+        """Takes group counts and staked BTC, which the Babylon ingester also writes, from the
+        same aggregate GraphMetricsEngine uses"""
+        network = repo.network_summary(self.whale_threshold, self.top_n)
+        groups = {str(k): int(v) for k, v in network['groups'].items() if v > 0}
+        staked_btc = float(network['staked_btc'])
+        if (groups, staked_btc) != (self.groups, self.staked_btc):
+            self.groups, self.staked_btc = groups, staked_btc
+            self.dirty = True
+
+    def summary(self) -> Dict:
+        """Same shape as GraphMetricsEngine.fetch; delegator figures come from the delegation
+        stakes, as the engine takes them from the DELEGATED_TO edges"""
+        groups = dict(self.groups)
+        top_stake = sum(heapq.nlargest(self.top_n, self.validators.values()))
+        total = self.total_stake
+
+        return {
+            'groups': groups,
+            'validator_count': len(self.validators),
+            'delegator_count': len(self.delegators),
+            'provider_count': sum(groups.get(k, 0) for k in PROVIDER_GROUPS),
+            'chain_count': len(self.chains),
+            'whale_count': self.whale_count,
+            'total_stake_cspr': total,
+            'delegated_stake_cspr': self.delegated_stake,
+            'top_n': self.top_n,
+            'top_n_share': top_stake / total if total > 0 else 0.0,
+            'staked_btc': self.staked_btc,
+        }
+
+    def load(self, repo):
+        """Seeds the aggregates from the graph (startup, or after the graph was lost)"""
+        rows = repo.vertices(('Chain', 'Validator', 'Address'),
+                             properties=['public_key', 'name', 'group', 'stake_cspr'])
+
+        self._reset()
+        keys = {}
+        for row in rows:
+            props = row['properties']
+            key = props.get('public_key') or props.get('name')
+            if not key:
+                continue
+            keys[row['id']] = key
+            if 'group' not in props:
+                continue
+            if row['label'] == 'Chain':
+                self.set_chain(key)
+            elif row['label'] == 'Validator':
+                self.set_validator(key, float(props.get('stake_cspr') or 0))
+        # Delegations live on the DELEGATED_TO edges, one per (delegator, validator) pair
+        edges = repo.edges('DELEGATED_TO')
+        for edge in edges:
+            if edge['out'] in keys and edge['in'] in keys:
+                self.set_delegation(keys[edge['out']], keys[edge['in']],
+                                    float(edge['properties'].get('stake_cspr') or 0))
+        self.refresh_network(repo)
+        logger.info(f"📊 Metrics view seeded from {len(rows)} vertices, {len(edges)} delegations")
+
+    def publish(self, repo, force: bool = False):
+        """Writes the summary record if anything changed since the last publish"""
+        self.refresh_network(repo)
+        if not self.dirty and not force:
+            return
+        repo.upsert_vertices(SUMMARY_LABEL, 'name', [{
+            'name': SUMMARY_NAME,
+            'payload': json.dumps(self.summary()),
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+        }])
+        self.dirty = False
+        logger.info("📊 Published network metrics summary")
+
+
+def read_metrics_summary(repo) -> Optional[Dict]:
+    """Reads the published summary record, None if the ingester has not written one"""
+    record = repo.get_vertex(SUMMARY_LABEL, 'name', SUMMARY_NAME)
+    if not record or 'payload' not in record['properties']:
+        return None
+    return json.loads(record['properties']['payload'])
+
@@ -1,47 +1,49 @@
 import requests
 import json
-from gremlin_python.driver import client
 import os
+from graph_repository import create_repository
+
+# Default smart-money floor per consumer chain, in BTC
+RISK_THRESHOLD_BTC = float(os.getenv("RISK_THRESHOLD_BTC", 100))
+# Per-chain overrides as JSON, e.g. {"osmosis": 150, "neutron": 50}
+CHAIN_RISK_THRESHOLDS = json.loads(os.getenv("CHAIN_RISK_THRESHOLDS", "{}"))
 
 class RiskMonitor:
-    def __init__(self):
-        self.gremlin_client = client.Client(os.getenv("GREMLIN_ENDPOINT", "ws://localhost:8182/gremlin"), 'g')
-        self.risk_threshold = 100  # BTC
+    def __init__(self, repo=None, thresholds=None, default_threshold=RISK_THRESHOLD_BTC):
+        self.repo = repo or create_repository(endpoint=os.getenv("GREMLIN_ENDPOINT", "ws://localhost:8182/gremlin"))
+        self.risk_threshold = default_threshold  # BTC
+        self.thresholds = {**CHAIN_RISK_THRESHOLDS, **(thresholds or {})}
+    
+    def threshold_for(self, chain_id):
+        return float(self.thresholds.get(chain_id, self.risk_threshold))
         
     def check_chain_risks(self):
         alerts = []
         
-        # Get all consumer chains
-        chains_query = "g.V().has('type', 'ConsumerChain').valueMap(true)"
-        chains = self.gremlin_client.submit(chains_query).all().result()
+        # Smart money behind every consumer chain in one grouped query:
+        # chain <-SECURES- provider <-STAKED_WITH- smart money address
+        try:
+            smart_money = self.repo.sum_along(
+                path=[('in', 'SECURES'), ('in', 'STAKED_WITH')],
+                sum_of='amount',
+                where={'type': 'ConsumerChain'},
+                end_where={'label': 'Smart Money'},
+                key_property='id',
+            )
+        except Exception as e:
+            print(f"Error checking chain risks: {e}")
+            return alerts
         
-        for chain in chains:
-            chain_id = chain.get('id', ['unknown'])[0]
-            
-            # Calculate smart money exposure
-            smart_money_query = f"""
-            g.V().has('type', 'ConsumerChain').has('id', '{chain_id}')
-             .in('SECURES')
-             .in('STAKED_WITH')
-             .has('label', 'Smart Money')
-             .values('amount')
-             .sum()
-            """
-            
-            try:
-                result = self.gremlin_client.submit(smart_money_query).all().result()
-                total_smart_money = result[0] if result else 0
-                
-                if total_smart_money < self.risk_threshold:
-                    alerts.append({
-                        "chain_id": chain_id,
-                        "risk_level": "CRITICAL",
-                        "smart_money_btc": total_smart_money,
-                        "threshold": self.risk_threshold,
-                        "message": f"Chain {chain_id} has insufficient smart money backing"
-                    })
-            except Exception as e:
-                print(f"Error checking {chain_id}: {e}")
+        for chain_id, total_smart_money in smart_money.items():
+            threshold = self.threshold_for(chain_id)
+            if total_smart_money < threshold:
+                alerts.append({
+                    "chain_id": chain_id,
+                    "risk_level": "CRITICAL",
+                    "smart_money_btc": total_smart_money,
+                    "threshold": threshold,
+                    "message": f"Chain {chain_id} has insufficient smart money backing"
+                })
         
         return alerts
     
@@ -65,17 +67,9 @@ class RiskMonitor:
         return alerts
 
 def lambda_handler(event, context):
-    """AWS Lambda entry point"""
-    monitor = RiskMonitor()
-    alerts = monitor.run_check()
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps({
-            'alerts_count': len(alerts),
-            'alerts': alerts
-        })
-    }
+    """AWS Lambda entry point; reuses one monitor across warm invocations"""
+    import monitor_lambda
+    return monitor_lambda.lambda_handler(event, context)
 
 if __name__ == "__main__":
     monitor = RiskMonitor()
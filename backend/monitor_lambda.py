@@ -0,0 +1,136 @@
+"""
+AWS Lambda entry point for the CasperEye risk monitor.
+The monitor and its Gremlin connection are created on first use and kept at
+module level, so warm invocations reuse one liveness-probed connection instead
+of opening (and leaking) a client per call. Run this file to compare cold and
+warm latency locally.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict
+
+logger = logging.getLogger("MonitorLambda")
+
+# Upper bound on one invocation's risk check; the Lambda's remaining time caps it further
+MONITOR_DEADLINE = float(os.getenv("MONITOR_DEADLINE", 10))
+# Reserved for serializing the response before Lambda's own timeout
+DEADLINE_MARGIN = 0.5
+# A connection idle longer than this (e.g. across a frozen container) is probed before use
+MONITOR_PROBE_AFTER = float(os.getenv("MONITOR_PROBE_AFTER", 5))
+
+_monitor = None
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="risk-check")
+
+
+def _create_monitor():
+    # Imported here so a cold start only pays for what the first invocation uses
+    from graph_repository import GRAPH_BACKEND, create_repository
+    from monitor import RiskMonitor
+
+    endpoint = os.getenv("GREMLIN_ENDPOINT", "ws://localhost:8182/gremlin")
+    if GRAPH_BACKEND == 'gremlin':
+        from gremlin_pool import GremlinPool
+        from gremlin_repository import GremlinRepository
+        # One invocation at a time per container, so one connection is enough
+        pool = GremlinPool(endpoint, size=1, probe_after=MONITOR_PROBE_AFTER)
+        return RiskMonitor(repo=GremlinRepository(pool=pool, endpoint=endpoint))
+    return RiskMonitor(repo=create_repository())
+
+
+def get_monitor():
+    """The container's RiskMonitor, created on the first invocation"""
+    global _monitor
+    with _lock:
+        if _monitor is None:
+            _monitor = _create_monitor()
+        return _monitor
+
+
+def reset_monitor(close: bool = True):
+    """Drops the cached monitor so the next invocation reconnects"""
+    global _monitor
+    with _lock:
+        monitor, _monitor = _monitor, None
+    if monitor is not None and close:
+        try:
+            monitor.repo.close()
+        except Exception as e:
+            logger.debug(f"Closing monitor repository: {e}")
+
+
+def _deadline(context) -> float:
+    deadline = MONITOR_DEADLINE
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        deadline = min(deadline, context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN)
+    return max(0.1, deadline)
+
+
+def _check():
+    return get_monitor().run_check()
+
+
+def lambda_handler(event, context):
+    """AWS Lambda entry point"""
+    global _executor
+    started = time.perf_counter()
+    cold_start = _monitor is None
+    deadline = _deadline(context)
+
+    future = _executor.submit(_check)
+    try:
+        alerts = future.result(timeout=deadline)
+    except FutureTimeout:
+        # The stuck check keeps its worker and connection; start clean next time
+        logger.warning(f"⏱️  Risk check exceeded its {deadline:.1f}s deadline")
+        reset_monitor(close=False)
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="risk-check")
+        return {
+            'statusCode': 504,
+            'body': json.dumps({
+                'error': f"Risk check exceeded {deadline:.1f}s deadline",
+                'cold_start': cold_start,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+            })
+        }
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'alerts_count': len(alerts),
+            'alerts': alerts,
+            'cold_start': cold_start,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        })
+    }
+
+
+def measure(invocations: int = 10) -> Dict:
+    """Invokes the handler repeatedly in this process; the first call is the cold start"""
+    timings = []
+    for _ in range(invocations):
+        started = time.perf_counter()
+        response = lambda_handler({}, None)
+        timings.append((time.perf_counter() - started) * 1000)
+        if response['statusCode'] != 200:
+            print(f"Invocation failed: {response['body']}")
+    warm = sorted(timings[1:])
+    return {
+        'cold_ms': round(timings[0], 1),
+        'warm_p50_ms': round(warm[len(warm) // 2], 1) if warm else None,
+        'warm_max_ms': round(warm[-1], 1) if warm else None,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure cold-start vs warm latency of the monitor handler")
+    parser.add_argument("--invocations", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.invocations), indent=2))
+    reset_monitor()
@@ -1,19 +1,20 @@
 import os
 import requests
 import logging
-from datetime import datetime, timedelta
+import time
+import http_client
+import json_stream
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
-import time
+from market_cache import market_cache
+from apy_series import RingSeries, downsample
 
 load_dotenv()
 
 logger = logging.getLogger("RestakingArbitrage")
 
-# Cache for API responses (5 minute TTL)
-_api_cache = {}
-_cache_ttl = 300  # 5 minutes
-
 # Protocol configurations - Real data sources
 PROTOCOLS = {
     'babylon': {
@@ -42,25 +43,70 @@ GAS_FEES = {
     'cross_protocol': 0.0002,  # ~$6 for cross-protocol
 }
 
-def _get_cached(key: str, fetch_fn, ttl: int = _cache_ttl):
-    """Get cached value or fetch new one if expired"""
-    now = time.time()
-    if key in _api_cache:
-        value, timestamp = _api_cache[key]
-        if now - timestamp < ttl:
-            return value
-    
-    # Fetch new value
-    value = fetch_fn()
-    _api_cache[key] = (value, now)
-    return value
+# Upper bound on fetching every protocol's APY; slower sources use their last known value
+OPPORTUNITY_DEADLINE = float(os.getenv("OPPORTUNITY_DEADLINE", 3.5))
+
+# Shared by all bots; each protocol fetch runs on its own worker
+_protocol_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PROTOCOL_FETCH_WORKERS", 8)), thread_name_prefix="protocol-fetch"
+)
+
+def _babylon_params() -> Dict:
+    url = 'https://babylon-testnet-api.polkachu.com/babylon/btcstaking/v1/params'
+    return http_client.get(url, deadline=1).json()
+
+
+def _babylon_staked_btc() -> float:
+    """Total BTC staked with Babylon finality providers"""
+    url = 'https://babylon-testnet-api.polkachu.com/babylon/btcstaking/v1/finality_providers'
+    providers = http_client.get(url, deadline=3).json().get('finality_providers', [])
+    # Each provider has staked amount in satoshis
+    return sum(float(provider.get('total_staked', 0)) / 100000000 for provider in providers)
+
+
+def _llama_babylon_pools(deadline: float = 3) -> List[Dict]:
+    """Babylon staking pools from the (multi-megabyte) DefiLlama /pools listing.
+
+    The body is streamed and filtered pool by pool, so only the qualifying
+    pools are ever held, and the APY and TVL paths share that small result.
+    """
+    expires = time.monotonic() + deadline
+    response = http_client.get('https://yields.llama.fi/pools', deadline=deadline, stream=True)
+    pools = []
+    try:
+        response.raise_for_status()
+        for pool in json_stream.iter_array(response.iter_content(chunk_size=64 * 1024), 'data'):
+            if time.monotonic() > expires:
+                raise http_client.DeadlineExceeded(f"Reading DefiLlama pools exceeded its {deadline}s deadline")
+            symbol = (pool.get('symbol') or '').lower()
+            # Look for actual staking/LST pools, not LP pairs
+            if ('babylon' in symbol or 'bbtc' in symbol) and 'lido' not in symbol:
+                apy = float(pool.get('apy') or 0)
+                tvl_usd = float(pool.get('tvlUsd') or 0)
+                # Filter: reasonable APY (5-50%), meaningful TVL (>$50k)
+                if 5 <= apy <= 50 and tvl_usd > 50000:
+                    pools.append({'apy': apy, 'tvl_usd': tvl_usd})
+    finally:
+        response.close()
+    return pools
+
+
+def _coingecko_btc_price() -> float:
+    url = 'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_market_cap=true'
+    return float(http_client.get(url, deadline=3).json().get('bitcoin', {}).get('usd', 0))
+
+
+def _coingecko_btc_market_cap() -> float:
+    response = http_client.get('https://api.coingecko.com/api/v3/global', deadline=3).json()
+    return float(response.get('data', {}).get('btc_market_cap', {}).get('usd', 0))
 
 
 class RestakingArbitrageBot:
     """AI agent that detects restaking arbitrage opportunities"""
     
     def __init__(self):
-        self.apy_history = {}  # Store historical APY data
+        self.apy_history: Dict[str, RingSeries] = {}  # Bounded APY history per protocol
+        self.last_apys: Dict[str, float] = {}  # Last fetched APY per protocol
         self.opportunities = []
         logger.info("🤖 Restaking Arbitrage Bot initialized")
     
@@ -69,9 +115,8 @@ class RestakingArbitrageBot:
         try:
             if protocol == 'babylon':
                 # Fetch from Babylon testnet API with short timeout
-                url = 'https://babylon-testnet-api.polkachu.com/babylon/btcstaking/v1/params'
                 try:
-                    response = requests.get(url, timeout=1).json()
+                    response = market_cache.get('babylon:params', _babylon_params)
                     apy = float(response.get('params', {}).get('min_staking_rate', 0)) * 100
                     if apy == 0:
                         apy = 5.5
@@ -86,28 +131,12 @@ class RestakingArbitrageBot:
             
             elif protocol == 'defilama_babylon':
                 # Fetch from DefiLlama - Babylon LST pools
-                url = 'https://yields.llama.fi/pools'
                 try:
-                    response = requests.get(url, timeout=3).json()
+                    pools = market_cache.get('defillama:babylon_pools', _llama_babylon_pools)
                 except requests.exceptions.Timeout:
                     logger.warning(f"DefiLlama API timeout, using fallback")
                     return 5.2
-                pools = response.get('data', [])
-                
-                # Find Babylon-related staking pools (filter out LP yields)
-                babylon_apys = []
-                for pool in pools:
-                    symbol = pool.get('symbol', '').lower()
-                    project = pool.get('project', '').lower()
-                    
-                    # Look for actual staking/LST pools, not LP pairs
-                    if ('babylon' in symbol or 'bbtc' in symbol) and 'lido' not in symbol:
-                        apy = float(pool.get('apy', 0))
-                        tvl = float(pool.get('tvlUsd', 0))
-                        
-                        # Filter: reasonable APY (5-50%), meaningful TVL (>$50k)
-                        if 5 <= apy <= 50 and tvl > 50000:
-                            babylon_apys.append(apy)
+                babylon_apys = [pool['apy'] for pool in pools]
                 
                 if babylon_apys:
                     avg_apy = sum(babylon_apys) / len(babylon_apys)
@@ -120,13 +149,11 @@ class RestakingArbitrageBot:
             
             elif protocol == 'coingecko':
                 # Fetch market data from CoinGecko
-                url = 'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd&include_market_cap=true'
                 try:
-                    response = requests.get(url, timeout=3).json()
+                    btc_price = market_cache.get('coingecko:price', _coingecko_btc_price)
                 except requests.exceptions.Timeout:
                     logger.warning(f"CoinGecko API timeout, using fallback")
                     return 5.0
-                btc_price = response.get('bitcoin', {}).get('usd', 0)
                 logger.info(f"📊 BTC Price (real): ${btc_price}")
                 # Return a derived APY based on market conditions
                 return 5.0
@@ -152,44 +179,25 @@ class RestakingArbitrageBot:
         try:
             if protocol == 'babylon':
                 # Fetch from Babylon testnet API
-                url = 'https://babylon-testnet-api.polkachu.com/babylon/btcstaking/v1/finality_providers'
                 try:
-                    response = requests.get(url, timeout=3).json()
+                    total_tvl = market_cache.get('babylon:finality_providers', _babylon_staked_btc)
                 except requests.exceptions.Timeout:
                     logger.warning(f"Babylon TVL API timeout, using fallback")
                     return 2100.0
-                providers = response.get('finality_providers', [])
-                
-                # Calculate total TVL from all providers
-                total_tvl = 0
-                for provider in providers:
-                    # Each provider has staked amount
-                    staked = float(provider.get('total_staked', 0)) / 100000000  # Convert satoshis to BTC
-                    total_tvl += staked
                 
                 logger.info(f"💰 Babylon TVL (real): {total_tvl} BTC")
                 return total_tvl if total_tvl > 0 else 2100.0
             
             elif protocol == 'defilama_babylon':
-                # Fetch from DefiLlama
-                url = 'https://yields.llama.fi/pools'
+                # Same parsed DefiLlama pools as the APY path
                 try:
-                    response = requests.get(url, timeout=3).json()
+                    pools = market_cache.get('defillama:babylon_pools', _llama_babylon_pools)
                 except requests.exceptions.Timeout:
                     logger.warning(f"DefiLlama TVL API timeout, using fallback")
                     return 1250.0
-                pools = response.get('data', [])
                 
                 # Sum TVL of reasonable Babylon staking pools
-                total_tvl_usd = 0
-                for pool in pools:
-                    symbol = pool.get('symbol', '').lower()
-                    apy = float(pool.get('apy', 0))
-                    tvl_usd = float(pool.get('tvlUsd', 0))
-                    
-                    # Filter for staking pools with reasonable APY
-                    if ('babylon' in symbol or 'bbtc' in symbol) and 5 <= apy <= 50 and tvl_usd > 50000:
-                        total_tvl_usd += tvl_usd
+                total_tvl_usd = sum(pool['tvl_usd'] for pool in pools)
                 
                 # Convert to BTC (using $82,000 as reference)
                 btc_price = 82000
@@ -200,13 +208,11 @@ class RestakingArbitrageBot:
             
             elif protocol == 'coingecko':
                 # Fetch global market cap
-                url = 'https://api.coingecko.com/api/v3/global'
                 try:
-                    response = requests.get(url, timeout=3).json()
+                    btc_market_cap = market_cache.get('coingecko:global', _coingecko_btc_market_cap)
                 except requests.exceptions.Timeout:
                     logger.warning(f"CoinGecko global API timeout, using fallback")
                     return 21000000
-                btc_market_cap = response.get('data', {}).get('btc_market_cap', {}).get('usd', 0)
                 logger.info(f"💰 BTC Market Cap (real): ${btc_market_cap}")
                 return 21000000  # Total BTC supply
             
@@ -226,6 +232,32 @@ class RestakingArbitrageBot:
         }
         return mock_data.get(protocol, 1000.0)
     
+    def fetch_all_apys(self, deadline: float = OPPORTUNITY_DEADLINE) -> Dict[str, float]:
+        """Fetch every protocol's APY concurrently, waiting at most `deadline` seconds
+
+        A protocol that misses the deadline gets its last known APY (mock data before
+        its first fetch); its fetch keeps running and updates last_apys when it lands.
+        """
+        futures = {}
+        for protocol in PROTOCOLS.keys():
+            future = _protocol_pool.submit(self.fetch_protocol_apy, protocol)
+            future.add_done_callback(lambda f, protocol=protocol: self._record_apy(protocol, f))
+            futures[future] = protocol
+        wait(futures, timeout=deadline)
+
+        apys = {}
+        for future, protocol in futures.items():
+            if future.done() and future.exception() is None and future.result() is not None:
+                apys[protocol] = future.result()
+            else:
+                apys[protocol] = self.last_apys.get(protocol, self._get_mock_apy(protocol))
+                logger.warning(f"⏱️  {protocol} APY not ready within {deadline}s, using {apys[protocol]}")
+        return apys
+
+    def _record_apy(self, protocol: str, future):
+        if future.exception() is None and future.result() is not None:
+            self.last_apys[protocol] = future.result()
+
     def calculate_gas_fees(self, amount_btc: float, cross_protocol: bool = True) -> float:
         """Calculate estimated gas fees"""
         if cross_protocol:
@@ -237,19 +269,15 @@ class RestakingArbitrageBot:
         opportunities = []
         
         # Fetch current APYs
-        apys = {}
-        for protocol in PROTOCOLS.keys():
-            apys[protocol] = self.fetch_protocol_apy(protocol)
+        apys = self.fetch_all_apys()
         
         # Store in history
-        timestamp = datetime.now().isoformat()
+        now = time.time()
+        timestamp = datetime.fromtimestamp(now).isoformat()
         for protocol, apy in apys.items():
             if protocol not in self.apy_history:
-                self.apy_history[protocol] = []
-            self.apy_history[protocol].append({
-                'timestamp': timestamp,
-                'apy': apy
-            })
+                self.apy_history[protocol] = RingSeries()
+            self.apy_history[protocol].append(int(now), apy)
         
         # Find opportunities (APY differential > gas fees)
         protocols_list = list(PROTOCOLS.keys())
@@ -305,20 +333,27 @@ class RestakingArbitrageBot:
         )
         return sorted_opps[:limit]
     
-    def get_apy_history(self, protocol: str, hours: int = 24) -> List[Dict]:
-        """Get APY history for a protocol"""
-        if protocol not in self.apy_history:
+    def get_apy_history(self, protocol: str, hours: float = 24, points: Optional[int] = None,
+                        method: str = 'lttb') -> List[Dict]:
+        """Get APY history for a protocol, optionally downsampled to `points` samples"""
+        series = self.apy_history.get(protocol)
+        if series is None:
             return []
         
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        history = []
-        
-        for entry in self.apy_history[protocol]:
-            entry_time = datetime.fromisoformat(entry['timestamp'])
-            if entry_time >= cutoff_time:
-                history.append(entry)
-        
-        return history
+        timestamps, apys = series.range(start=int(time.time() - hours * 3600))
+        timestamps, apys = downsample(timestamps, apys, points, method)
+        return [
+            {'timestamp': datetime.fromtimestamp(ts).isoformat(), 'apy': apy}
+            for ts, apy in zip(timestamps, apys)
+        ]
+    
+    def get_all_apy_history(self, hours: float = 24, points: Optional[int] = None,
+                            method: str = 'lttb') -> Dict[str, List[Dict]]:
+        """APY history of every monitored protocol"""
+        return {
+            protocol: self.get_apy_history(protocol, hours=hours, points=points, method=method)
+            for protocol in PROTOCOLS
+        }
     
     def get_performance_metrics(self) -> Dict:
         """Get overall performance metrics"""
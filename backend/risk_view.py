@@ -0,0 +1,148 @@
+"""
+Materialized per-validator risk view for CasperEye.
+The ingester scores every validator once per cycle (stake share, whale
+exposure, delegation concentration) and publishes one RiskView vertex per
+validator, so /api/risk-analysis only sorts and filters a ready-made list and
+no single write grows with the validator set.
+"""
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from graph_metrics import delegator_totals
+
+logger = logging.getLogger("RiskView")
+
+RISK_VIEW_LABEL = 'RiskView'
+ROW_FIELDS = ('validator', 'public_key', 'stake_cspr', 'stake_share', 'delegated_cspr', 'delegator_count',
+              'whale_stake_cspr', 'whale_exposure', 'delegation_hhi', 'risk_score', 'risk')
+
+# Stake share at which a validator gets the full stake-share penalty
+STAKE_SHARE_CRITICAL = float(os.getenv("RISK_STAKE_SHARE_CRITICAL", 0.10))
+RISK_CRITICAL = float(os.getenv("RISK_CRITICAL_SCORE", 7.0))
+RISK_MODERATE = float(os.getenv("RISK_MODERATE_SCORE", 4.0))
+
+SORT_KEYS = ('risk_score', 'stake_share', 'whale_exposure', 'delegation_hhi',
+             'stake_cspr', 'delegated_cspr', 'whale_stake_cspr', 'delegator_count', 'validator')
+RISK_LEVELS = ('CRITICAL', 'MODERATE', 'SAFE')
+
+
+def risk_level(score: float) -> str:
+    if score >= RISK_CRITICAL:
+        return 'CRITICAL'
+    if score >= RISK_MODERATE:
+        return 'MODERATE'
+    return 'SAFE'
+
+
+def compute_validator_risk(repo) -> List[Dict]:
+    """Scores every validator from its stake and DELEGATED_TO edges, riskiest first
+
+    risk_score (0-10) = 4 * stake share (relative to STAKE_SHARE_CRITICAL)
+                      + 3 * whale exposure (whale share of delegated stake)
+                      + 3 * delegation HHI (concentration among its delegators)
+    """
+    validators = repo.vertices('Validator', properties=['public_key', 'name', 'stake_cspr'])
+    edges = repo.edges('DELEGATED_TO')
+    # A delegator is a whale if any one of its delegations is whale-sized
+    whales = {delegator for delegator, (_, whale) in delegator_totals(edges).items() if whale}
+    delegations: Dict[object, List] = {}
+    for edge in edges:
+        stake = float(edge['properties'].get('stake_cspr') or 0)
+        if stake > 0:
+            delegations.setdefault(edge['in'], []).append((stake, edge['out'] in whales))
+
+    total_stake = sum(float(v['properties'].get('stake_cspr') or 0) for v in validators)
+    rows = []
+    for validator in validators:
+        props = validator['properties']
+        stake = float(props.get('stake_cspr') or 0)
+        stakes = delegations.get(validator['id'], [])
+        delegated = sum(s for s, _ in stakes)
+        whale_stake = sum(s for s, whale in stakes if whale)
+
+        stake_share = stake / total_stake if total_stake > 0 else 0.0
+        whale_exposure = whale_stake / delegated if delegated > 0 else 0.0
+        hhi = sum((s / delegated) ** 2 for s, _ in stakes) if delegated > 0 else 0.0
+        score = 4 * min(1.0, stake_share / STAKE_SHARE_CRITICAL) + 3 * whale_exposure + 3 * hhi
+        score = round(max(0.0, min(10.0, score)), 2)
+
+        rows.append({
+            'validator': props.get('name') or props.get('public_key', ''),
+            'public_key': props.get('public_key'),
+            'stake_cspr': round(stake, 2),
+            'stake_share': round(stake_share, 4),
+            'delegated_cspr': round(delegated, 2),
+            'delegator_count': len(stakes),
+            'whale_stake_cspr': round(whale_stake, 2),
+            'whale_exposure': round(whale_exposure, 4),
+            'delegation_hhi': round(hhi, 4),
+            'risk_score': score,
+            'risk': risk_level(score),
+        })
+    rows.sort(key=lambda row: row['risk_score'], reverse=True)
+    return rows
+
+
+def publish_risk_view(repo, rows: Optional[List[Dict]] = None) -> List[Dict]:
+    """Computes (unless given) and writes one RiskView vertex per validator, dropping stale ones"""
+    if rows is None:
+        rows = compute_validator_risk(repo)
+    updated_at = datetime.now(timezone.utc).isoformat()
+    repo.upsert_vertices(RISK_VIEW_LABEL, 'public_key', [
+        {**row, 'updated_at': updated_at} for row in rows if row.get('public_key')
+    ])
+    stale = set(repo.lookup(RISK_VIEW_LABEL, 'public_key')) - {row.get('public_key') for row in rows}
+    if stale:
+        repo.drop_vertices(RISK_VIEW_LABEL, 'public_key', stale)
+    logger.info(f"🛡️  Published risk view for {len(rows)} validators")
+    return rows
+
+
+def read_risk_view(repo) -> Optional[List[Dict]]:
+    """Reads the published risk view riskiest first, None if the ingester has not written one"""
+    records = repo.vertices(RISK_VIEW_LABEL, properties=list(ROW_FIELDS))
+    if not records:
+        return None
+    rows = [record['properties'] for record in records]
+    rows.sort(key=lambda row: row.get('risk_score', 0), reverse=True)
+    return rows
+
+
+_graph_repo = None
+
+
+def read_risks() -> Optional[List[Dict]]:
+    """Risk view for the standalone servers, from GRAPH_BACKEND; None when no graph is reachable"""
+    global _graph_repo
+    try:
+        from graph_repository import create_repository
+        if _graph_repo is None:
+            _graph_repo = create_repository()
+        return read_risk_view(_graph_repo)
+    except Exception as e:
+        logger.warning(f"Risk view unavailable: {e}")
+        return None
+
+
+def query_risk_view(rows: List[Dict], sort: str = 'risk_score', order: str = 'desc',
+                    risk: Optional[List[str]] = None, min_score: Optional[float] = None,
+                    limit: Optional[int] = None) -> List[Dict]:
+    """Filters and sorts a risk view; raises ValueError for unknown sort keys or levels"""
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'")
+    levels = {level.upper() for level in risk or []}
+    if levels - set(RISK_LEVELS):
+        raise ValueError(f"risk must be one of {', '.join(RISK_LEVELS)}")
+
+    if levels:
+        rows = [row for row in rows if row['risk'] in levels]
+    if min_score is not None:
+        rows = [row for row in rows if row['risk_score'] >= min_score]
+    rows = sorted(rows, key=lambda row: row[sort], reverse=(order == 'desc'))
+    if limit is not None:
+        rows = rows[:max(0, limit)]
+    return rows
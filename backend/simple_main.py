@@ -3,6 +3,33 @@ import json
 import urllib.parse
 import os
 
+from risk_view import query_risk_view, read_risks
+
+# Demo data for runs without a graph
+DEMO_RISKS = [
+    {"validator": "MAKE Software", "whale_stake_cspr": 2900000, "risk": "MODERATE"},
+    {"validator": "HashQuark", "whale_stake_cspr": 450000, "risk": "CRITICAL"},
+    {"validator": "Figment", "whale_stake_cspr": 250000, "risk": "SAFE"}
+]
+
+def risk_analysis(query):
+    """(payload, status) for /api/risk-analysis"""
+    rows = read_risks()
+    if rows is None:
+        return DEMO_RISKS, 200
+    params = {key: values[-1] for key, values in query.items()}
+    try:
+        return query_risk_view(
+            rows,
+            sort=params.get('sort', 'risk_score'),
+            order=params.get('order', 'desc'),
+            risk=params['risk'].split(',') if params.get('risk') else None,
+            min_score=float(params['min_score']) if params.get('min_score') else None,
+            limit=int(params['limit']) if params.get('limit') else None,
+        ), 200
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
 class APIHandler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
@@ -12,33 +39,12 @@ class APIHandler(BaseHTTPRequestHandler):
         self.end_headers()
     
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        
+        url = urllib.parse.urlparse(self.path)
+        status = 200
         if self.path == '/':
             response = {"message": "SatoshisEye API", "status": "running"}
-        elif self.path == '/api/risk-analysis':
-            response = [
-                {
-                    "chain": "Osmosis",
-                    "smart_money_btc": 350,
-                    "risk": "SAFE"
-                },
-                {
-                    "chain": "Neutron", 
-                    "smart_money_btc": 45,
-                    "risk": "CRITICAL"
-                },
-                {
-                    "chain": "Levana",
-                    "smart_money_btc": 25,
-                    "risk": "CRITICAL"
-                }
-            ]
+        elif url.path == '/api/risk-analysis':
+            response, status = risk_analysis(urllib.parse.parse_qs(url.query))
         elif self.path.startswith('/risk/chain/'):
             chain_id = self.path.split('/')[-1]
             # Calculate smart money for the chain
@@ -84,11 +90,7 @@ class APIHandler(BaseHTTPRequestHandler):
                     from ai_analyst import get_mock_analysis, analyze_with_agentrouter
                     
                     # Get current risk data for context
-                    risk_context = [
-                        {"chain": "Osmosis", "smart_money_btc": 350, "risk": "SAFE"},
-                        {"chain": "Neutron", "smart_money_btc": 45, "risk": "CRITICAL"},
-                        {"chain": "Levana", "smart_money_btc": 25, "risk": "CRITICAL"}
-                    ]
+                    risk_context = (read_risks() or DEMO_RISKS)[:10]
                     
                     # Try AgentRouter first, fallback to mock
                     try:
@@ -111,6 +113,12 @@ class APIHandler(BaseHTTPRequestHandler):
         else:
             response = {"error": "Not found"}
             
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
         self.wfile.write(json.dumps(response).encode())
     
     def do_POST(self):
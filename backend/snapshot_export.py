@@ -0,0 +1,166 @@
+"""
+Columnar network snapshots for CasperEye analytics.
+After each ingest cycle the validators, delegators and DELEGATED_TO edges are
+written as plain .npy columns with integer-encoded ids, so analytics can
+memory-map the whole network instead of pulling vertices over the websocket.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Optional
+
+from checkpoint import CHECKPOINT_DIR
+from graph_metrics import delegator_totals
+
+logger = logging.getLogger("SnapshotExport")
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    logger.warning("numpy not installed. Install with: pip install numpy")
+
+SNAPSHOT_DIR = os.getenv("GRAPH_SNAPSHOT_DIR", os.path.join(CHECKPOINT_DIR, "snapshots"))
+# Older snapshots are kept so readers holding a memory map never see their files vanish
+SNAPSHOTS_KEPT = int(os.getenv("GRAPH_SNAPSHOTS_KEPT", 3))
+SNAPSHOT_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+
+def build_columns(repo) -> Dict:
+    """Reads validators, delegators and DELEGATED_TO edges into numpy columns
+
+    Keys are fixed-width unicode so they can be memory-mapped too; edges are
+    int32 positions into the validator_* and delegator_* columns. A delegator's
+    stake is the sum of its edge stakes, and it is a whale if any one of them is.
+    """
+    validators = repo.vertices('Validator', properties=['public_key', 'stake_cspr', 'delegation_rate'])
+    validators = [v for v in validators if 'public_key' in v['properties']]
+    delegators = repo.vertices('Address', properties=['public_key'])
+    delegators = [d for d in delegators if 'public_key' in d['properties']]
+
+    validator_pos = {v['id']: i for i, v in enumerate(validators)}
+    delegator_pos = {d['id']: i for i, d in enumerate(delegators)}
+    edges = [
+        e for e in repo.edges('DELEGATED_TO')
+        if e['out'] in delegator_pos and e['in'] in validator_pos
+    ]
+    totals = delegator_totals(edges)
+
+    return {
+        'validator_key': np.array([v['properties']['public_key'] for v in validators], dtype=str),
+        'validator_stake': np.array([v['properties'].get('stake_cspr', 0) for v in validators], dtype='float64'),
+        'validator_delegation_rate': np.array(
+            [v['properties'].get('delegation_rate', 0) for v in validators], dtype='float64'
+        ),
+        'delegator_key': np.array([d['properties']['public_key'] for d in delegators], dtype=str),
+        'delegator_stake': np.array([totals.get(d['id'], (0.0, False))[0] for d in delegators], dtype='float64'),
+        'delegator_whale': np.array([totals.get(d['id'], (0.0, False))[1] for d in delegators], dtype=bool),
+        'edge_delegator': np.array([delegator_pos[e['out']] for e in edges], dtype='int32'),
+        'edge_validator': np.array([validator_pos[e['in']] for e in edges], dtype='int32'),
+        'edge_stake': np.array([e['properties'].get('stake_cspr', 0) for e in edges], dtype='float64'),
+    }
+
+
+def _write_atomic(path: str, text: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_snapshot(repo, version: str, directory: str = SNAPSHOT_DIR) -> Optional[str]:
+    """Writes a snapshot for graph `version` and points CURRENT at it; returns its path"""
+    if not HAS_NUMPY:
+        return None
+
+    started = time.time()
+    columns = build_columns(repo)
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, version)
+    staging = tempfile.mkdtemp(dir=directory, prefix=f".{version}-")
+    try:
+        for name, column in columns.items():
+            np.save(os.path.join(staging, f"{name}.npy"), column)
+        manifest = {
+            'format': SNAPSHOT_FORMAT,
+            'version': version,
+            'created_at': time.time(),
+            'validators': len(columns['validator_key']),
+            'delegators': len(columns['delegator_key']),
+            'edges': len(columns['edge_stake']),
+            'columns': sorted(columns),
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_atomic(os.path.join(directory, CURRENT_FILE), version)
+    _prune(directory, keep=version)
+    logger.info(f"🗂️  Exported snapshot {version}: {manifest['validators']} validators, "
+                f"{manifest['delegators']} delegators, {manifest['edges']} edges "
+                f"in {(time.time() - started) * 1000:.0f}ms")
+    return target
+
+
+def _prune(directory: str, keep: str):
+    """Deletes all but the newest SNAPSHOTS_KEPT snapshots (never `keep`)"""
+    snapshots = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith('.') or not os.path.isdir(path):
+            continue
+        snapshots.append((os.path.getmtime(path), name))
+    for _, name in sorted(snapshots, reverse=True)[SNAPSHOTS_KEPT:]:
+        if name != keep:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+class NetworkSnapshot:
+    """One exported snapshot; columns are read-only memory maps"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {self.manifest.get('format')!r} in {path}")
+        self.version = self.manifest['version']
+        self.columns = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+            for name in self.manifest['columns']
+        }
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def current_snapshot_version(directory: str = SNAPSHOT_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot(directory: str = SNAPSHOT_DIR, version: Optional[str] = None) -> Optional[NetworkSnapshot]:
+    """Memory-maps the current (or given) snapshot; None if there is none yet"""
+    if not HAS_NUMPY:
+        return None
+    version = version or current_snapshot_version(directory)
+    if not version:
+        return None
+    return NetworkSnapshot(os.path.join(directory, version))
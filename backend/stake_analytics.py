@@ -0,0 +1,118 @@
+"""
+Stake distribution analytics for CasperEye.
+Computes decentralization metrics (HHI, Nakamoto coefficient, Gini, top-N
+share, percentiles) over the validator and delegator stake vectors with numpy,
+once per graph version.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from graph_metrics import delegator_totals
+from snapshot_export import SNAPSHOT_DIR, load_snapshot
+
+logger = logging.getLogger("StakeAnalytics")
+
+# Share of stake that can halt a BFT network (Casper finality needs > 2/3)
+NAKAMOTO_THRESHOLD = float(os.getenv("NAKAMOTO_THRESHOLD", 1 / 3))
+# Nakamoto coefficient at or above which that part of the risk score is zero
+NAKAMOTO_SAFE = int(os.getenv("NAKAMOTO_SAFE", 10))
+TOP_N = int(os.getenv("CONCENTRATION_TOP_N", 10))
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+
+def distribution(stakes, top_n: int = TOP_N, threshold: float = NAKAMOTO_THRESHOLD) -> Dict:
+    """Concentration metrics of one stake vector; zero and negative stakes are ignored"""
+    stakes = np.asarray(stakes, dtype='float64')
+    stakes = np.sort(stakes[stakes > 0])  # ascending
+    n = int(stakes.size)
+    total = float(stakes.sum()) if n else 0.0
+    if n == 0 or total <= 0:
+        return {
+            'count': n, 'total': 0.0, 'hhi': 0.0, 'nakamoto_coefficient': 0, 'gini': 0.0,
+            'top_n': top_n, 'top_n_share': 0.0,
+            'percentiles': {f"p{p}": 0.0 for p in PERCENTILES},
+        }
+
+    shares = stakes / total
+    # Largest holders first: the smallest k whose combined share exceeds the threshold
+    cumulative = np.cumsum(shares[::-1])
+    nakamoto = int(np.searchsorted(cumulative, threshold, side='right')) + 1
+    # Gini over the ascending vector: sum((2i - n - 1) * x_i) / (n * sum(x))
+    ranks = np.arange(1, n + 1, dtype='float64')
+    gini = float(((2 * ranks - n - 1) * stakes).sum() / (n * total))
+
+    return {
+        'count': n,
+        'total': total,
+        'hhi': float((shares * shares).sum()),
+        'nakamoto_coefficient': min(nakamoto, n),
+        'gini': gini,
+        'top_n': top_n,
+        'top_n_share': float(cumulative[min(top_n, n) - 1]),
+        'percentiles': dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(stakes, PERCENTILES).tolist())),
+    }
+
+
+def risk_score(validators: Dict, delegators: Dict) -> float:
+    """0-10: normalized validator HHI (4), Nakamoto coefficient (3), delegator Gini (3)"""
+    n = validators['count']
+    if n == 0:
+        return 0.0
+    hhi_norm = (validators['hhi'] - 1 / n) / (1 - 1 / n) if n > 1 else 1.0
+    nakamoto_risk = max(0.0, (NAKAMOTO_SAFE - validators['nakamoto_coefficient']) / (NAKAMOTO_SAFE - 1))
+    score = 4 * hhi_norm + 3 * min(1.0, nakamoto_risk) + 3 * delegators['gini']
+    return max(0.0, min(10.0, score))
+
+
+class StakeAnalytics:
+    """Stake distribution of the current graph, recomputed only when the graph version changes"""
+
+    def __init__(self, repo, snapshot_dir: str = SNAPSHOT_DIR, top_n: int = TOP_N):
+        self.repo = repo
+        self.snapshot_dir = snapshot_dir
+        self.top_n = top_n
+        self._cached: Optional[Tuple[str, Dict]] = None
+        self._lock = threading.Lock()
+
+    def stake_vectors(self, version: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Validator and delegator stakes, from the matching snapshot when there is one.
+        A delegator's stake is the sum of its DELEGATED_TO edge stakes."""
+        try:
+            snapshot = load_snapshot(self.snapshot_dir)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable snapshot: {e}")
+            snapshot = None
+        if snapshot is not None and (version is None or snapshot.version == version):
+            return snapshot.validator_stake, snapshot.delegator_stake
+
+        validators = self.repo.vertices('Validator', properties=['stake_cspr'])
+        delegators = delegator_totals(self.repo.edges('DELEGATED_TO'))
+        return (
+            np.array([v['properties'].get('stake_cspr', 0) for v in validators], dtype='float64'),
+            np.array([stake for stake, _ in delegators.values()], dtype='float64'),
+        )
+
+    def compute(self, version: Optional[str] = None) -> Dict:
+        validator_stakes, delegator_stakes = self.stake_vectors(version)
+        validators = distribution(validator_stakes, self.top_n)
+        delegators = distribution(delegator_stakes, self.top_n)
+        return {
+            'version': version,
+            'validators': validators,
+            'delegators': delegators,
+            'risk_score': risk_score(validators, delegators),
+        }
+
+    def summary(self, version: Optional[str] = None) -> Dict:
+        """Distribution for `version`; cached until the version changes"""
+        with self._lock:
+            if version is not None and self._cached and self._cached[0] == version:
+                return self._cached[1]
+            result = self.compute(version)
+            if version is not None:
+                self._cached = (version, result)
+            return result
@@ -0,0 +1,8 @@
+"""
+Test setup for the CasperEye backend.
+The services import their modules from the backend directory, so the tests do too.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
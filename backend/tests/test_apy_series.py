@@ -0,0 +1,60 @@
+import pytest
+
+from apy_series import RingSeries, bucket_mean, downsample, lttb
+
+
+def test_ring_keeps_the_newest_samples_in_order():
+    series = RingSeries(capacity=4)
+    for t in range(10):
+        series.append(t, t * 1.5)
+
+    timestamps, values = series.range()
+    assert list(timestamps) == [6, 7, 8, 9]
+    assert list(values) == [9.0, 10.5, 12.0, 13.5]
+    assert len(series) == 4
+    assert series.latest() == (9, 13.5)
+
+
+def test_range_is_inclusive_across_the_wrap():
+    series = RingSeries(capacity=5)
+    for t in range(0, 70, 10):  # 20..60 remain, stored across the end of the ring
+        series.append(t, float(t))
+
+    assert list(series.range(30, 50)[0]) == [30, 40, 50]
+    assert list(series.range(25, None)[0]) == [30, 40, 50, 60]
+    assert list(series.range(None, 20)[0]) == [20]
+    assert list(series.range(61, 100)[0]) == []
+
+
+def test_out_of_order_timestamps_are_clamped():
+    series = RingSeries(capacity=3)
+    series.append(10, 1.0)
+    series.append(5, 2.0)
+
+    assert list(series.range()[0]) == [10, 10]
+    assert RingSeries(capacity=2).latest() is None
+    with pytest.raises(ValueError):
+        RingSeries(capacity=0)
+
+
+def test_lttb_keeps_the_ends_and_the_spike():
+    timestamps = list(range(100))
+    values = [0.0] * 100
+    values[42] = 50.0
+
+    sampled_t, sampled_v = lttb(timestamps, values, 10)
+
+    assert len(sampled_t) == 10
+    assert sampled_t[0] == 0 and sampled_t[-1] == 99
+    assert 42 in sampled_t and 50.0 in sampled_v
+    assert sampled_t == sorted(sampled_t)
+
+
+def test_bucket_mean_and_downsample():
+    assert bucket_mean([0, 1, 2, 3], [1.0, 3.0, 5.0, 7.0], 2) == ([0, 2], [2.0, 6.0])
+    assert downsample([0, 1], [1.0, 2.0], None) == ([0, 1], [1.0, 2.0])
+    assert downsample([0, 1, 2], [1.0, 2.0, 3.0], 5, 'lttb') == ([0, 1, 2], [1.0, 2.0, 3.0])
+    with pytest.raises(ValueError):
+        downsample([0], [1.0], 1, 'median')
+    with pytest.raises(ValueError):
+        lttb([0, 1, 2, 3], [0.0] * 4, 2)
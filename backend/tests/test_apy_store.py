@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from apy_store import ApyStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ApyStore(str(tmp_path / 'history.db'), sample_interval=60)
+    yield store
+    store.close()
+
+
+def hour_start():
+    now = int(time.time())
+    return now - now % 3600 - 3600
+
+
+def test_rollups_aggregate_stored_samples(store):
+    start = hour_start()
+    for minute, apy in enumerate([4.0, 6.0, 5.0]):
+        store.record([('eigen', 'apy', apy), ('eigen', 'tvl', 100 + minute)], timestamp=start + minute * 60)
+
+    resolution, rows = store.query('eigen', 'apy', start, start + 3599, points=1)
+    assert resolution == 3600
+    assert rows == [{'ts': start, 'value': 5.0, 'min': 4.0, 'max': 6.0}]
+
+    resolution, rows = store.query('eigen', 'apy', start, start + 600, points=100)
+    assert resolution == 0
+    assert [row['value'] for row in rows] == [4.0, 6.0, 5.0]
+
+
+def test_repeated_timestamp_is_counted_once(store):
+    start = hour_start()
+    store.record([('eigen', 'apy', 4.0)], timestamp=start)
+    store.record([('eigen', 'apy', 8.0)], timestamp=start)
+    store.record([('eigen', 'apy', None)], timestamp=start + 60)
+
+    _, rows = store.query('eigen', 'apy', start, start + 3599, points=1)
+    assert rows == [{'ts': start, 'value': 4.0, 'min': 4.0, 'max': 4.0}]
+
+
+def test_prune_drops_expired_raw_samples(store):
+    start = hour_start()
+    store.record([('eigen', 'apy', 4.0)], timestamp=start)
+    store.prune(now=start + 30 * 86400)
+
+    assert store.query('eigen', 'apy', start, start + 600, points=100) == (0, [])
+    assert store.query('eigen', 'apy', start, start + 86399, points=1)[1][0]['value'] == 4.0
+
+
+def test_invalid_queries(store):
+    with pytest.raises(ValueError):
+        store.query('eigen', 'price')
+    with pytest.raises(ValueError):
+        store.query('eigen', points=0)
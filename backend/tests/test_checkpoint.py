@@ -0,0 +1,55 @@
+import json
+import os
+import time
+
+import checkpoint
+from checkpoint import IngestCheckpoint
+
+
+def test_resume_after_a_completed_cycle(tmp_path):
+    first = IngestCheckpoint('casper', str(tmp_path))
+    first.set_cursor('txs', ['h1', 'h2'])
+    first.complete_cycle()
+    first.complete_cycle()
+
+    second = IngestCheckpoint('casper', str(tmp_path))
+    assert second.resume(graph_populated=True)
+    assert second.cycle == 2
+    assert second.cursor('txs') == ['h1', 'h2']
+    assert second.cursor('missing', []) == []
+
+
+def test_staged_cursors_are_not_persisted_until_the_cycle_completes(tmp_path):
+    ingest = IngestCheckpoint('casper', str(tmp_path))
+    ingest.complete_cycle()
+    ingest.set_cursor('txs', ['h1'])
+
+    assert IngestCheckpoint('casper', str(tmp_path)).resume(True)
+    assert IngestCheckpoint('casper', str(tmp_path)).cursor('txs') is None
+
+
+def test_cold_start_when_missing_corrupt_stale_or_graph_empty(tmp_path, monkeypatch):
+    ingest = IngestCheckpoint('casper', str(tmp_path))
+    assert not ingest.resume(True)
+
+    with open(ingest.path, 'w') as f:
+        f.write('{not json')
+    assert not ingest.resume(True)
+
+    with open(ingest.path, 'w') as f:
+        json.dump({'cycle': 3, 'completed_at': time.time() - 10, 'cursors': {'txs': ['h']}}, f)
+    assert not ingest.resume(graph_populated=False)
+    assert ingest.cycle == 0 and ingest.cursor('txs') is None
+
+    monkeypatch.setattr(checkpoint, 'CHECKPOINT_MAX_AGE', 5)
+    assert not ingest.resume(True)
+
+
+def test_complete_cycle_replaces_the_file_atomically(tmp_path):
+    directory = tmp_path / 'nested'
+    ingest = IngestCheckpoint('babylon', str(directory))
+    ingest.complete_cycle()
+
+    assert os.listdir(directory) == ['babylon.json']
+    with open(ingest.path) as f:
+        assert json.load(f)['cycle'] == 1
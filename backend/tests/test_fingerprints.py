@@ -0,0 +1,42 @@
+from fingerprints import FingerprintMap, fingerprint
+
+
+def test_fingerprint_is_stable_and_field_sensitive():
+    assert fingerprint('v1', 100.0, 5) == fingerprint('v1', 100.0, 5)
+    assert fingerprint('v1', 100.0, 5) != fingerprint('v1', 100.0, 6)
+    assert fingerprint('v1', 100.0, 5) < 2 ** 64
+
+
+def test_only_new_or_changed_entries_need_a_write():
+    fps = FingerprintMap()
+    fps.seed([('a', (1, 'x')), ('b', (2, 'y'))])
+    fps.begin_cycle()
+
+    assert fps.check('a', 1, 'x') is None
+    changed = fps.check('b', 3, 'y')
+    new = fps.check('c', 4, 'z')
+    assert changed is not None and new is not None
+
+    # Nothing is remembered until the write succeeds
+    assert fps.check('c', 4, 'z') == new
+    fps.record('c', new)
+    assert fps.check('c', 4, 'z') is None
+    assert len(fps) == 3
+
+
+def test_disappeared_and_forget():
+    fps = FingerprintMap()
+    fps.seed([(('v1', 'd1'), ()), (('v1', 'd2'), ()), (('v2', 'd1'), ())])
+    fps.begin_cycle()
+    fps.check(('v1', 'd1'))
+
+    assert sorted(fps.disappeared()) == [('v1', 'd2'), ('v2', 'd1')]
+    assert fps.disappeared(lambda key: key[0] == 'v1') == [('v1', 'd2')]
+
+    fps.forget([('v1', 'd2')])
+    assert ('v1', 'd2') not in fps
+    assert fps.disappeared() == [('v2', 'd1')]
+
+    # A new cycle starts with nothing seen
+    fps.begin_cycle()
+    assert len(fps.disappeared()) == 2
@@ -0,0 +1,51 @@
+import queue
+
+from graph_stream import GraphBroadcaster, _StreamView
+from memory_repository import MemoryRepository
+
+
+class FixedVersion:
+    def __init__(self, version):
+        self.version = version
+
+    def current(self):
+        return self.version
+
+
+class CountingView(_StreamView):
+    def __init__(self):
+        super().__init__(limit=10, groups=None, min_stake=None)
+        self.loads = 0
+
+    def load(self, repo):
+        self.loads += 1
+        return super().load(repo)
+
+
+def test_refresh_skips_the_load_when_the_version_is_unchanged():
+    broadcaster = GraphBroadcaster(FixedVersion('v1'), MemoryRepository())
+    view = CountingView()
+
+    broadcaster._refresh(view, 'v1')
+    broadcaster._refresh(view, 'v1')
+
+    assert view.loads == 1
+    assert view.version == 'v1'
+
+
+def test_refresh_publishes_a_delta_on_a_new_version():
+    repo = MemoryRepository()
+    broadcaster = GraphBroadcaster(FixedVersion('v1'), repo)
+    view = CountingView()
+    broadcaster._refresh(view, 'v1')
+    q = queue.Queue()
+    view.subscribers.add(q)
+
+    repo.upsert_vertices('Validator', 'public_key', [{'public_key': 'v1', 'group': 'Validator', 'stake_cspr': 1}])
+    broadcaster._refresh(view, 'v2')
+
+    event, delta = q.get_nowait()
+    assert event == 'delta'
+    assert delta['version'] == 'v2'
+    assert len(delta['nodes']['added']) == 1
+    assert view.loads == 2
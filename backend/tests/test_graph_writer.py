@@ -0,0 +1,94 @@
+import logging
+
+import pytest
+
+import casper_ingest
+from checkpoint import IngestCheckpoint
+from graph_writer import GraphWriter
+from memory_repository import MemoryRepository
+
+WHALE = casper_ingest.WHALE_THRESHOLD_CSPR
+
+
+def delegation(delegator, validator, stake):
+    return {
+        'public_key': delegator,
+        'validator_public_key': validator,
+        'stake_cspr': stake,
+        'group': 'Whale' if stake >= WHALE else 'Delegator',
+    }
+
+
+@pytest.fixture
+def repo():
+    repo = MemoryRepository()
+    repo.upsert_vertices('Validator', 'public_key', [{'public_key': pk, 'stake_cspr': 1e6} for pk in ('v1', 'v2')],
+                         on_create={'group': 'Validator'})
+    return repo
+
+
+def address(repo, public_key):
+    return repo.get_vertex('Address', 'public_key', public_key)['properties']
+
+
+def test_delegator_vertex_sums_its_delegations(repo):
+    GraphWriter().upsert_delegations(repo, [delegation('d1', 'v1', 200_000), delegation('d1', 'v2', 500)])
+
+    assert address(repo, 'd1')['stake_cspr'] == 200_500
+    assert address(repo, 'd1')['group'] == 'Whale'
+    assert sorted(e['properties']['stake_cspr'] for e in repo.edges('DELEGATED_TO')) == [500, 200_000]
+
+
+def test_totals_cover_delegations_outside_the_page(repo):
+    writer = GraphWriter()
+    writer.upsert_delegations(repo, [delegation('d1', 'v1', 200_000)])
+    writer.upsert_delegations(repo, [delegation('d1', 'v2', 500)], totals={'d1': (200_500, 'Whale')})
+
+    assert address(repo, 'd1') == {'public_key': 'd1', 'label': 'Whale', 'group': 'Whale',
+                                   'stake_cspr': 200_500, 'val': 10}
+
+
+def test_update_delegators_rewrites_totals(repo):
+    writer = GraphWriter()
+    writer.upsert_delegations(repo, [delegation('d1', 'v1', 200_000), delegation('d1', 'v2', 500)])
+    writer.update_delegators(repo, {'d1': (500, 'Delegator')})
+
+    assert address(repo, 'd1')['stake_cspr'] == 500
+    assert address(repo, 'd1')['group'] == 'Delegator'
+
+
+class FakeCsprCloud:
+    def __init__(self, validators, delegations):
+        self.validators = validators
+        self.delegations = delegations
+
+    def iter_validators(self):
+        yield [{'public_key': pk, 'total_stake': 10**15} for pk in self.validators]
+
+    def iter_delegations(self, public_key):
+        yield [{'public_key': d, 'stake': int(s * 10**9)} for d, s in self.delegations.get(public_key, [])]
+
+
+def test_ingester_keeps_delegator_totals_across_validators(tmp_path, monkeypatch):
+    monkeypatch.setattr(casper_ingest, 'CSPR_CLOUD_TOKEN', 'token')
+    logging.disable(logging.INFO)
+    try:
+        repo = MemoryRepository()
+        ingester = casper_ingest.CasperIngestor(repo=repo)
+        ingester.checkpoint = IngestCheckpoint('casper', str(tmp_path))
+        ingester.cspr = FakeCsprCloud(['v1', 'v2'], {'v1': [('d1', 200_000)], 'v2': [('d1', 500)]})
+        ingester.seed_casper_network()
+        ingester.metrics_view.load(repo)
+
+        ingester.fetch_validators()
+        ingester.fetch_delegations()
+        assert address(repo, 'd1')['stake_cspr'] == 200_500
+        assert address(repo, 'd1')['group'] == 'Whale'
+
+        # The whale delegation is withdrawn; the delegator keeps its other one
+        ingester.cspr.delegations['v1'] = []
+        ingester.fetch_delegations()
+        assert address(repo, 'd1')['stake_cspr'] == 500
+        assert address(repo, 'd1')['group'] == 'Delegator'
+    finally:
+        logging.disable(logging.NOTSET)
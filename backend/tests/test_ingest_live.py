@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip('dotenv')
+
+import ingest_live
+from checkpoint import IngestCheckpoint
+from memory_repository import MemoryRepository
+
+
+class Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+PROVIDERS = {'finality_providers': [{'btc_pk_hex': 'fp1', 'description': {'moniker': 'One'}}], 'pagination': {}}
+TXS = {'tx_responses': [{'txhash': 'h1', 'logs': [{'events': [{
+    'type': 'babylon.btcstaking.v1.EventBTCDelegationStateUpdate',
+    'attributes': [{'key': 'staker_addr', 'value': 'bbn1'}, {'key': 'active_sat', 'value': '250000000'}],
+}]}]}]}
+
+
+@pytest.fixture
+def ingestor(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest_live.http_client, 'get',
+                        lambda url, **kwargs: Response(PROVIDERS if 'finality_providers' in url else TXS))
+    indexer = ingest_live.BabylonIngestor(repo=MemoryRepository())
+    indexer.checkpoint = IngestCheckpoint('babylon', str(tmp_path))
+    return indexer
+
+
+def cycle(indexer):
+    indexer.fetch_finality_providers()
+    indexer.fetch_live_delegations()
+    return indexer.changes
+
+
+def test_cycle_counts_its_writes(ingestor):
+    assert cycle(ingestor) == 2  # one new provider, one new staker
+
+
+def test_quiet_cycle_writes_nothing(ingestor):
+    cycle(ingestor)
+    ingestor.changes = 0
+
+    assert cycle(ingestor) == 0
+
+
+def test_casper_addresses_do_not_make_the_graph_populated(ingestor):
+    ingestor.repo.upsert_vertices('Address', 'public_key', [{'public_key': 'd1', 'group': 'Delegator', 'stake_cspr': 5}])
+    assert not ingestor.graph_populated()
+
+    ingestor.seed_demo_data()
+    assert ingestor.graph_populated()
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from json_stream import StreamFormatError, iter_array
+
+
+def chunked(document: str, size: int):
+    data = document.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+DOCUMENT = json.dumps({
+    'meta': {'data': [{'nested': True}], 'note': 'say "data": [1] here'},
+    'list': [[1, 2], {'data': []}],
+    'data': [{'pool': 'a', 'apy': 1.5}, 'x\\"]', 12, -3.5e-2, [1, {'y': 'é'}], None, True],
+    'after': 1,
+})
+EXPECTED = json.loads(DOCUMENT)['data']
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 4096])
+def test_yields_the_top_level_array_in_any_chunking(size):
+    assert list(iter_array(chunked(DOCUMENT, size), 'data')) == EXPECTED
+
+
+def test_ignores_a_key_with_a_non_array_value():
+    document = '{"data": {"data": [0]}, "other": 1, "data" : [1, 2]}'
+    assert list(iter_array(chunked(document, 5), 'data')) == [1, 2]
+
+
+def test_empty_array():
+    assert list(iter_array([b'{"data": [ ]}'], 'data')) == []
+
+
+def test_missing_key_raises():
+    with pytest.raises(StreamFormatError):
+        list(iter_array([b'{"meta": {"data": [1]}}'], 'data'))
+
+
+def test_truncated_array_raises():
+    with pytest.raises(StreamFormatError):
+        list(iter_array([b'{"data": [1, 2'], 'data'))
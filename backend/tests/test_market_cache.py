@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+import market_cache
+from market_cache import MarketCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(market_cache.time, 'monotonic', clock)
+    return clock
+
+
+class Source:
+    """fetch() callable returning 1, 2, 3... and counting its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+def test_fresh_then_stale_then_expired(clock):
+    cache = MarketCache()
+    source = Source()
+
+    assert cache.get('k', source, ttl=10, stale_ttl=50) == 1
+    clock.now += 5
+    assert cache.get('k', source, ttl=10, stale_ttl=50) == 1
+    assert source.calls == 1
+
+    # Stale: the old value is served while a background refresh runs
+    clock.now += 10
+    assert cache.get('k', source, ttl=10, stale_ttl=50) == 1
+    cache._refresher.shutdown(wait=True)
+    assert source.calls == 2
+    assert cache.get('k', source, ttl=10, stale_ttl=50) == 2
+
+    # Expired: the caller waits for a new value
+    clock.now += 100
+    assert cache.get('k', source, ttl=10, stale_ttl=50) == 3
+    assert cache.stats()['stale_hits'] == 1
+
+
+def test_failed_fetch_falls_back_to_the_cached_value(clock):
+    cache = MarketCache()
+    cache.get('k', lambda: 'old', ttl=1, stale_ttl=2)
+    clock.now += 10
+
+    def broken():
+        raise RuntimeError('upstream down')
+
+    assert cache.get('k', broken, ttl=1, stale_ttl=2) == 'old'
+    with pytest.raises(RuntimeError):
+        cache.get('other', broken)
+    assert cache.stats()['errors'] == 2
+
+
+def test_lru_eviction_and_source_ttls():
+    cache = MarketCache(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.get(key, lambda: key)
+
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['evictions'] == 1
+    assert MarketCache.ttl_for('babylon') == market_cache.SOURCE_TTLS['babylon']
+    assert MarketCache.ttl_for('unknown') == market_cache.DEFAULT_TTL
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = MarketCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', slow))) for _ in range(8)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Every other caller is now waiting on the first caller's fetch
+    deadline = time.monotonic() + 5
+    while cache.stats()['misses'] < len(threads) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['value'] * len(threads)
+    assert len(calls) == 1
@@ -0,0 +1,39 @@
+import pytest
+
+from graph_repository import GraphRepository, VertexKey
+from memory_repository import MemoryRepository
+
+
+def test_sum_along_adds_up_start_vertices_sharing_a_key():
+    repo = MemoryRepository()
+    providers = repo.upsert_vertices('FinalityProvider', 'btc_pk', [{'btc_pk': 'fp1'}])
+    repo.upsert_vertices('Address', 'address', [
+        {'address': 'a1', 'owner': 'alice', 'btc_amount': 1.5},
+        {'address': 'a2', 'owner': 'alice', 'btc_amount': 2.0},
+        {'address': 'a3', 'owner': 'bob', 'btc_amount': 4.0},
+    ])
+    repo.upsert_edges('STAKES_TO', [
+        (VertexKey('Address', 'address', key), providers['fp1'], {}) for key in ('a1', 'a2', 'a3')
+    ])
+
+    sums = repo.sum_along([('out', 'STAKES_TO'), ('in', 'STAKES_TO')], 'btc_amount',
+                          labels='Address', key_property='owner')
+
+    # Each start vertex reaches all three stakers through the provider
+    assert sums == {'alice': 2 * 7.5, 'bob': 7.5}
+
+
+def test_sum_along_maps_unreachable_start_vertices_to_zero():
+    repo = MemoryRepository()
+    repo.upsert_vertices('Address', 'address', [{'address': 'a1'}])
+
+    assert repo.sum_along([('out', 'STAKES_TO')], 'btc_amount', labels='Address', key_property='address') == {'a1': 0}
+
+
+def test_incomplete_repository_cannot_be_instantiated():
+    class Partial(GraphRepository):
+        def clear(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
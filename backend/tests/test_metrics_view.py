@@ -0,0 +1,83 @@
+from graph_metrics import WHALE_THRESHOLD_CSPR, GraphMetricsEngine, metrics_response
+from graph_writer import GraphWriter
+from memory_repository import MemoryRepository
+from metrics_view import NetworkMetricsView, read_metrics_summary
+
+
+def babylon_graph():
+    repo = MemoryRepository()
+    repo.upsert_vertices('Validator', 'public_key', [{'public_key': 'v1', 'stake_cspr': 1e6}],
+                         on_create={'group': 'Validator'})
+    repo.upsert_vertices('Address', 'address', [
+        {'address': 'bc1q_whale', 'group': 'Whale', 'btc_amount': 3.5},
+        {'address': 'bc1q_retail', 'group': 'Retail', 'btc_amount': 1.5},
+    ])
+    return repo
+
+
+def test_view_reports_staked_btc_like_the_engine():
+    repo = babylon_graph()
+    view = NetworkMetricsView()
+    view.load(repo)
+
+    assert view.summary()['staked_btc'] == GraphMetricsEngine().fetch(repo)['staked_btc'] == 5.0
+
+
+def test_published_summary_carries_staked_btc():
+    repo = babylon_graph()
+    view = NetworkMetricsView()
+    view.load(repo)
+    view.publish(repo)
+
+    repo.upsert_vertices('Address', 'address', [{'address': 'bc1q_new', 'group': 'Retail', 'btc_amount': 1.0}])
+    view.publish(repo)
+
+    assert metrics_response(read_metrics_summary(repo))['total_staked_btc'] == 6.0
+
+
+def casper_graph():
+    repo = babylon_graph()
+    writer = GraphWriter()
+    repo.upsert_vertices('Chain', 'name', [{'name': 'Casper Network'}], on_create={'group': 'Chain'})
+    writer.upsert_validators(repo, [
+        {'public_key': pk, 'name': pk, 'stake_cspr': stake, 'delegation_rate': 10}
+        for pk, stake in (('v1', 1e6), ('v2', 3e6), ('v3', 5e5))
+    ])
+    repo.upsert_vertices('FinalityProvider', 'pk', [{'pk': 'fp1'}], on_create={'group': 'Provider'})
+    delegations = [('d1', 'v1', 200_000), ('d1', 'v2', 500), ('d2', 'v2', 5_000), ('d3', 'v3', 100_000)]
+    writer.upsert_delegations(repo, [{
+        'public_key': d, 'validator_public_key': v, 'stake_cspr': stake,
+        'group': 'Whale' if stake >= WHALE_THRESHOLD_CSPR else 'Delegator',
+    } for d, v, stake in delegations])
+    return repo
+
+
+def test_view_and_engine_agree_on_the_same_graph():
+    repo = casper_graph()
+    view = NetworkMetricsView()
+    view.load(repo)
+    engine = GraphMetricsEngine().fetch(repo)
+
+    assert view.summary() == engine
+    assert engine['whale_count'] == 2
+    assert engine['delegator_count'] == 3
+    assert engine['delegated_stake_cspr'] == 305_500
+
+
+def test_incremental_view_matches_engine_after_changes():
+    repo = casper_graph()
+    view = NetworkMetricsView()
+    view.load(repo)
+
+    # d1's whale delegation ends and d2 grows into a whale, as the ingester would apply them
+    writer = GraphWriter()
+    repo.drop_edges('DELEGATED_TO', [(repo.lookup('Address', 'public_key', ['d1'])['d1'],
+                                      repo.lookup('Validator', 'public_key', ['v1'])['v1'])])
+    view.remove_delegation('d1', 'v1')
+    writer.upsert_delegations(repo, [{'public_key': 'd2', 'validator_public_key': 'v2',
+                                      'stake_cspr': 150_000, 'group': 'Whale'}])
+    view.set_delegation('d2', 'v2', 150_000, 'Whale')
+    writer.update_delegators(repo, {'d1': view.delegator_totals('d1')})
+    view.refresh_network(repo)
+
+    assert view.summary() == GraphMetricsEngine().fetch(repo)
@@ -0,0 +1,55 @@
+import pytest
+
+import rate_limit
+from rate_limit import TokenBucket
+
+
+class Clock:
+    """Stands in for time.monotonic/time.sleep so refills are deterministic"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_burst_up_to_capacity_then_waits(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    for _ in range(3):
+        assert bucket.acquire()
+    assert clock.slept == []
+
+    assert bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+    bucket.acquire(2)
+    clock.now += 60
+
+    assert bucket.acquire(2)
+    assert not bucket.acquire(1, timeout=0.05)
+    assert bucket.acquire(1, timeout=0.1)
+
+
+def test_default_capacity_and_invalid_rate():
+    assert TokenBucket(rate=0.5).capacity == 1.0
+    assert TokenBucket(rate=5).capacity == 5
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
@@ -0,0 +1,85 @@
+"""Behaviour both GraphRepository backends must share.
+
+The Gremlin run clears the graph it connects to, so it only runs against a
+throwaway server named in GREMLIN_TEST_ENDPOINT (e.g. ws://localhost:8182/gremlin).
+"""
+import os
+
+import pytest
+
+from graph_repository import VertexKey, create_repository
+
+GREMLIN_TEST_ENDPOINT = os.getenv("GREMLIN_TEST_ENDPOINT")
+
+
+@pytest.fixture(params=['memory', 'gremlin'])
+def repo(request):
+    if request.param == 'gremlin':
+        if not GREMLIN_TEST_ENDPOINT:
+            pytest.skip("GREMLIN_TEST_ENDPOINT not set")
+        pytest.importorskip('gremlin_python')
+    repo = create_repository(request.param, **({'endpoint': GREMLIN_TEST_ENDPOINT} if request.param == 'gremlin' else {}))
+    repo.clear()
+    yield repo
+    repo.clear()
+    repo.close()
+
+
+def delegation_graph(repo):
+    validators = repo.upsert_vertices('Validator', 'public_key', [
+        {'public_key': 'v1', 'group': 'Validator', 'stake_cspr': 300_000},
+        {'public_key': 'v2', 'group': 'Validator', 'stake_cspr': 100_000},
+    ])
+    repo.upsert_linked('Address', 'public_key', [
+        {'public_key': 'd1', 'group': 'Whale', 'stake_cspr': 150_000},
+        {'public_key': 'd2', 'group': 'Delegator', 'stake_cspr': 10},
+    ], {
+        'd1': [('DELEGATED_TO', VertexKey('Validator', 'public_key', 'v1'), {'stake_cspr': 100_000}),
+               ('DELEGATED_TO', VertexKey('Validator', 'public_key', 'v2'), {'stake_cspr': 50_000})],
+        'd2': [('DELEGATED_TO', VertexKey('Validator', 'public_key', 'missing'), {'stake_cspr': 1}),
+               ('DELEGATED_TO', validators['v2'], {'stake_cspr': 10})],
+    })
+    repo.upsert_vertices('Address', 'address', [{'address': 'bbn1', 'group': 'Retail', 'btc_amount': 0.5}])
+
+
+def test_upsert_and_lookup(repo):
+    delegation_graph(repo)
+
+    assert sorted(repo.lookup('Validator', 'public_key')) == ['v1', 'v2']
+    assert sorted(repo.lookup('Validator', 'public_key', ['v2', 'v9'])) == ['v2']
+    assert repo.count('Address') == 3
+    assert repo.count('Address', at_least={'btc_amount': 0}) == 1
+    assert repo.get_vertex('Address', 'public_key', 'd1')['properties']['group'] == 'Whale'
+
+    # on_create fields are only written for new vertices
+    repo.upsert_vertices('Validator', 'public_key', [{'public_key': 'v1', 'stake_cspr': 1}], on_create={'val': 5})
+    assert 'val' not in repo.get_vertex('Validator', 'public_key', 'v1')['properties']
+
+
+def test_edges_skip_missing_endpoints_and_drop_with_their_vertex(repo):
+    delegation_graph(repo)
+    assert len(repo.edges('DELEGATED_TO')) == 3
+
+    assert repo.drop_vertices('Validator', 'public_key', ['v2']) == 1
+    assert [e['properties']['stake_cspr'] for e in repo.edges('DELEGATED_TO')] == [100_000]
+
+
+def test_network_summary(repo):
+    delegation_graph(repo)
+
+    summary = repo.network_summary(whale_threshold=100_000, top_n=1)
+    assert summary['groups'] == {'Validator': 2, 'Whale': 1, 'Delegator': 1, 'Retail': 1}
+    assert summary['validator_stake'] == 400_000
+    assert list(summary['top_stakes']) == [300_000]
+    assert summary['delegator_count'] == 2
+    assert summary['whale_count'] == 1
+    assert summary['delegated_stake'] == 150_010
+    assert summary['staked_btc'] == 0.5
+
+
+def test_sum_along(repo):
+    delegation_graph(repo)
+
+    sums = repo.sum_along([('in', 'DELEGATED_TO')], 'stake_cspr', labels='Validator',
+                          end_where={'group': 'Whale'}, key_property='public_key')
+    assert sums == {'v1': 150_000, 'v2': 150_000}
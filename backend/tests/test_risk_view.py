@@ -0,0 +1,51 @@
+import simple_main
+from memory_repository import MemoryRepository
+from risk_view import compute_validator_risk, publish_risk_view, query_risk_view, read_risk_view
+
+
+def graph():
+    repo = MemoryRepository()
+    ids = repo.upsert_vertices('Validator', 'public_key', [
+        {'public_key': 'v1', 'name': 'One', 'stake_cspr': 1e6},
+        {'public_key': 'v2', 'name': 'Two', 'stake_cspr': 1e6},
+    ], on_create={'group': 'Validator'})
+    # The vertex group says Delegator; its delegation to v1 is still whale-sized
+    delegators = repo.upsert_vertices('Address', 'public_key', [
+        {'public_key': 'd1', 'group': 'Delegator', 'stake_cspr': 500},
+        {'public_key': 'd2', 'group': 'Delegator', 'stake_cspr': 100_000},
+    ])
+    repo.upsert_edges('DELEGATED_TO', [
+        (delegators['d1'], ids['v1'], {'stake_cspr': 200_000}),
+        (delegators['d1'], ids['v2'], {'stake_cspr': 500}),
+        (delegators['d2'], ids['v1'], {'stake_cspr': 100_000}),
+    ])
+    return repo
+
+
+def test_whale_exposure_comes_from_edge_stakes():
+    rows = {row['public_key']: row for row in compute_validator_risk(graph())}
+
+    assert rows['v1']['whale_stake_cspr'] == 300_000
+    assert rows['v1']['whale_exposure'] == 1.0
+    # d1 is a whale through its v1 delegation, so its small v2 delegation counts too
+    assert rows['v2']['whale_stake_cspr'] == 500
+
+
+def test_published_view_reads_back():
+    repo = graph()
+    assert read_risk_view(repo) is None
+
+    rows = publish_risk_view(repo)
+
+    assert read_risk_view(repo) == rows
+    assert query_risk_view(rows, sort='validator', order='asc', limit=1)[0]['validator'] == 'One'
+
+
+def test_simple_main_rejects_bad_parameters(monkeypatch):
+    monkeypatch.setattr(simple_main, 'read_risks', lambda: compute_validator_risk(graph()))
+
+    body, status = simple_main.risk_analysis({'sort': ['nope']})
+    assert status == 400 and 'error' in body
+
+    body, status = simple_main.risk_analysis({'risk': ['CRITICAL,MODERATE,SAFE'], 'limit': ['1']})
+    assert status == 200 and len(body) == 1
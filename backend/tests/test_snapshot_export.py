@@ -0,0 +1,40 @@
+import numpy as np
+
+from memory_repository import MemoryRepository
+from snapshot_export import build_columns, export_snapshot, load_snapshot
+
+
+def graph():
+    repo = MemoryRepository()
+    validators = repo.upsert_vertices('Validator', 'public_key', [
+        {'public_key': 'v1', 'stake_cspr': 1e6, 'delegation_rate': 5},
+        {'public_key': 'v2', 'stake_cspr': 2e6, 'delegation_rate': 10},
+    ])
+    # Vertex properties as a last-write-wins writer would have left them
+    delegators = repo.upsert_vertices('Address', 'public_key', [
+        {'public_key': 'd1', 'group': 'Delegator', 'stake_cspr': 500},
+        {'public_key': 'd2', 'group': 'Delegator', 'stake_cspr': 1_000},
+    ])
+    repo.upsert_edges('DELEGATED_TO', [
+        (delegators['d1'], validators['v1'], {'stake_cspr': 200_000}),
+        (delegators['d1'], validators['v2'], {'stake_cspr': 500}),
+        (delegators['d2'], validators['v2'], {'stake_cspr': 1_000}),
+    ])
+    return repo
+
+
+def test_delegator_columns_come_from_edge_stakes():
+    columns = build_columns(graph())
+    by_key = dict(zip(columns['delegator_key'], zip(columns['delegator_stake'], columns['delegator_whale'])))
+
+    assert by_key == {'d1': (200_500, True), 'd2': (1_000, False)}
+    assert np.bincount(columns['edge_delegator'], weights=columns['edge_stake']).tolist() == \
+        columns['delegator_stake'].tolist()
+
+
+def test_export_round_trip(tmp_path):
+    export_snapshot(graph(), 'abc', str(tmp_path))
+    snapshot = load_snapshot(str(tmp_path))
+
+    assert snapshot.version == 'abc'
+    assert sorted(snapshot.delegator_stake.tolist()) == [1_000, 200_500]
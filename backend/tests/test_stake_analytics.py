@@ -0,0 +1,78 @@
+import pytest
+
+from memory_repository import MemoryRepository
+from stake_analytics import StakeAnalytics, distribution
+from snapshot_export import export_snapshot
+
+
+def test_distribution_of_equal_stakes():
+    result = distribution([10, 10, 10, 10, 0, -5], top_n=2, threshold=1 / 3)
+
+    assert result['count'] == 4
+    assert result['hhi'] == pytest.approx(0.25)
+    assert result['gini'] == pytest.approx(0.0)
+    assert result['nakamoto_coefficient'] == 2
+    assert result['top_n_share'] == pytest.approx(0.5)
+
+
+def test_distribution_of_concentrated_stakes():
+    result = distribution([1, 1, 98], top_n=1, threshold=1 / 3)
+
+    assert result['nakamoto_coefficient'] == 1
+    assert result['top_n_share'] == pytest.approx(0.98)
+    assert result['hhi'] == pytest.approx(0.98 ** 2 + 2 * 0.01 ** 2)
+    assert result['gini'] == pytest.approx((-2 * 1 + 0 * 1 + 2 * 98) / (3 * 100))
+
+
+def test_empty_distribution():
+    result = distribution([])
+
+    assert result['count'] == 0
+    assert result['nakamoto_coefficient'] == 0
+
+
+def graph():
+    repo = MemoryRepository()
+    validators = repo.upsert_vertices('Validator', 'public_key', [
+        {'public_key': 'v1', 'stake_cspr': 300},
+        {'public_key': 'v2', 'stake_cspr': 100},
+    ])
+    # Vertex stakes as a last-write-wins writer would have left them
+    delegators = repo.upsert_vertices('Address', 'public_key', [
+        {'public_key': 'd1', 'stake_cspr': 5},
+        {'public_key': 'd2', 'stake_cspr': 10},
+    ])
+    repo.upsert_edges('DELEGATED_TO', [
+        (delegators['d1'], validators['v1'], {'stake_cspr': 20}),
+        (delegators['d1'], validators['v2'], {'stake_cspr': 5}),
+        (delegators['d2'], validators['v2'], {'stake_cspr': 10}),
+    ])
+    return repo
+
+
+def test_delegator_stakes_come_from_edges(tmp_path):
+    analytics = StakeAnalytics(graph(), snapshot_dir=str(tmp_path))
+    validator_stakes, delegator_stakes = analytics.stake_vectors()
+
+    assert sorted(validator_stakes.tolist()) == [100, 300]
+    assert sorted(delegator_stakes.tolist()) == [10, 25]
+
+
+def test_snapshot_and_graph_agree(tmp_path):
+    repo = graph()
+    from_graph = StakeAnalytics(repo, snapshot_dir=str(tmp_path)).compute()
+    export_snapshot(repo, 'v1', str(tmp_path))
+    from_snapshot = StakeAnalytics(repo, snapshot_dir=str(tmp_path)).compute('v1')
+
+    assert from_snapshot['validators'] == from_graph['validators']
+    assert from_snapshot['delegators'] == from_graph['delegators']
+
+
+def test_summary_is_cached_per_version(tmp_path):
+    repo = graph()
+    analytics = StakeAnalytics(repo, snapshot_dir=str(tmp_path))
+    first = analytics.summary('a')
+    repo.upsert_vertices('Validator', 'public_key', [{'public_key': 'v3', 'stake_cspr': 1}])
+
+    assert analytics.summary('a') is first
+    assert analytics.summary('b')['validators']['count'] == 3
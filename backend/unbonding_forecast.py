@@ -1,6 +1,7 @@
 import os
 import requests
 import logging
+import http_client
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -37,7 +38,7 @@ class UnbondingForecastService:
             try:
                 endpoint = f"{api_base}/cosmos/tx/v1beta1/txs"
                 logger.info(f"📡 Trying Babylon API: {api_base}...")
-                response = requests.get(endpoint, params=params, timeout=10)
+                response = http_client.get(endpoint, params=params, deadline=10)
                 response.raise_for_status()
                 data = response.json()
                 txs = data.get('tx_responses', [])
@@ -0,0 +1,72 @@
+"""
+Vertex ID cache for CasperEye ingesters.
+Maps (label, natural key) to the vertex ID returned by the last write so edges
+can be created with g.V(id) instead of an index lookup per entity.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional
+
+VERTEX_CACHE_SIZE = int(os.getenv("VERTEX_CACHE_SIZE", 100_000))
+
+
+class VertexCache:
+    """Bounded LRU of (label, natural key) -> vertex ID"""
+
+    def __init__(self, max_entries: int = VERTEX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, label: str, key: Hashable):
+        with self._lock:
+            vertex_id = self._entries.get((label, key))
+            if vertex_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((label, key))
+            self.hits += 1
+            return vertex_id
+
+    def put(self, label: str, key: Hashable, vertex_id):
+        with self._lock:
+            self._entries[(label, key)] = vertex_id
+            self._entries.move_to_end((label, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, label: str, ids: Dict[Hashable, object]):
+        """Records a writer's natural key -> vertex ID map"""
+        for key, vertex_id in ids.items():
+            self.put(label, key, vertex_id)
+
+    def ids(self, label: str) -> List:
+        """Every cached vertex ID for `label`"""
+        with self._lock:
+            return [vertex_id for (entry_label, _), vertex_id in self._entries.items() if entry_label == label]
+
+    def invalidate(self, label: str, keys: Iterable[Hashable]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop((label, key), None)
+
+    def clear(self, label: Optional[str] = None):
+        with self._lock:
+            if label is None:
+                self._entries.clear()
+            else:
+                for entry in [e for e in self._entries if e[0] == label]:
+                    del self._entries[entry]
+
+    def discard_ids(self, ids: Iterable):
+        """Drops entries pointing at the given vertex IDs"""
+        ids = set(ids)
+        with self._lock:
+            for entry in [e for e, vertex_id in self._entries.items() if vertex_id in ids]:
+                del self._entries[entry]
@@ -177,8 +177,8 @@ export default function Home() {
                           {Array.isArray(risks) && risks.length > 0 ? (
                             risks.map((item) => (
                               <div
-                                key={item.chain}
-                                onClick={() => setSelectedChain(item.chain)}
+                                key={item.validator}
+                                onClick={() => setSelectedChain(item.validator)}
                                 className={`p-3 rounded-lg border transition-colors cursor-pointer hover:shadow-lg ${item.risk === 'CRITICAL'
                                     ? 'border-red-300 bg-red-50 dark:border-red-900 dark:bg-red-950/30'
                                     : 'border-green-300 bg-green-50 dark:border-green-900 dark:bg-green-950/30'
@@ -186,9 +186,9 @@ export default function Home() {
                               >
                                 <div className="flex items-center justify-between gap-2">
                                   <div className="flex-1 min-w-0">
-                                    <div className="font-bold text-sm truncate">{item.chain}</div>
+                                    <div className="font-bold text-sm truncate">{item.validator}</div>
                                     <div className="text-xs text-gray-600 dark:text-gray-400">
-                                      {item.smart_money_cspr || item.smart_money_btc} CSPR
+                                      {item.whale_stake_cspr} CSPR
                                     </div>
                                   </div>
                                   {item.risk === 'CRITICAL' ? (
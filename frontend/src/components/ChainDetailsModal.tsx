@@ -4,7 +4,7 @@ import { X, Shield, Users, TrendingUp } from 'lucide-react';
 
 interface ChainDetails {
   chain: string;
-  smart_money_btc: number;
+  whale_stake_cspr: number;
   risk: string;
   providers: string[];
   whales: number;
@@ -16,7 +16,7 @@ interface ChainDetailsModalProps {
   chain: string | null;
   onClose: () => void;
   data: { nodes: any[]; links: any[] };
-  risks?: Array<{ chain: string; smart_money_btc: number; risk: string }>;
+  risks?: Array<{ validator: string; whale_stake_cspr: number; risk: string }>;
 }
 
 export default function ChainDetailsModal({ chain, onClose, data, risks }: ChainDetailsModalProps) {
@@ -55,19 +55,19 @@ export default function ChainDetailsModal({ chain, onClose, data, risks }: Chain
 
     // Get risk from backend data if available, otherwise calculate
     let risk = 'CRITICAL';
-    let smartMoneyBtc = whaleCount * 2.5;
+    let whaleStakeCspr = 0;
     
     if (Array.isArray(risks) && risks.length > 0) {
-      const riskData = risks.find(r => r.chain === chain);
+      const riskData = risks.find(r => r.validator === chain);
       if (riskData) {
         risk = riskData.risk;
-        smartMoneyBtc = riskData.smart_money_btc;
+        whaleStakeCspr = riskData.whale_stake_cspr;
       }
     }
 
     setDetails({
       chain,
-      smart_money_btc: smartMoneyBtc,
+      whale_stake_cspr: whaleStakeCspr,
       risk,
       providers: providerNames,
       whales: whaleCount,
@@ -122,7 +122,7 @@ export default function ChainDetailsModal({ chain, onClose, data, risks }: Chain
             <TrendingUp size={20} className="text-blue-400" />
             <span className="text-gray-300">Smart Money Backing</span>
           </div>
-          <div className="text-3xl font-bold text-blue-400">{details.smart_money_btc.toFixed(1)} BTC</div>
+          <div className="text-3xl font-bold text-blue-400">{details.whale_stake_cspr.toLocaleString()} CSPR</div>
           <div className="text-xs text-gray-400 mt-1">From {details.whales} whale staker{details.whales !== 1 ? 's' : ''}</div>
         </div>
 
@@ -13,6 +13,12 @@ interface Node {
 interface Link {
   source: string;
   target: string;
+  label?: string;
+}
+
+interface GraphDelta {
+  nodes: { added: Node[]; removed: string[]; changed: Node[] };
+  links: { added: Link[]; removed: Link[] };
 }
 
 interface Particle {
@@ -26,6 +32,10 @@ export default function LiveGraph() {
   const dataRef = useRef<{ nodes: Node[]; links: Link[] }>({ nodes: [], links: [] });
   const particlesRef = useRef<Particle[]>([]);
   const animationRef = useRef<number>();
+  const graphRef = useRef<{ nodes: Map<string, Node>; links: Map<string, Link> }>({
+    nodes: new Map(),
+    links: new Map(),
+  });
 
   const getFallbackData = () => ({
     nodes: [
@@ -71,6 +81,35 @@ export default function LiveGraph() {
     return positioned;
   };
 
+  const linkKey = (link: Link) => `${link.source}|${link.target}|${link.label ?? ''}`;
+
+  const publishGraph = () => {
+    const nodes = Array.from(graphRef.current.nodes.values());
+    if (nodes.length > 0) {
+      dataRef.current = { nodes, links: Array.from(graphRef.current.links.values()) };
+    } else {
+      console.warn('Graph data is empty, using fallback data');
+      dataRef.current = getFallbackData();
+    }
+  };
+
+  const applySnapshot = (snapshot: { nodes: Node[]; links: Link[] }) => {
+    graphRef.current = {
+      nodes: new Map(snapshot.nodes.map(n => [n.id, n])),
+      links: new Map(snapshot.links.map(l => [linkKey(l), l])),
+    };
+    publishGraph();
+  };
+
+  const applyDelta = (delta: GraphDelta) => {
+    const { nodes, links } = graphRef.current;
+    delta.nodes.removed.forEach(id => nodes.delete(id));
+    [...delta.nodes.added, ...delta.nodes.changed].forEach(n => nodes.set(n.id, n));
+    delta.links.removed.forEach(l => links.delete(linkKey(l)));
+    delta.links.added.forEach(l => links.set(linkKey(l), l));
+    publishGraph();
+  };
+
   const fetchData = async () => {
     try {
       const { apiCall } = await import('@/lib/api');
@@ -224,11 +263,46 @@ export default function LiveGraph() {
     };
   }, []);
 
-  // Fetch data on mount and periodically
+  // Subscribe to pushed graph updates; poll only while the stream is unavailable
   useEffect(() => {
-    fetchData();
-    const interval = setInterval(fetchData, 5000);
-    return () => clearInterval(interval);
+    let pollInterval: ReturnType<typeof setInterval> | undefined;
+    let source: EventSource | undefined;
+    let closed = false;
+
+    const startPolling = () => {
+      if (pollInterval) return;
+      fetchData();
+      pollInterval = setInterval(fetchData, 5000);
+    };
+
+    const stopPolling = () => {
+      if (pollInterval) clearInterval(pollInterval);
+      pollInterval = undefined;
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+    } else {
+      import('@/lib/api').then(({ getApiUrl }) => {
+        if (closed) return;
+        source = new EventSource(`${getApiUrl()}/graph-stream`);
+        source.addEventListener('snapshot', (e) => {
+          stopPolling();
+          applySnapshot(JSON.parse((e as MessageEvent).data));
+        });
+        source.addEventListener('delta', (e) => {
+          applyDelta(JSON.parse((e as MessageEvent).data));
+        });
+        // EventSource reconnects by itself; keep the graph fresh until it does
+        source.onerror = () => startPolling();
+      });
+    }
+
+    return () => {
+      closed = true;
+      stopPolling();
+      source?.close();
+    };
   }, []);
 
   return (